@@ -781,8 +781,10 @@ class CurveView(QtWidgets.QGraphicsScene):
             path = QtGui.QPainterPath(
                 QtCore.QPointF(-g_scene_size, -g_scene_size*curve_fn(-1))
             )
-            for x in range(-int(g_scene_size), int(g_scene_size+1), 2):
-                path.lineTo(x, -g_scene_size * curve_fn(x / g_scene_size))
+            xs = list(range(-int(g_scene_size), int(g_scene_size+1), 2))
+            ys = curve_fn.evaluate([x / g_scene_size for x in xs])
+            for x, y in zip(xs, ys):
+                path.lineTo(x, -g_scene_size * y)
             self.addPath(path, QtGui.QPen(QtGui.QColor(0, 200, 0)))
 
         # Update editor widget fields
@@ -15,9 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import copy
+import functools
 import logging
-import threading
 import time
 from xml.etree import ElementTree
 
@@ -243,7 +242,7 @@ class DoubleTapContainerFunctor(gremlin.base_classes.AbstractFunctor):
 
         # Copy state when input is pressed
         if value.current:
-            self.value_press = copy.deepcopy(value)
+            self.value_press = value.fork()
             self.event_press = event.clone()
 
         # Execute double tap logic
@@ -261,19 +260,21 @@ class DoubleTapContainerFunctor(gremlin.base_classes.AbstractFunctor):
                 self.tap_type = "single"
                 if self.activate_on == "exclusive":
                     self.double_action_timer = \
-                        threading.Timer(self.delay, self._single_tap)
-                    self.double_action_timer.start()
+                        gremlin.event_handler.EventHandler().call_later(
+                            self.delay,
+                            self._single_tap
+                        )
 
         # Input is being released at this point
-        elif self.double_action_timer and self.double_action_timer.is_alive():
+        elif self.double_action_timer and self.double_action_timer.is_pending:
             # if releasing single tap before delay
             # we will want to send a short press and release
             self.double_action_timer.cancel()
-            self.double_action_timer = threading.Timer(
-                (self.start_time + self.delay) - time.time(),
-                lambda: self._single_tap(event, value)
-            )
-            self.double_action_timer.start()
+            self.double_action_timer = \
+                gremlin.event_handler.EventHandler().call_later(
+                    max(0.0, (self.start_time + self.delay) - time.time()),
+                    functools.partial(self._single_tap, event, value)
+                )
 
         if self.tap_type == "double":
             self.double_tap.process_event(event, value)
@@ -286,8 +287,14 @@ class DoubleTapContainerFunctor(gremlin.base_classes.AbstractFunctor):
         """Callback executed, when the delay expires."""
         self.single_tap.process_event(self.event_press, self.value_press)
         if event_release:
-            time.sleep(0.05)
-            self.single_tap.process_event(event_release, value_release)
+            gremlin.event_handler.EventHandler().call_later(
+                0.05,
+                functools.partial(
+                    self.single_tap.process_event,
+                    event_release,
+                    value_release
+                )
+            )
 
 
 class DoubleTapContainer(gremlin.base_classes.AbstractContainer):
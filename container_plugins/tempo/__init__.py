@@ -15,9 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import copy
+import functools
 import logging
-import threading
 import time
 from xml.etree import ElementTree
 
@@ -240,14 +239,18 @@ class TempoContainerFunctor(gremlin.base_classes.AbstractFunctor):
 
         # Copy state when input is pressed
         if value.current:
-            self.value_press = copy.deepcopy(value)
+            self.value_press = value.fork()
             self.event_press = event.clone()
 
         # Execute tempo logic
         if value.current:
             self.start_time = time.time()
-            self.timer = threading.Timer(self.delay, self._long_press)
-            self.timer.start()
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = gremlin.event_handler.EventHandler().call_later(
+                self.delay,
+                self._long_press
+            )
 
             if self.activate_on == "press":
                 self.short_set.process_event(self.event_press, self.value_press)
@@ -257,12 +260,12 @@ class TempoContainerFunctor(gremlin.base_classes.AbstractFunctor):
                 self.timer.cancel()
 
                 if self.activate_on == "release":
-                    threading.Thread(target=lambda: self._short_press(
+                    self._short_press(
                         self.event_press,
                         self.value_press,
                         event,
                         value
-                    )).start()
+                    )
                 else:
                     self.short_set.process_event(event, value)
             # Long press
@@ -284,8 +287,10 @@ class TempoContainerFunctor(gremlin.base_classes.AbstractFunctor):
         :param value_r value to release the action
         """
         self.short_set.process_event(event_p, value_p)
-        time.sleep(0.05)
-        self.short_set.process_event(event_r, value_r)
+        gremlin.event_handler.EventHandler().call_later(
+            0.05,
+            functools.partial(self.short_set.process_event, event_r, value_r)
+        )
 
     def _long_press(self):
         """Callback executed, when the delay expires."""
@@ -16,7 +16,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-import copy
 import ctypes
 import ctypes.wintypes as ctwt
 from enum import Enum
@@ -127,6 +126,8 @@ class GUID:
 
     """Python GUID class."""
 
+    __slots__ = ("_ctypes_guid", "guid", "_hash")
+
     def __init__(self, guid):
         """Creates a new instance.
 
@@ -136,7 +137,7 @@ class GUID:
             Mapping of a C struct representing a device GUID
         """
         assert isinstance(guid, _GUID)
-        self._ctypes_guid = copy.deepcopy(guid)
+        self._ctypes_guid = _GUID.from_buffer_copy(guid)
         self.guid = (
             guid.Data1,
             guid.Data2,
@@ -146,6 +147,32 @@ class GUID:
             (guid.Data4[4] << 24) + (guid.Data4[5] << 16) +
             (guid.Data4[6] << 8) + guid.Data4[7]
         )
+        # The GUID is immutable, hence the hash is computed only once
+        self._hash = hash(self.guid)
+
+    @staticmethod
+    def from_ctype(guid):
+        """Returns the shared instance corresponding to the C structure.
+
+        Instances are cached by the raw bytes of the structure, such that
+        every device is represented by a single instance which is created
+        the first time the device is seen.
+
+        Parameters
+        ==========
+        guid : _GUID
+            Mapping of a C struct representing a device GUID
+
+        Returns
+        =======
+        GUID
+            Instance representing the provided GUID
+        """
+        raw = bytes(guid)
+        instance = _guid_cache.get(raw)
+        if instance is None:
+            instance = _guid_cache.setdefault(raw, GUID(guid))
+        return instance
 
     @property
     def ctypes(self):
@@ -212,24 +239,15 @@ class GUID:
         int
             The has computed from this GUID
         """
-        return hash((
-            self._ctypes_guid.Data1,
-            self._ctypes_guid.Data2,
-            self._ctypes_guid.Data3,
-            self._ctypes_guid.Data4[0],
-            self._ctypes_guid.Data4[1],
-            self._ctypes_guid.Data4[2],
-            self._ctypes_guid.Data4[3],
-            self._ctypes_guid.Data4[4],
-            self._ctypes_guid.Data4[5],
-            self._ctypes_guid.Data4[6],
-            self._ctypes_guid.Data4[7]
-        ))
-
-
-GUID_Keyboard = GUID(_GUID_SysKeyboard)
-GUID_Virtual = GUID(_GUID_Virtual)
-GUID_Invalid = GUID(_GUID_Invalid)
+        return self._hash
+
+
+# Shared GUID instances indexed by the raw bytes of their C structure
+_guid_cache = {}
+
+GUID_Keyboard = GUID.from_ctype(_GUID_SysKeyboard)
+GUID_Virtual = GUID.from_ctype(_GUID_Virtual)
+GUID_Invalid = GUID.from_ctype(_GUID_Invalid)
 
 
 class InputType(Enum):
@@ -301,6 +319,8 @@ class InputEvent:
     input, the index, and the new value as well as device GUID are reported.
     """
 
+    __slots__ = ("device_guid", "input_type", "input_index", "value")
+
     def __init__(self, data):
         """Creates a new instance.
 
@@ -309,7 +329,7 @@ class InputEvent:
         data : _JoystickInputData
             The data received from DILL and to be held by this isntance
         """
-        self.device_guid = GUID(data.device_guid)
+        self.device_guid = GUID.from_ctype(data.device_guid)
         self.input_type = InputType.from_ctype(data.input_type)
         self.input_index = int(data.input_index)
         self.value = int(data.value)
@@ -350,7 +370,7 @@ class DeviceSummary:
         data : _DeviceSummary
             The data received from DILL and to be held by this instance
         """
-        self.device_guid = GUID(data.device_guid)
+        self.device_guid = GUID.from_ctype(data.device_guid)
         self.vendor_id = data.vendor_id
         self.product_id = data.product_id
         self.joystick_id = data.joystick_id
@@ -393,28 +413,39 @@ class DeviceSummary:
 C_EVENT_CALLBACK = ctypes.CFUNCTYPE(None, _JoystickInputData)
 C_DEVICE_CHANGE_CALLBACK = ctypes.CFUNCTYPE(None, _DeviceSummary, ctypes.c_uint8)
 
-_dll_path = os.path.join(os.path.dirname(__file__), "dill.dll")
-_di_listener_dll = ctypes.cdll.LoadLibrary(_dll_path)
+def _load_library():
+    """Returns the library implementing the DILL API.
 
-_di_listener_dll.get_device_information_by_index.argtypes = [ctypes.c_uint]
-_di_listener_dll.get_device_information_by_index.restype = _DeviceSummary
+    Setting the GREMLIN_BACKEND environment variable to "fake" selects the
+    pure Python implementation in dill.fake, otherwise the dll is loaded.
 
-
-class DILL:
-
-    """Exposes functions of the DILL library in an easy to use manner."""
+    Returns
+    =======
+    object
+        Library exposing the DILL API functions
+    """
+    if os.environ.get("GREMLIN_BACKEND") == "fake":
+        from dill import fake
+        return fake.FakeDILL()
 
     # Attempt to find the correct location of the dll for development
     # and installed use cases.
-    _dev_path = os.path.join(os.path.dirname(__file__), "dill.dll")
+    dev_path = os.path.join(os.path.dirname(__file__), "dill.dll")
     if os.path.isfile("dill.dll"):
-        _dll_path = "dill.dll"
-    elif os.path.isfile(_dev_path):
-        _dll_path = _dev_path
+        dll_path = "dill.dll"
+    elif os.path.isfile(dev_path):
+        dll_path = dev_path
     else:
         raise DILLError("Unable to locate di_listener dll")
 
-    _dll = ctypes.cdll.LoadLibrary(_dll_path)
+    return ctypes.cdll.LoadLibrary(dll_path)
+
+
+class DILL:
+
+    """Exposes functions of the DILL library in an easy to use manner."""
+
+    _dll = _load_library()
 
     # Storage for the callback functions
     device_change_callback_fn = None
@@ -648,6 +679,10 @@ class DILL:
     @staticmethod
     def initialize_capi():
         """Initializes the functions as class methods."""
+        # Only the dll requires type information, the fake is pure Python
+        if not isinstance(DILL._dll, ctypes.CDLL):
+            return
+
         for fn_name, params in DILL.api_functions.items():
             dll_fn = getattr(DILL._dll, fn_name)
             if "arguments" in params:
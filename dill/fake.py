@@ -0,0 +1,394 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Pure Python stand-in for the DILL library.
+
+The fake library exposes the same functions as the dll and is used in place
+of it when the GREMLIN_BACKEND environment variable is set to "fake". Devices
+are added and events injected via the additional control functions, which
+allows running the input processing without DirectInput being available.
+"""
+
+import threading
+
+import dill
+
+
+# Integer values used by DILL to encode the input types
+_input_type_values = {
+    dill.InputType.Axis: 1,
+    dill.InputType.Button: 2,
+    dill.InputType.Hat: 3
+}
+
+
+class FakeDILL:
+
+    """Implementation of the DILL API backed by in memory devices."""
+
+    def __init__(self):
+        """Creates a new instance without any devices."""
+        self._devices = []
+        self._state = {}
+        self._lock = threading.Lock()
+        self._guid_counter = 0
+
+        self._input_event_callback = None
+        self._device_change_callback = None
+
+    # DILL API
+
+    def init(self):
+        """Initializes the library, nothing to be done for the fake."""
+        pass
+
+    def set_input_event_callback(self, callback):
+        """Sets the callback function to use for input events.
+
+        Parameters
+        ==========
+        callback : C_EVENT_CALLBACK
+            Function to execute when an event occurs
+        """
+        self._input_event_callback = callback
+
+    def set_device_change_callback(self, callback):
+        """Sets the callback function to use for device change events.
+
+        Parameters
+        ==========
+        callback : C_DEVICE_CHANGE_CALLBACK
+            Function to execute when a device changes state
+        """
+        self._device_change_callback = callback
+
+    def get_device_count(self):
+        """Returns the number of connected devices.
+
+        Returns
+        =======
+        int
+            Number of connected devices
+        """
+        return len(self._devices)
+
+    def get_device_information_by_index(self, index):
+        """Returns the device information for the given index.
+
+        Parameters
+        ==========
+        index : int
+            Index of the device of interest
+
+        Returns
+        =======
+        _DeviceSummary
+            Structure containing information about the device
+        """
+        return self._devices[index]
+
+    def get_device_information_by_guid(self, guid):
+        """Returns the device information for the given GUID.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device of interest
+
+        Returns
+        =======
+        _DeviceSummary
+            Structure containing information about the device, empty if no
+            such device exists
+        """
+        index = self._find_device(guid)
+        if index is None:
+            return dill._DeviceSummary()
+        return self._devices[index]
+
+    def device_exists(self, guid):
+        """Returns whether or not a specific device is connected.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device of interest
+
+        Returns
+        =======
+        bool
+            True if the device is connected, False otherwise
+        """
+        return self._find_device(guid) is not None
+
+    def get_axis(self, guid, index):
+        """Returns the raw value of an axis.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device of interest
+        index : int
+            Index of the axis
+
+        Returns
+        =======
+        int
+            Raw value of the axis
+        """
+        return self._state[bytes(guid)][dill.InputType.Axis].get(index, 0)
+
+    def get_button(self, guid, index):
+        """Returns the state of a button.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device of interest
+        index : int
+            Index of the button
+
+        Returns
+        =======
+        bool
+            True if the button is pressed, False otherwise
+        """
+        state = self._state[bytes(guid)][dill.InputType.Button]
+        return state.get(index, 0) == 1
+
+    def get_hat(self, guid, index):
+        """Returns the raw value of a hat.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device of interest
+        index : int
+            Index of the hat
+
+        Returns
+        =======
+        int
+            Raw value of the hat
+        """
+        return self._state[bytes(guid)][dill.InputType.Hat].get(index, -1)
+
+    # Control functions
+
+    def add_device(
+            self,
+            name,
+            axis_count=0,
+            button_count=0,
+            hat_count=0,
+            vendor_id=0,
+            product_id=0,
+            guid=None
+    ):
+        """Adds a new device and announces it via the device change callback.
+
+        Axes are assigned the DirectInput indices 1 to axis_count.
+
+        Parameters
+        ==========
+        name : str
+            Name of the device
+        axis_count : int
+            Number of axes, at most 8
+        button_count : int
+            Number of buttons
+        hat_count : int
+            Number of hats
+        vendor_id : int
+            USB vendor id of the device
+        product_id : int
+            USB product id of the device
+        guid : GUID
+            GUID to use for the device, one is generated if none is provided
+
+        Returns
+        =======
+        GUID
+            GUID of the newly added device
+        """
+        summary = dill._DeviceSummary()
+        if guid is None:
+            with self._lock:
+                self._guid_counter += 1
+                summary.device_guid.Data1 = 0x0fa4e000 + self._guid_counter
+        else:
+            summary.device_guid = guid.ctypes
+        summary.vendor_id = vendor_id
+        summary.product_id = product_id
+        summary.joystick_id = len(self._devices)
+        summary.name = name.encode("utf-8")
+        summary.axis_count = axis_count
+        summary.button_count = button_count
+        summary.hat_count = hat_count
+        for i in range(axis_count):
+            summary.axis_map[i].linear_index = i + 1
+            summary.axis_map[i].axis_index = i + 1
+
+        with self._lock:
+            self._devices.append(summary)
+            self._state[bytes(summary.device_guid)] = {
+                dill.InputType.Axis: {},
+                dill.InputType.Button: {},
+                dill.InputType.Hat: {}
+            }
+        if self._device_change_callback is not None:
+            self._device_change_callback(
+                summary,
+                dill.DeviceActionType.Connected.value
+            )
+        return dill.GUID.from_ctype(summary.device_guid)
+
+    def add_vjoy_device(self, axis_count, button_count, hat_count):
+        """Adds a device which is reported as a vJoy device.
+
+        Parameters
+        ==========
+        axis_count : int
+            Number of axes, at most 8
+        button_count : int
+            Number of buttons
+        hat_count : int
+            Number of hats
+
+        Returns
+        =======
+        GUID
+            GUID of the newly added device
+        """
+        return self.add_device(
+            "vJoy Device",
+            axis_count,
+            button_count,
+            hat_count,
+            vendor_id=0x1234,
+            product_id=0xBEAD
+        )
+
+    def remove_device(self, guid):
+        """Removes a device and announces it via the device change callback.
+
+        Parameters
+        ==========
+        guid : GUID
+            GUID of the device to remove
+        """
+        with self._lock:
+            index = self._find_device(guid.ctypes)
+            if index is None:
+                return
+            summary = self._devices.pop(index)
+            del self._state[bytes(summary.device_guid)]
+        if self._device_change_callback is not None:
+            self._device_change_callback(
+                summary,
+                dill.DeviceActionType.Disconnected.value
+            )
+
+    def inject_axis(self, guid, index, value):
+        """Injects an axis event.
+
+        Parameters
+        ==========
+        guid : GUID
+            GUID of the device the event originates from
+        index : int
+            DirectInput index of the axis
+        value : int
+            Raw axis value in [-32768, 32767]
+        """
+        self._inject(guid, dill.InputType.Axis, index, value)
+
+    def inject_button(self, guid, index, is_pressed):
+        """Injects a button event.
+
+        Parameters
+        ==========
+        guid : GUID
+            GUID of the device the event originates from
+        index : int
+            Index of the button
+        is_pressed : bool
+            True if the button is pressed, False otherwise
+        """
+        self._inject(
+            guid,
+            dill.InputType.Button,
+            index,
+            1 if is_pressed else 0
+        )
+
+    def inject_hat(self, guid, index, value):
+        """Injects a hat event.
+
+        Parameters
+        ==========
+        guid : GUID
+            GUID of the device the event originates from
+        index : int
+            Index of the hat
+        value : int
+            Raw hat value, -1 for center or the angle in hundredths of degrees
+        """
+        self._inject(guid, dill.InputType.Hat, index, value)
+
+    def _inject(self, guid, input_type, index, value):
+        """Updates the input state and passes the event to the callback.
+
+        Parameters
+        ==========
+        guid : GUID
+            GUID of the device the event originates from
+        input_type : InputType
+            Type of the input
+        index : int
+            Index of the input
+        value : int
+            Raw value of the input
+        """
+        data = dill._JoystickInputData()
+        data.device_guid = guid.ctypes
+        data.input_type = _input_type_values[input_type]
+        data.input_index = index
+        data.value = value
+
+        self._state[bytes(data.device_guid)][input_type][index] = value
+        if self._input_event_callback is not None:
+            self._input_event_callback(data)
+
+    def _find_device(self, guid):
+        """Returns the index of the device with the given GUID.
+
+        Parameters
+        ==========
+        guid : _GUID
+            GUID of the device to find
+
+        Returns
+        =======
+        int
+            Index of the device or None if no such device exists
+        """
+        raw = bytes(guid)
+        for i, summary in enumerate(self._devices):
+            if bytes(summary.device_guid) == raw:
+                return i
+        return None
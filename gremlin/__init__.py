@@ -29,12 +29,15 @@ import gremlin.fsm
 import gremlin.hid_guardian
 import gremlin.hints
 import gremlin.input_devices
+import gremlin.input_trace
 import gremlin.joystick_handling
+import gremlin.latency
 import gremlin.macro
 import gremlin.plugin_manager
 import gremlin.process_monitor
 import gremlin.profile
 import gremlin.repeater
+import gremlin.scheduler
 import gremlin.shared_state
 import gremlin.sendinput
 import gremlin.spline
@@ -16,7 +16,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import abstractmethod, ABCMeta
-from functools import partial
 import logging
 
 import dill
@@ -25,38 +24,12 @@ from . import base_classes, common, event_handler, fsm, input_devices, \
     joystick_handling, macro, util
 
 
-def smart_all(conditions):
-    """Returns True if all conditions are True, False otherwise.
-
-    Employs short circuiting in order to prevent unnecessary evaluations.
-
-    :param conditions the conditions to check
-    :return True if all conditions are True, False otherwise
-    """
-    for condition in conditions:
-        if not condition():
-            return False
-    return True
-
-
-def smart_any(conditions):
-    """Returns True if any conditions is True, False if none is True.
-
-    Employs short circuiting in order to prevent unnecessary evaluations.
-
-    :param conditions the conditions to check
-    :return True if at least one condition is True, False otherwise
-    """
-    for condition in conditions:
-        if condition():
-            return True
-    return False
-
-
 class Value:
 
     """Represents an input value, keeping track of raw and "seen" value."""
 
+    __slots__ = ("_raw", "_current")
+
     def __init__(self, raw):
         """Creates a new value and initializes it.
 
@@ -89,6 +62,19 @@ class Value:
         """
         self._current = current
 
+    def fork(self):
+        """Returns an independent copy of this value.
+
+        Both raw and current values are immutable, hence a shallow copy
+        suffices.
+
+        :return new value with the same raw and current value
+        """
+        value = Value.__new__(Value)
+        value._raw = self._raw
+        value._current = self._current
+        return value
+
 
 class ActivationCondition:
 
@@ -99,25 +85,33 @@ class ActivationCondition:
     True or False.
     """
 
-    rule_function = {
-        base_classes.ActivationRule.All: smart_all,
-        base_classes.ActivationRule.Any: smart_any
-    }
-
     def __init__(self, conditions, rule):
         self._conditions = conditions
         self._rule = rule
+        # Specialized evaluation functions of all conditions, created once
+        # such that evaluating them requires no further dispatch
+        self._evaluators = tuple(c.evaluator() for c in conditions)
+        self._require_all = rule == base_classes.ActivationRule.All
 
     def process_event(self, event, value):
         """Returns whether or not a condition is satisfied, i.e. true.
 
+        Evaluation stops as soon as the outcome is determined.
+
         :param event the event this condition was triggered through
         :param value process event value
         :return True if all conditions are satisfied, False otherwise
         """
-        return ActivationCondition.rule_function[self._rule](
-            [partial(c, event, value) for c in self._conditions]
-        )
+        if self._require_all:
+            for evaluate in self._evaluators:
+                if not evaluate(event, value):
+                    return False
+            return True
+        else:
+            for evaluate in self._evaluators:
+                if evaluate(event, value):
+                    return True
+            return False
 
 
 class AbstractCondition(metaclass=ABCMeta):
@@ -134,8 +128,8 @@ class AbstractCondition(metaclass=ABCMeta):
         :param comparison the comparison operation to perform when evaluated
         """
         self.comparison = comparison
+        self._evaluator = None
 
-    @abstractmethod
     def __call__(self, event, value):
         """Evaluates the condition using the condition and provided data.
 
@@ -143,9 +137,111 @@ class AbstractCondition(metaclass=ABCMeta):
         :param value the possibly modified value
         :return True if the condition is satisfied, False otherwise
         """
+        return self.evaluator()(event, value)
+
+    def evaluator(self):
+        """Returns the function evaluating this condition.
+
+        The function is created on first use.
+
+        :return function taking the event and value and returning True if
+            the condition is satisfied, False otherwise
+        """
+        if self._evaluator is None:
+            self._evaluator = self._create_evaluator()
+        return self._evaluator
+
+    @abstractmethod
+    def _create_evaluator(self):
+        """Creates a function evaluating this condition.
+
+        The returned function is specialized for the input type and
+        comparison of the condition, such that no dispatch has to happen
+        when it is evaluated.
+
+        :return function taking the event and value and returning True if
+            the condition is satisfied, False otherwise
+        """
         pass
 
 
+def _always_false(event, value):
+    """Evaluation function of conditions that can never be satisfied.
+
+    :param event raw event that caused the condition to be evaluated
+    :param value the possibly modified value
+    :return False
+    """
+    return False
+
+
+def _always_true(event, value):
+    """Evaluation function of conditions that are always satisfied.
+
+    :param event raw event that caused the condition to be evaluated
+    :param value the possibly modified value
+    :return True
+    """
+    return True
+
+
+def _joystick_evaluator(lookup, device_id, input_type, input_id, condition):
+    """Returns a function evaluating a condition on a joystick input.
+
+    The state of the input is read from the input state mirror. Conditions
+    on devices which are not connected evaluate to False.
+
+    :param lookup function returning the DeviceState for the device_id
+    :param device_id identifier of the device passed to lookup
+    :param input_type the type of the input
+    :param input_id the index of the input
+    :param condition the condition to check against
+    :return function evaluating the condition
+    """
+    comparison = condition.comparison
+
+    if input_type == common.InputType.JoystickAxis:
+        low, high = condition.range
+        if comparison == "inside":
+            def evaluate(event, value):
+                state = lookup(device_id)
+                return state is not None and \
+                    low <= state.axes[input_id] <= high
+        elif comparison == "outside":
+            def evaluate(event, value):
+                state = lookup(device_id)
+                return state is not None and \
+                    not low <= state.axes[input_id] <= high
+        else:
+            evaluate = _always_false
+    elif input_type == common.InputType.JoystickButton:
+        if comparison == "pressed":
+            def evaluate(event, value):
+                state = lookup(device_id)
+                return state is not None and state.buttons[input_id] == 1
+        else:
+            def evaluate(event, value):
+                state = lookup(device_id)
+                return state is not None and state.buttons[input_id] == 0
+    elif input_type == common.InputType.JoystickHat:
+        # Raw hat values corresponding to the desired direction
+        direction = util.hat_direction_to_tuple(comparison)
+        raw_values = frozenset(
+            raw for raw, hat_direction in util.dill_hat_lookup.items()
+            if hat_direction == direction
+        )
+
+        def evaluate(event, value):
+            state = lookup(device_id)
+            return state is not None and state.hats[input_id] in raw_values
+    else:
+        logging.getLogger("system").warning(
+            "Invalid input_type {} received".format(input_type)
+        )
+        evaluate = _always_false
+    return evaluate
+
+
 class KeyboardCondition(AbstractCondition):
 
     """Condition verifying the state of keyboard keys.
@@ -164,18 +260,20 @@ class KeyboardCondition(AbstractCondition):
         super().__init__(comparison)
         self.key = macro.key_from_code(scan_code, is_extended)
 
-    def __call__(self, event, value):
-        """Evaluates the condition using the condition and provided data.
+    def _create_evaluator(self):
+        """Creates a function evaluating this condition.
 
-        :param event raw event that caused the condition to be evaluated
-        :param value the possibly modified value
-        :return True if the condition is satisfied, False otherwise
+        :return function evaluating this condition
         """
-        key_pressed = input_devices.Keyboard().is_pressed(self.key)
+        keyboard = input_devices.Keyboard()
+        key = self.key
         if self.comparison == "pressed":
-            return key_pressed
+            def evaluate(event, value):
+                return keyboard.is_pressed(key)
         else:
-            return not key_pressed
+            def evaluate(event, value):
+                return not keyboard.is_pressed(key)
+        return evaluate
 
 
 class JoystickCondition(AbstractCondition):
@@ -199,37 +297,18 @@ class JoystickCondition(AbstractCondition):
         self.input_id = condition.input_id
         self.condition = condition
 
-    def __call__(self, event, value):
-        """Evaluates the condition using the condition and provided data.
+    def _create_evaluator(self):
+        """Creates a function evaluating this condition.
 
-        :param event raw event that caused the condition to be evaluated
-        :param value the possibly modified value
-        :return True if the condition is satisfied, False otherwise
+        :return function evaluating this condition
         """
-        joy = input_devices.JoystickProxy()[self.device_guid]
-
-        if self.input_type == common.InputType.JoystickAxis:
-            in_range = self.condition.range[0] <= \
-                       joy.axis(self.input_id).value <= \
-                       self.condition.range[1]
-
-            if self.comparison in ["inside", "outside"]:
-                return in_range if self.comparison == "inside" else not in_range
-            else:
-                return False
-        elif self.input_type == common.InputType.JoystickButton:
-            if self.comparison == "pressed":
-                return joy.button(self.input_id).is_pressed
-            else:
-                return not joy.button(self.input_id).is_pressed
-        elif self.input_type == common.InputType.JoystickHat:
-            return joy.hat(self.input_id).direction == \
-                   util.hat_direction_to_tuple(self.comparison)
-        else:
-            logging.getLogger("system").warning(
-                "Invalid input_type {} received".format(self.input_type)
-            )
-            return False
+        return _joystick_evaluator(
+            joystick_handling.input_state.device,
+            self.device_guid,
+            self.input_type,
+            self.input_id,
+            self.condition
+        )
 
 
 class VJoyCondition(AbstractCondition):
@@ -249,51 +328,22 @@ class VJoyCondition(AbstractCondition):
         """
         super().__init__(condition.comparison)
         self.vjoy_id = condition.vjoy_id
-        self.device_guid = None
-        for dev in joystick_handling.vjoy_devices():
-            if dev.vjoy_id == self.vjoy_id:
-                self.device_guid = dev.device_guid
-                break
         self.input_type = condition.input_type
         self.input_id = condition.input_id
         self.condition = condition
 
-    def __call__(self, event, value):
-        """Evaluates the condition using the condition and provided data.
+    def _create_evaluator(self):
+        """Creates a function evaluating this condition.
 
-        :param event raw event that caused the condition to be evaluated
-        :param value the possibly modified value
-        :return True if the condition is satisfied, False otherwise
+        :return function evaluating this condition
         """
-        if self.device_guid is None:
-            logging.getLogger("system").warning(
-                "GUID for vJoy {} not found".format(self.vjoy_id)
-            )
-            return False
-        joy = input_devices.JoystickProxy()[self.device_guid]
-
-        if self.input_type == common.InputType.JoystickAxis:
-            in_range = self.condition.range[0] <= \
-                       joy.axis(self.input_id).value <= \
-                       self.condition.range[1]
-
-            if self.comparison in ["inside", "outside"]:
-                return in_range if self.comparison == "inside" else not in_range
-            else:
-                return False
-        elif self.input_type == common.InputType.JoystickButton:
-            if self.comparison == "pressed":
-                return joy.button(self.input_id).is_pressed
-            else:
-                return not joy.button(self.input_id).is_pressed
-        elif self.input_type == common.InputType.JoystickHat:
-            return joy.hat(self.input_id).direction == \
-                   util.hat_direction_to_tuple(self.comparison)
-        else:
-            logging.getLogger("system").warning(
-                "Invalid input_type {} received".format(self.input_type)
-            )
-            return False
+        return _joystick_evaluator(
+            joystick_handling.input_state.vjoy_device,
+            self.vjoy_id,
+            self.input_type,
+            self.input_id,
+            self.condition
+        )
 
 
 class InputActionCondition(AbstractCondition):
@@ -311,21 +361,22 @@ class InputActionCondition(AbstractCondition):
         """
         super().__init__(comparison)
 
-    def __call__(self, event, value):
-        """Evaluates the condition using the condition and provided data.
+    def _create_evaluator(self):
+        """Creates a function evaluating this condition.
 
-        :param event raw event that caused the condition to be evaluated
-        :param value the possibly modified value
-        :return True if the condition is satisfied, False otherwise
+        :return function evaluating this condition
         """
         if self.comparison == "pressed":
-            return value.current
+            def evaluate(event, value):
+                return value.current
         elif self.comparison == "released":
-            return not value.current
+            def evaluate(event, value):
+                return not value.current
         elif self.comparison == "always":
-            return True
+            evaluate = _always_true
         else:
-            return False
+            evaluate = _always_false
+        return evaluate
 
 
 class VirtualButton(metaclass=ABCMeta):
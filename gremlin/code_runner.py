@@ -23,6 +23,8 @@ import string
 import sys
 import time
 
+from PyQt5 import QtCore
+
 import dill
 
 import gremlin
@@ -45,6 +47,7 @@ class CodeRunner:
         self._inheritance_tree = None
         self._vjoy_curves = VJoyCurves()
         self._merge_axes = []
+        self._dispatcher = None
         self._running = False
 
     def is_running(self):
@@ -76,6 +79,10 @@ class CodeRunner:
         # Set default macro action delay
         gremlin.macro.MacroManager().default_delay = settings.default_delay
 
+        # Combine vJoy writes unless immediate writes are requested
+        vjoy_module.vjoy.write_combiner.enabled = \
+            gremlin.config.Configuration().vjoy_write_combining
+
         # Retrieve list of current paths searched by Python
         system_paths = [os.path.normcase(os.path.abspath(p)) for p in sys.path]
 
@@ -125,7 +132,7 @@ class CodeRunner:
             callback_count = 0
             for dev_id, modes in input_devices.callback_registry.registry.items():
                 for mode, events in modes.items():
-                    for event, callback_list in events.items():
+                    for event, callback_list in events.values():
                         for callback in callback_list.values():
                             self.event_handler.add_callback(
                                 dev_id,
@@ -244,19 +251,37 @@ class CodeRunner:
                 for aid, value in data.items():
                     vjoy_proxy.axis(linear_index=aid).set_absolute_value(value)
 
-            # Connect signals
+            # Connect signals, either processing events on a dedicated
+            # thread or directly on the thread owning the event handler
             evt_listener = event_handler.EventListener()
-            kb = input_devices.Keyboard()
-            evt_listener.keyboard_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.joystick_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.virtual_event.connect(
-                self.event_handler.process_event
-            )
-            evt_listener.keyboard_event.connect(kb.keyboard_event)
+            if gremlin.config.Configuration().dispatch_thread:
+                self._dispatcher = event_handler.EventDispatcher(
+                    self._dispatch_event,
+                    evt_listener.joystick_ui_event.emit
+                )
+                for signal in self._input_signals(evt_listener):
+                    signal.connect(
+                        self._dispatcher.push,
+                        QtCore.Qt.DirectConnection
+                    )
+                self.event_handler.deferred_call.connect(
+                    self._dispatcher.call,
+                    QtCore.Qt.DirectConnection
+                )
+                evt_listener.set_ui_forwarding(False)
+                self._dispatcher.start()
+            else:
+                release_actions = input_devices.ButtonReleaseActions()
+                for signal in self._input_signals(evt_listener):
+                    signal.connect(release_actions.process_event)
+                    signal.connect(self.event_handler.process_event)
+                self.event_handler.deferred_call.connect(
+                    self.event_handler.run_deferred,
+                    QtCore.Qt.QueuedConnection
+                )
+                evt_listener.keyboard_event.connect(
+                    input_devices.Keyboard().keyboard_event
+                )
             evt_listener.gremlin_active = True
 
             input_devices.periodic_registry.start()
@@ -278,11 +303,26 @@ class CodeRunner:
         # Disconnect all signals
         if self._running:
             evt_lst = event_handler.EventListener()
-            kb = input_devices.Keyboard()
-            evt_lst.keyboard_event.disconnect(self.event_handler.process_event)
-            evt_lst.joystick_event.disconnect(self.event_handler.process_event)
-            evt_lst.virtual_event.disconnect(self.event_handler.process_event)
-            evt_lst.keyboard_event.disconnect(kb.keyboard_event)
+            if self._dispatcher is not None:
+                for signal in self._input_signals(evt_lst):
+                    signal.disconnect(self._dispatcher.push)
+                self.event_handler.deferred_call.disconnect(
+                    self._dispatcher.call
+                )
+                self._dispatcher.stop()
+                self._dispatcher = None
+                evt_lst.set_ui_forwarding(True)
+            else:
+                release_actions = input_devices.ButtonReleaseActions()
+                for signal in self._input_signals(evt_lst):
+                    signal.disconnect(release_actions.process_event)
+                    signal.disconnect(self.event_handler.process_event)
+                self.event_handler.deferred_call.disconnect(
+                    self.event_handler.run_deferred
+                )
+                evt_lst.keyboard_event.disconnect(
+                    input_devices.Keyboard().keyboard_event
+                )
             evt_lst.gremlin_active = False
             self.event_handler.mode_changed.disconnect(
                 self._vjoy_curves.mode_changed
@@ -303,6 +343,32 @@ class CodeRunner:
         # Remove all claims on VJoy devices
         joystick_handling.VJoyProxy.reset()
 
+    def _dispatch_event(self, event):
+        """Processes a single event on the dispatch thread.
+
+        Mirrors the order in which the signal connections are made when
+        events are processed without a dispatch thread.
+
+        :param event the event to process
+        """
+        input_devices.ButtonReleaseActions().process_event(event)
+        self.event_handler.process_event(event)
+        if event.event_type == gremlin.common.InputType.Keyboard:
+            input_devices.Keyboard().keyboard_event(event)
+
+    @staticmethod
+    def _input_signals(evt_listener):
+        """Returns the listener signals carrying events to process.
+
+        :param evt_listener the event listener instance
+        :return list of signals whose events are processed
+        """
+        return [
+            evt_listener.joystick_event,
+            evt_listener.keyboard_event,
+            evt_listener.virtual_event
+        ]
+
     def _reset_state(self):
         """Resets all states to their default values."""
         self.event_handler._active_mode =\
@@ -318,7 +384,25 @@ class VJoyCurves:
 
     def __init__(self):
         """Creates a new instance"""
-        self.profile_data = None
+        self._profile_data = None
+        self._tables = {}
+
+    @property
+    def profile_data(self):
+        """Returns the vJoy device data of the profile.
+
+        :return vJoy device data of the profile
+        """
+        return self._profile_data
+
+    @profile_data.setter
+    def profile_data(self, profile_data):
+        """Sets the vJoy device data of the profile.
+
+        :param profile_data vJoy device data of the profile
+        """
+        self._profile_data = profile_data
+        self._tables = {}
 
     def mode_changed(self, mode_name):
         """Called when the mode changes and updates vJoy response curves.
@@ -341,12 +425,33 @@ class VJoyCurves:
                     if len(data.containers) > 0 and \
                             vjoy[vjoy_id].is_axis_valid(axis_id):
                         action = data.containers[0].action_sets[0][0]
-                        vjoy[vjoy_id].axis(aid).set_deadzone(*action.deadzone)
-                        vjoy[vjoy_id].axis(aid).set_response_curve(
-                            action.mapping_type,
-                            action.control_points
+                        self._configure_axis(
+                            vjoy[vjoy_id].axis(aid),
+                            action
                         )
 
+    def _configure_axis(self, axis, action):
+        """Applies the curve settings of an action to a vJoy axis.
+
+        Transfer function tables are shared by all axes and modes using the
+        same settings, such that each one only has to be computed once.
+
+        :param axis the vJoy axis to configure
+        :param action the action holding the deadzone and curve settings
+        """
+        key = (
+            axis.resolution,
+            tuple(action.deadzone),
+            action.mapping_type,
+            tuple(tuple(point) for point in action.control_points)
+        )
+        self._tables[key] = axis.configure(
+            action.deadzone,
+            action.mapping_type,
+            action.control_points,
+            self._tables.get(key)
+        )
+
 
 class MergeAxis:
 
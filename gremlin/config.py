@@ -15,8 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import atexit
 import json
 import logging
+import threading
 import time
 import os
 import re
@@ -29,18 +31,39 @@ from . import common, util
 @common.SingletonDecorator
 class Configuration:
 
-    """Responsible for loading and saving configuration data."""
+    """Responsible for loading and saving configuration data.
+
+    Changes are written to disk by a background thread which batches them,
+    writing the file at most once every write_interval seconds.
+    """
+
+    # Minimum time in seconds between two writes of the configuration file
+    write_interval = 2.0
 
     def __init__(self):
         """Creates a new instance, loading the current configuration."""
         self._data = {}
         self._last_reload = None
+
+        # State of the write behind mechanism
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self._write_requested = threading.Event()
+        self._last_write = 0.0
+        # Content of the last write, used to recognize our own changes
+        self._own_content = None
+
         self.reload()
 
         self.watcher = QtCore.QFileSystemWatcher([
             os.path.join(util.userprofile_path(), "config.json")
         ])
-        self.watcher.fileChanged.connect(self.reload)
+        self.watcher.fileChanged.connect(self._file_changed)
+
+        self._writer = threading.Thread(target=self._run_writer, daemon=True)
+        self._writer.start()
+        # Ensure pending changes are not lost on exit
+        atexit.register(self.flush)
 
     def reload(self):
         """Loads the configuration file's content."""
@@ -78,14 +101,82 @@ class Configuration:
         self.save()
 
     def save(self):
-        """Writes the configuration file to disk."""
-        fname = os.path.join(util.userprofile_path(), "config.json")
-        with open(fname, "w") as hdl:
-            encoder = json.JSONEncoder(
-                sort_keys=True,
-                indent=4
-            )
-            hdl.write(encoder.encode(self._data))
+        """Requests the configuration file to be written to disk.
+
+        The write happens asynchronously and is combined with any other
+        change requested before it takes place.
+        """
+        self._dirty = True
+        self._write_requested.set()
+
+    def flush(self):
+        """Writes the configuration file to disk if it has pending changes.
+
+        The file is written to a temporary file first which then replaces
+        the existing one, ensuring the file is never left incomplete.
+        """
+        with self._write_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+
+            try:
+                encoder = json.JSONEncoder(
+                    sort_keys=True,
+                    indent=4
+                )
+                content = encoder.encode(self._data)
+            except RuntimeError:
+                # The data was modified while being encoded, retry later
+                self.save()
+                return
+
+            fname = os.path.join(util.userprofile_path(), "config.json")
+            tmp_fname = fname + ".tmp"
+            try:
+                with open(tmp_fname, "w") as hdl:
+                    hdl.write(content)
+                # Set before the file is replaced, as the change notification
+                # can arrive before os.replace returns
+                self._own_content = content
+                os.replace(tmp_fname, fname)
+            except OSError as e:
+                logging.getLogger("system").error(
+                    "Failed writing configuration file: {}".format(e)
+                )
+                self.save()
+            self._last_write = time.monotonic()
+
+    def _run_writer(self):
+        """Writes pending changes to disk, rate limited by write_interval."""
+        while True:
+            self._write_requested.wait()
+            delay = self._last_write + self.write_interval - \
+                time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._write_requested.clear()
+            self.flush()
+
+    def _file_changed(self, path):
+        """Reloads the configuration when the file is changed externally.
+
+        :param path path of the file that changed
+        """
+        # Replacing the file removes it from the watcher, so add it again
+        if path not in self.watcher.files() and os.path.isfile(path):
+            self.watcher.addPath(path)
+
+        # Ignore notifications caused by our own writes
+        try:
+            with open(path) as hdl:
+                content = hdl.read()
+        except OSError:
+            return
+        with self._write_lock:
+            if content == self._own_content:
+                return
+        self.reload()
 
     def set_calibration(self, dev_id, limits):
         """Sets the calibration data for all axes of a device.
@@ -474,6 +565,75 @@ class Configuration:
         self._data["macro_axis_minimum_change_rate"] = value
         self.save()
 
+    @property
+    def axis_coalescing(self):
+        """Returns whether or not axis events are coalesced before dispatch.
+
+        :return True if axis events are coalesced, False otherwise
+        """
+        return self._data.get("axis_coalescing", False)
+
+    @axis_coalescing.setter
+    def axis_coalescing(self, value):
+        """Sets whether or not axis events are coalesced before dispatch.
+
+        :param value True to enable the feature, False to disable
+        """
+        self._data["axis_coalescing"] = bool(value)
+        self.save()
+
+    @property
+    def axis_dispatch_rate(self):
+        """Returns the maximum rate at which coalesced axis events are sent.
+
+        :return maximum number of axis dispatches per second
+        """
+        return self._data.get("axis_dispatch_rate", 250)
+
+    @axis_dispatch_rate.setter
+    def axis_dispatch_rate(self, value):
+        """Sets the maximum rate at which coalesced axis events are sent.
+
+        :param value maximum number of axis dispatches per second
+        """
+        self._data["axis_dispatch_rate"] = int(value)
+        self.save()
+
+    @property
+    def dispatch_thread(self):
+        """Returns whether or not events are processed on a dedicated thread.
+
+        :return True if a dedicated dispatch thread is used, False otherwise
+        """
+        return self._data.get("dispatch_thread", False)
+
+    @dispatch_thread.setter
+    def dispatch_thread(self, value):
+        """Sets whether or not events are processed on a dedicated thread.
+
+        :param value True to enable the feature, False to disable
+        """
+        self._data["dispatch_thread"] = bool(value)
+        self.save()
+
+    @property
+    def vjoy_write_combining(self):
+        """Returns whether or not vJoy writes are combined per event.
+
+        :return True if writes are combined, False if they are sent
+            immediately
+        """
+        return self._data.get("vjoy_write_combining", True)
+
+    @vjoy_write_combining.setter
+    def vjoy_write_combining(self, value):
+        """Sets whether or not vJoy writes are combined per event.
+
+        :param value True to enable the feature, False to disable
+        """
+        self._data["vjoy_write_combining"] = bool(value)
+        self.save()
+
     @property
     def macro_record_axis(self):
         return self._data.get("macro_record_axis", False)
@@ -15,17 +15,20 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import collections
 import functools
 import inspect
 import logging
+import threading
 import time
-from threading import Thread, Timer
+from threading import Lock, Thread, Timer
 
 from PyQt5 import QtCore
 
 import dill
-from . import common, config, error, joystick_handling, windows_event_hook, \
-    macro, util
+from vjoy import vjoy
+from . import common, config, error, input_trace, joystick_handling, \
+    latency, scheduler, windows_event_hook, macro, util
 
 
 class Event:
@@ -47,6 +50,17 @@ class Event:
     whether or not the key's scan code is extended one.
     """
 
+    __slots__ = (
+        "event_type",
+        "identifier",
+        "device_guid",
+        "is_pressed",
+        "value",
+        "raw_value",
+        "timestamp",
+        "key"
+    )
+
     def __init__(
             self,
             event_type,
@@ -54,7 +68,9 @@ class Event:
             device_guid,
             value=None,
             is_pressed=None,
-            raw_value=None
+            raw_value=None,
+            timestamp=None,
+            key=None
     ):
         """Creates a new Event object.
 
@@ -66,6 +82,10 @@ class Event:
         :param is_pressed boolean flag indicating if a button or key
         :param raw_value the raw SDL value of the axis
             is pressed
+        :param timestamp time at which the event was received, only set
+            while latencies are being recorded
+        :param key the interned integer key of the event's input, looked up
+            in the input key registry if not provided
         """
         self.event_type = event_type
         self.identifier = identifier
@@ -73,6 +93,14 @@ class Event:
         self.is_pressed = is_pressed
         self.value = value
         self.raw_value = raw_value
+        self.timestamp = timestamp
+        if key is None:
+            key = joystick_handling.input_key_registry.key(
+                device_guid,
+                event_type,
+                identifier
+            )
+        self.key = key
 
     def clone(self):
         """Returns a clone of the event.
@@ -85,11 +113,13 @@ class Event:
             self.device_guid,
             self.value,
             self.is_pressed,
-            self.raw_value
+            self.raw_value,
+            self.timestamp,
+            self.key
         )
 
     def __eq__(self, other):
-        return self.__hash__() == other.__hash__()
+        return isinstance(other, Event) and self.key == other.key
 
     def __ne__(self, other):
         return not (self == other)
@@ -97,27 +127,14 @@ class Event:
     def __hash__(self):
         """Computes the hash value of this event.
 
-        The hash is comprised of the events type, identifier of the
-        event source and the id of the event device. Events from the same
-        input, e.g. axis, button, hat, key, with different values / states
-        shall have the same hash.
+        The hash is the integer key interned for the event's input, i.e.
+        its device, type and identifier. Events from the same input, e.g.
+        axis, button, hat, key, with different values / states shall have
+        the same hash.
 
         :return integer hash value of this event
         """
-        if self.event_type == common.InputType.Keyboard:
-            return hash((
-                self.device_guid,
-                self.event_type.value,
-                self.identifier,
-                1 if self.identifier[1] else 0
-            ))
-        else:
-            return hash((
-                self.device_guid,
-                self.event_type.value,
-                self.identifier,
-                0
-            ))
+        return self.key
 
     @staticmethod
     def from_key(key):
@@ -134,6 +151,314 @@ class Event:
         )
 
 
+class AxisCoalescer:
+
+    """Collapses axis events such that only the newest value of each axis is
+    dispatched per tick.
+
+    Axis events are buffered per input and sent once per dispatch period,
+    all other events are emitted immediately after any buffered axis events
+    in order to preserve their relative ordering. Button and hat transitions
+    are thus never merged or dropped.
+    """
+
+    def __init__(self, emit_fn, max_rate):
+        """Creates a new instance.
+
+        :param emit_fn function used to emit an event
+        :param max_rate maximum number of axis dispatches per second
+        """
+        self._emit_fn = emit_fn
+        self._pending = {}
+        self._lock = Lock()
+        self.period = 1.0 / max(1, max_rate)
+
+        # Statistics about the number of axis samples that were received and
+        # how many of them were collapsed into a more recent one
+        self.received_count = 0
+        self.collapsed_count = 0
+
+    def add_axis(self, event):
+        """Buffers an axis event, replacing any older one of the same axis.
+
+        :param event the axis event to buffer
+        """
+        with self._lock:
+            self.received_count += 1
+            if event.key in self._pending:
+                self.collapsed_count += 1
+            self._pending[event.key] = event
+
+    def emit(self, event):
+        """Emits a non axis event after all buffered axis events.
+
+        :param event the event to emit
+        """
+        with self._lock:
+            self._flush()
+            self._emit_fn(event)
+
+    def flush(self):
+        """Emits all buffered axis events."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """Emits all buffered axis events, the lock has to be held."""
+        if self._pending:
+            for event in self._pending.values():
+                self._emit_fn(event)
+            self._pending = {}
+
+
+class RingBuffer:
+
+    """Fixed size ring buffer for a single producer and a single consumer.
+
+    The producer only ever advances the head and the consumer only ever
+    advances the tail, so no lock is needed between the two. A slot is
+    always written before the head is moved past it, thus the consumer
+    never observes a partially inserted entry.
+    """
+
+    def __init__(self, capacity):
+        """Creates a new instance.
+
+        :param capacity the number of slots, rounded up to a power of two
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._slots = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._tail = 0
+
+    def push(self, item):
+        """Adds an item to the buffer.
+
+        :param item the item to add
+        :return True if the item was added, False if the buffer is full
+        """
+        head = self._head
+        if head - self._tail > self._mask:
+            return False
+        self._slots[head & self._mask] = item
+        self._head = head + 1
+        return True
+
+    def pop(self):
+        """Removes the oldest item from the buffer.
+
+        :return oldest item or None if the buffer is empty
+        """
+        tail = self._tail
+        if tail == self._head:
+            return None
+        index = tail & self._mask
+        item = self._slots[index]
+        self._slots[index] = None
+        self._tail = tail + 1
+        return item
+
+    def __len__(self):
+        return self._head - self._tail
+
+
+class EventDispatcher:
+
+    """Processes events on a dedicated thread.
+
+    Every thread pushing events writes into its own ring buffer which the
+    dispatch thread drains, passing each event to the handler. This keeps
+    event processing independent of the UI thread. The latest state of
+    every joystick input is additionally collected and handed to the UI
+    at a limited rate.
+    """
+
+    # Event types which are part of the snapshot sent to the UI
+    snapshot_types = (
+        common.InputType.JoystickAxis,
+        common.InputType.JoystickButton,
+        common.InputType.JoystickHat
+    )
+
+    def __init__(self, handler, snapshot_fn, capacity=4096, snapshot_rate=30):
+        """Creates a new instance.
+
+        :param handler function processing a single event
+        :param snapshot_fn function receiving each event of a UI snapshot
+        :param capacity number of events each ring buffer can hold
+        :param snapshot_rate number of UI snapshots sent per second
+        """
+        self._handler = handler
+        self._snapshot_fn = snapshot_fn
+        self._capacity = capacity
+        self._snapshot_period = 1.0 / max(1, snapshot_rate)
+        self._snapshot = {}
+
+        # (producer thread, ring buffer) pairs, replaced on modification
+        self._rings = []
+        self._rings_lock = Lock()
+        self._calls = collections.deque()
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._idle = False
+        self._running = False
+        self._thread = None
+
+        # Number of times a producer had to wait for a full buffer to drain
+        self.stall_count = 0
+
+    def start(self):
+        """Starts the dispatch thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the dispatch thread after processing queued events."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def push(self, event):
+        """Queues an event for processing on the dispatch thread.
+
+        :param event the event to queue
+        """
+        # Events pushed by a handler are processed right away, as waiting
+        # for the dispatch thread to drain a full buffer would never end
+        if threading.current_thread() is self._thread:
+            self._process(event)
+            return
+
+        ring = getattr(self._local, "ring", None)
+        if ring is None:
+            ring = self._create_ring()
+
+        # Events are never dropped, instead the producer waits for the
+        # dispatch thread to free up space
+        while not ring.push(event):
+            if not self._running:
+                return
+            self.stall_count += 1
+            self._wakeup.set()
+            time.sleep(0)
+
+        if self._idle:
+            self._wakeup.set()
+
+    def call(self, callback):
+        """Queues a function to be run on the dispatch thread.
+
+        :param callback the function to run
+        """
+        self._calls.append(callback)
+        self._wakeup.set()
+
+    def _create_ring(self):
+        """Creates the ring buffer used by the calling thread.
+
+        :return ring buffer of the calling thread
+        """
+        ring = RingBuffer(self._capacity)
+        self._local.ring = ring
+        with self._rings_lock:
+            self._rings = self._rings + [(threading.current_thread(), ring)]
+        return ring
+
+    def _remove_dead_rings(self):
+        """Removes the ring buffers of producer threads which have exited.
+
+        A buffer is only removed once it is empty, as its thread may have
+        pushed events right before exiting.
+        """
+        dead = [
+            entry for entry in self._rings
+            if not entry[0].is_alive() and len(entry[1]) == 0
+        ]
+        if dead:
+            with self._rings_lock:
+                self._rings = [
+                    entry for entry in self._rings if entry not in dead
+                ]
+
+    def _run(self):
+        """Processes queued events until stopped."""
+        next_snapshot = time.perf_counter() + self._snapshot_period
+        while self._running:
+            processed = self._drain()
+
+            now = time.perf_counter()
+            if now >= next_snapshot:
+                self._send_snapshot()
+                self._remove_dead_rings()
+                next_snapshot = now + self._snapshot_period
+
+            if not processed:
+                # Announce that we are about to sleep and check the buffers
+                # once more, as producers only ring the bell when idle
+                self._idle = True
+                if not any(len(ring) for _, ring in self._rings):
+                    self._wakeup.wait(max(0.0, next_snapshot - now))
+                self._wakeup.clear()
+                self._idle = False
+
+        self._drain()
+        self._send_snapshot()
+
+    def _drain(self):
+        """Processes all events currently queued.
+
+        :return True if any event was processed, False otherwise
+        """
+        processed = False
+        while self._calls:
+            processed = True
+            try:
+                self._calls.popleft()()
+            except Exception as e:
+                logging.getLogger("system").exception(
+                    "Error while running deferred call: {}".format(e)
+                )
+        for _, ring in self._rings:
+            event = ring.pop()
+            while event is not None:
+                processed = True
+                self._process(event)
+                event = ring.pop()
+        return processed
+
+    def _process(self, event):
+        """Passes a single event to the handler.
+
+        :param event the event to process
+        """
+        if event.event_type in self.snapshot_types:
+            self._snapshot[event.key] = event
+        try:
+            self._handler(event)
+        except Exception as e:
+            logging.getLogger("system").exception(
+                "Error while processing event: {}".format(e)
+            )
+
+    def _send_snapshot(self):
+        """Hands the latest state of all changed inputs to the UI."""
+        if self._snapshot:
+            snapshot = self._snapshot
+            self._snapshot = {}
+            for event in snapshot.values():
+                self._snapshot_fn(event)
+
+
 @common.SingletonDecorator
 class EventListener(QtCore.QObject):
 
@@ -143,6 +468,8 @@ class EventListener(QtCore.QObject):
 
     # Signal emitted when joystick events are received
     joystick_event = QtCore.pyqtSignal(Event)
+    # Signal emitted with joystick events intended for UI updates
+    joystick_ui_event = QtCore.pyqtSignal(Event)
     # Signal emitted when keyboard events are received
     keyboard_event = QtCore.pyqtSignal(Event)
     # Signal emitted when mouse events are received
@@ -160,12 +487,30 @@ class EventListener(QtCore.QObject):
         self.mouse_hook = windows_event_hook.MouseHook()
         self.mouse_hook.register(self._mouse_handler)
 
-        # Calibration function for each axis of all devices
+        # Calibration lookup table for each axis of all devices
         self._calibrations = {}
 
+        # Interned input keys of each device, stored per input type in lists
+        # indexed by the input's identifier
+        self._input_keys = {}
+        self._default_calibration = util.calibration_table(-32768, 0, 32767)
+
         # Joystick device change update timeout timer
         self._device_update_timer = None
 
+        # Optional stage coalescing axis events between DILL and dispatch
+        self.axis_coalescer = None
+        self.configure_axis_coalescing()
+
+        # Optional recording and replaying of the raw DILL event stream
+        self._trace_recorder = None
+        self._trace_replayer = None
+
+        # Joystick events are passed on to the UI unless a dispatch thread
+        # provides rate limited snapshots instead
+        self._ui_forwarding = False
+        self.set_ui_forwarding(True)
+
         self._running = True
         self._keyboard_state = {}
         self.gremlin_active = False
@@ -179,26 +524,99 @@ class EventListener(QtCore.QObject):
         """Stops the loop from running."""
         self._running = False
         self.keyboard_hook.stop()
+        self.stop_trace_replay()
+        self.stop_trace_recording()
+
+    def start_trace_recording(self, fname):
+        """Starts recording all raw joystick events to a trace file.
+
+        :param fname path of the trace file to write
+        """
+        self.stop_trace_recording()
+        self._trace_recorder = input_trace.TraceRecorder(fname)
+
+    def stop_trace_recording(self):
+        """Stops recording joystick events and finalizes the trace file."""
+        recorder = self._trace_recorder
+        self._trace_recorder = None
+        if recorder is not None:
+            recorder.close()
+
+    def start_trace_replay(self, fname, real_time=True):
+        """Starts replaying a trace file as if the events came from DILL.
+
+        :param fname path of the trace file to replay
+        :param real_time if True events are replayed with their recorded
+            timing, otherwise as fast as possible
+        """
+        self.stop_trace_replay()
+        self._trace_replayer = input_trace.TraceReplayer(
+            fname,
+            self._joystick_event_handler,
+            real_time
+        )
+        self._trace_replayer.start()
+
+    def stop_trace_replay(self):
+        """Stops replaying a trace file."""
+        if self._trace_replayer is not None:
+            self._trace_replayer.stop()
+            self._trace_replayer = None
 
     def reload_calibrations(self):
         """Reloads the calibration data from the configuration file."""
         cfg = config.Configuration()
         for key in self._calibrations:
             limits = cfg.get_calibration(key[0], key[1])
-            self._calibrations[key] = \
-                util.create_calibration_function(
-                    limits[0],
-                    limits[1],
-                    limits[2]
-                )
+            self._calibrations[key] = util.calibration_table(
+                limits[0],
+                limits[1],
+                limits[2]
+            )
+
+    def configure_axis_coalescing(self):
+        """Enables or disables axis coalescing based on the configuration."""
+        cfg = config.Configuration()
+        coalescer = self.axis_coalescer
+        if cfg.axis_coalescing:
+            self.axis_coalescer = AxisCoalescer(
+                self.joystick_event.emit,
+                cfg.axis_dispatch_rate
+            )
+        else:
+            self.axis_coalescer = None
+
+        # Ensure no buffered event of the previous instance is lost
+        if coalescer is not None:
+            coalescer.flush()
+
+    def set_ui_forwarding(self, is_enabled):
+        """Sets whether or not joystick events are forwarded to the UI signal.
+
+        :param is_enabled if True every joystick event is also emitted via
+            the joystick_ui_event signal
+        """
+        if is_enabled == self._ui_forwarding:
+            return
+        if is_enabled:
+            self.joystick_event.connect(self.joystick_ui_event)
+        else:
+            self.joystick_event.disconnect(self.joystick_ui_event)
+        self._ui_forwarding = is_enabled
 
     def _run(self):
         """Starts the event loop."""
         dill.DILL.set_device_change_callback(self._joystick_device_handler)
         dill.DILL.set_input_event_callback(self._joystick_event_handler)
         while self._running:
-            # Keep this thread alive until we are done
-            time.sleep(0.1)
+            # Dispatch coalesced axis events periodically if enabled and
+            # otherwise simply keep this thread alive until we are done
+            coalescer = self.axis_coalescer
+            if coalescer is not None:
+                time.sleep(coalescer.period)
+                coalescer.flush()
+            else:
+                time.sleep(0.1)
 
     def _joystick_event_handler(self, data):
         """Callback for joystick events.
@@ -208,29 +626,69 @@ class EventListener(QtCore.QObject):
 
         :param data the joystick event
         """
+        timestamp = time.perf_counter() if latency.enabled else None
+        recorder = self._trace_recorder
+        if recorder is not None:
+            recorder.record(data)
         event = dill.InputEvent(data)
+        joystick_handling.input_state.update(event)
+        coalescer = self.axis_coalescer
+        input_keys = self._input_keys.get(event.device_guid)
+        if input_keys is None:
+            input_keys = ([], [], [])
+            self._input_keys[event.device_guid] = input_keys
         if event.input_type == dill.InputType.Axis:
-            self.joystick_event.emit(Event(
+            evt = Event(
                 event_type=common.InputType.JoystickAxis,
                 device_guid=event.device_guid,
                 identifier=event.input_index,
                 value=self._apply_calibration(event),
-                raw_value=event.value
-            ))
+                raw_value=event.value,
+                timestamp=timestamp,
+                key=self._input_key(
+                    input_keys[0],
+                    event,
+                    common.InputType.JoystickAxis
+                )
+            )
+            if coalescer is not None:
+                coalescer.add_axis(evt)
+            else:
+                self.joystick_event.emit(evt)
+            return
         elif event.input_type == dill.InputType.Button:
-            self.joystick_event.emit(Event(
+            evt = Event(
                 event_type=common.InputType.JoystickButton,
                 device_guid=event.device_guid,
                 identifier=event.input_index,
-                is_pressed=event.value == 1
-            ))
+                is_pressed=event.value == 1,
+                timestamp=timestamp,
+                key=self._input_key(
+                    input_keys[1],
+                    event,
+                    common.InputType.JoystickButton
+                )
+            )
         elif event.input_type == dill.InputType.Hat:
-            self.joystick_event.emit(Event(
+            evt = Event(
                 event_type=common.InputType.JoystickHat,
                 device_guid=event.device_guid,
                 identifier=event.input_index,
-                value=util.dill_hat_lookup[event.value]
-            ))
+                value=util.dill_hat_lookup[event.value],
+                timestamp=timestamp,
+                key=self._input_key(
+                    input_keys[2],
+                    event,
+                    common.InputType.JoystickHat
+                )
+            )
+        else:
+            return
+
+        if coalescer is not None:
+            coalescer.emit(evt)
+        else:
+            self.joystick_event.emit(evt)
 
     def _joystick_device_handler(self, data, action):
         """Callback for device change events.
@@ -278,6 +736,7 @@ class EventListener(QtCore.QObject):
                 device_guid=dill.GUID_Keyboard,
                 identifier=key_id,
                 is_pressed=is_pressed,
+                timestamp=time.perf_counter() if latency.enabled else None
             ))
 
         # Allow the windows event to propagate further
@@ -302,12 +761,45 @@ class EventListener(QtCore.QObject):
         # Allow the windows event to propagate further
         return True
 
-    def _apply_calibration(self, event):
-        key = (event.device_guid, event.input_index)
-        if key in self._calibrations:
-            return self._calibrations[key](event.value)
+    @staticmethod
+    def _input_key(keys, event, input_type):
+        """Returns the interned key of the input a DILL event originates from.
+
+        Keys are looked up in the input key registry only the first time an
+        input is seen and from then on taken from the provided list.
+
+        :param keys list of keys of the device's inputs of the given type,
+            indexed by the input identifier
+        :param event the DILL event
+        :param input_type the InputType of the event's input
+        :return integer key of the event's input
+        """
+        index = event.input_index
+        if index < len(keys):
+            key = keys[index]
+            if key is not None:
+                return key
         else:
-            return util.axis_calibration(event.value, -32768, 0, 32767)
+            keys.extend([None] * (index + 1 - len(keys)))
+        key = joystick_handling.input_key_registry.key(
+            event.device_guid,
+            input_type,
+            index
+        )
+        keys[index] = key
+        return key
+
+    def _apply_calibration(self, event):
+        table = self._calibrations.get(
+            (event.device_guid, event.input_index),
+            self._default_calibration
+        )
+        index = event.value + util.calibration_table_offset
+        if index < 0:
+            index = 0
+        elif index > 65535:
+            index = 65535
+        return table[index]
 
     def _init_joysticks(self):
         """Initializes joystick devices."""
@@ -326,13 +818,51 @@ class EventListener(QtCore.QObject):
                 entry.axis_index
             )
             self._calibrations[(device_info.device_guid, entry.axis_index)] = \
-                util.create_calibration_function(
+                util.calibration_table(
                     limits[0],
                     limits[1],
                     limits[2]
                 )
 
 
+class DeferredCall:
+
+    """Handle of a function run on the event processing thread after a delay.
+
+    Once its delay has elapsed the call is handed to the event processing
+    thread, which only runs the function if the call has not been cancelled
+    in the meantime.
+    """
+
+    __slots__ = ("callback", "cancelled", "_scheduled_call", "_is_done")
+
+    def __init__(self, callback):
+        """Creates a new instance.
+
+        :param callback the function to run
+        """
+        self.callback = callback
+        self.cancelled = False
+        self._scheduled_call = None
+        self._is_done = False
+
+    @property
+    def is_pending(self):
+        """Returns whether or not the function still has to be run.
+
+        :return True if the function is yet to be run, False otherwise
+        """
+        return not (self.cancelled or self._is_done)
+
+    def cancel(self):
+        """Cancels the call, does nothing if the function has already run."""
+        if self._is_done:
+            return
+        self.cancelled = True
+        if self._scheduled_call is not None:
+            self._scheduled_call.cancel()
+
+
 @common.SingletonDecorator
 class EventHandler(QtCore.QObject):
 
@@ -342,14 +872,22 @@ class EventHandler(QtCore.QObject):
     mode_changed = QtCore.pyqtSignal(str)
     # Signal emitted when the application is pause / resumed
     is_active = QtCore.pyqtSignal(bool)
+    # Signal emitted when a callback raised an error to report
+    error_occurred = QtCore.pyqtSignal(str)
+    # Signal emitted with functions to run on the event processing thread
+    deferred_call = QtCore.pyqtSignal(object)
 
     def __init__(self):
         """Initializes the EventHandler instance."""
         QtCore.QObject.__init__(self)
+        # Errors are displayed from the thread owning this object as events
+        # may be processed on a different thread
+        self.error_occurred.connect(self._display_error)
         self.process_callbacks = True
         self.plugins = {}
         self.callbacks = {}
         self._event_lookup = {}
+        self._mode_lookup = {}
         self._active_mode = None
         self._previous_mode = None
 
@@ -404,7 +942,17 @@ class EventHandler(QtCore.QObject):
     def build_event_lookup(self, inheritance_tree):
         """Builds the lookup table linking event to callback.
 
-        This takes mode inheritance into account.
+        This takes mode inheritance into account and compiles the result
+        into a per mode dispatch table used by process_event.
+
+        :param inheritance_tree the tree of parent and children in the
+            inheritance structure
+        """
+        self._propagate_callbacks(inheritance_tree)
+        self._compile_event_lookup()
+
+    def _propagate_callbacks(self, inheritance_tree):
+        """Copies callbacks from parent modes into their children.
 
         :param inheritance_tree the tree of parent and children in the
             inheritance structure
@@ -429,7 +977,29 @@ class EventHandler(QtCore.QObject):
                                 device_cb[child][event] = callbacks
 
             # Recurse until we've dealt with all modes
-            self.build_event_lookup(children)
+            self._propagate_callbacks(children)
+
+    def _compile_event_lookup(self):
+        """Compiles the registered callbacks into per mode dispatch tables.
+
+        Each mode maps an event's integer key to a pair of callback tuples,
+        the first one containing the callbacks to run while active and the
+        second one those to run while paused. As the key already identifies
+        the device a single lookup suffices to find all callbacks.
+        """
+        self._event_lookup = {}
+        for device_cb in self.callbacks.values():
+            for mode, events in device_cb.items():
+                mode_lookup = self._event_lookup.setdefault(mode, {})
+                for event, callbacks in events.items():
+                    # Skip the placeholders used to mark modes as present
+                    if event is None:
+                        continue
+                    mode_lookup[event.key] = (
+                        tuple(cb[0] for cb in callbacks),
+                        tuple(cb[0] for cb in callbacks if cb[1])
+                    )
+        self._mode_lookup = self._event_lookup.get(self._active_mode, {})
 
     def change_mode(self, new_mode):
         """Changes the currently active mode.
@@ -454,6 +1024,7 @@ class EventHandler(QtCore.QObject):
             cfg.set_last_mode(cfg.last_profile, new_mode)
 
             self._active_mode = new_mode
+            self._mode_lookup = self._event_lookup.get(new_mode, {})
             self.mode_changed.emit(self._active_mode)
 
     def resume(self):
@@ -474,6 +1045,8 @@ class EventHandler(QtCore.QObject):
     def clear(self):
         """Removes all attached callbacks."""
         self.callbacks = {}
+        self._event_lookup = {}
+        self._mode_lookup = {}
 
     @QtCore.pyqtSlot(Event)
     def process_event(self, event):
@@ -482,37 +1055,123 @@ class EventHandler(QtCore.QObject):
 
         :param event the event to process
         """
-        for cb in self._matching_callbacks(event):
-            try:
-                cb(event)
-            except error.VJoyError as e:
-                util.display_error(str(e))
-                logging.getLogger("system").exception(
-                    "VJoy related error: {}".format(e)
-                )
-                self.pause()
-
-    def _matching_callbacks(self, event):
-        """Returns the list of callbacks to execute in response to
-        the provided event.
-
-        :param event the event for which to search the matching
-            callbacks
-        :return a list of all callbacks registered and valid for the
-            given event
-        """
-        # Obtain callbacks matching the event
-        callback_list = []
-        if event.device_guid in self.callbacks:
-            callback_list = self.callbacks[event.device_guid].get(
-                self._active_mode, {}
-            ).get(event, [])
-
-        # Filter events when the system is paused
-        if not self.process_callbacks:
-            return [c[0] for c in callback_list if c[1]]
-        else:
-            return [c[0] for c in callback_list]
+        entry = self._mode_lookup.get(event.key)
+        if entry is None:
+            return
+
+        # Select the callbacks valid for the current pause state
+        callbacks = entry[0] if self.process_callbacks else entry[1]
+
+        if latency.enabled and event.timestamp is not None:
+            self._process_event_timed(event, callbacks)
+            return
+
+        # vJoy writes of all callbacks are sent to the driver together
+        vjoy.write_combiner.begin()
+        try:
+            for cb in callbacks:
+                try:
+                    cb(event)
+                except error.VJoyError as e:
+                    self._vjoy_error(e)
+        finally:
+            self._end_vjoy_batch()
+
+    def call_later(self, delay, callback):
+        """Runs a function on the event processing thread after a delay.
+
+        The function is executed in between events in the same way event
+        callbacks are, without blocking event processing while waiting.
+
+        :param delay time in seconds after which to run the function
+        :param callback the function to run
+        :return DeferredCall handle which can be used to cancel the call
+        """
+        call = DeferredCall(callback)
+        call._scheduled_call = scheduler.scheduler.schedule(
+            delay,
+            functools.partial(
+                self.deferred_call.emit,
+                functools.partial(self._run_deferred, call)
+            )
+        )
+        return call
+
+    @QtCore.pyqtSlot(object)
+    def run_deferred(self, callback):
+        """Runs a function emitted via the deferred_call signal.
+
+        :param callback the function to run
+        """
+        callback()
+
+    def _run_deferred(self, call):
+        """Runs a deferred function, handling errors like event callbacks.
+
+        The call may have been cancelled after it was handed to the event
+        processing thread, in which case the function is not run.
+
+        :param call the DeferredCall whose function to run
+        """
+        if call.cancelled:
+            return
+        call._is_done = True
+        vjoy.write_combiner.begin()
+        try:
+            call.callback()
+        except error.VJoyError as e:
+            self._vjoy_error(e)
+        finally:
+            self._end_vjoy_batch()
+
+    def _end_vjoy_batch(self):
+        """Ends a vJoy write batch, sending all combined writes."""
+        try:
+            vjoy.write_combiner.end()
+        except error.VJoyError as e:
+            self._vjoy_error(e)
+
+    def _process_event_timed(self, event, callbacks):
+        """Processes an event while recording latency measurements.
+
+        :param event the event to process
+        :param callbacks the callbacks to run for the event
+        """
+        recorder = latency.recorder
+        recorder.begin(event)
+        vjoy.write_combiner.begin()
+        try:
+            for cb in callbacks:
+                start = time.perf_counter()
+                try:
+                    cb(event)
+                except error.VJoyError as e:
+                    self._vjoy_error(e)
+                recorder.record_callback(event, time.perf_counter() - start)
+        finally:
+            # The batch is sent while the event is still current, so that
+            # the vJoy writes are attributed to it
+            self._end_vjoy_batch()
+            recorder.end(event)
+
+    def _vjoy_error(self, e):
+        """Reports a vJoy error raised by a callback and pauses processing.
+
+        :param e the exception that was raised
+        """
+        self.error_occurred.emit(str(e))
+        logging.getLogger("system").exception(
+            "VJoy related error: {}".format(e)
+        )
+        self.pause()
+
+    @QtCore.pyqtSlot(str)
+    def _display_error(self, msg):
+        """Displays an error message raised while processing an event.
+
+        :param msg the error message to display
+        """
+        util.display_error(msg)
 
     def _install_plugins(self, callback):
         """Installs the current plugins into the given callback.
@@ -17,11 +17,10 @@
 
 from abc import abstractmethod, ABCMeta
 from collections import namedtuple
-import copy
+import functools
 import logging
-import time
 
-from gremlin import actions, base_classes, common, error
+from gremlin import actions, base_classes, common, error, event_handler
 
 
 CallbackData = namedtuple("ContainerCallback", ["callback", "event"])
@@ -63,17 +62,17 @@ class ContainerCallback:
         else:
             raise error.GremlinError("Invalid event type")
 
-        # Containers representing a virtual button get their individual
-        # value instance, all others share one to propagate changes across
-        shared_value = copy.deepcopy(value)
-
+        # The value is created for this container alone, hence actions
+        # modifying it in place cannot affect other containers and no
+        # copy is required. Functors retaining the value beyond this event
+        # have to fork it themselves.
         if event == common.InputType.VirtualButton:
             # TODO: remove this at a future stage
             logging.getLogger("system").error(
                 "Virtual button code path being used"
             )
         else:
-            self.execution_graph.process_event(event, shared_value)
+            self.execution_graph.process_event(event, value)
 
 
 class VirtualButtonCallback:
@@ -109,6 +108,7 @@ class VirtualButtonProcess:
         :param container the container using a virtual button configuration
         """
         self.virtual_button = None
+        self._event_count = 0
 
         if isinstance(data, base_classes.VirtualAxisButton):
             self.virtual_button = actions.AxisButton(
@@ -128,7 +128,36 @@ class VirtualButtonProcess:
 
         :param event the input event being processed
         """
+        self._event_count += 1
         self.virtual_button.process_event(event)
+        self._schedule_followup(event)
+
+    def _schedule_followup(self, event):
+        """Schedules processing an event again if required.
+
+        A virtual axis button whose activation region was jumped over is
+        pressed by the event and has to process it once more, after a short
+        delay, to be released again.
+
+        :param event the event that has been processed
+        """
+        if isinstance(self.virtual_button, actions.AxisButton) and \
+                self.virtual_button.forced_activation:
+            event_handler.EventHandler().call_later(
+                0.05,
+                functools.partial(self._followup, event, self._event_count)
+            )
+
+    def _followup(self, event, event_count):
+        """Processes an event again unless a newer one has been processed.
+
+        :param event the event to process again
+        :param event_count number of events processed when the follow-up
+            was scheduled
+        """
+        if event_count == self._event_count:
+            self.virtual_button.process_event(event)
+            self._schedule_followup(event)
 
 
 class AbstractExecutionGraph(metaclass=ABCMeta):
@@ -152,8 +181,11 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         self.functors = []
         self.transitions = {}
         self.current_index = 0
+        self._sequence = []
+        self._event_count = 0
 
         self._build_graph(instance)
+        self._compiled = self._compile()
 
     def process_event(self, event, value):
         """Executes the graph with the provided data.
@@ -161,10 +193,29 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         :param event the raw event that caused the execution of this graph
         :param value the possibly modified value extracted from the event
         """
+        if self._compiled is not None:
+            self._compiled(event, value)
+        else:
+            self._event_count += 1
+            self._interpret(event, value, self._event_count)
+
+    def _interpret(self, event, value, event_count):
+        """Executes the graph by following its transitions.
+
+        :param event the raw event that caused the execution of this graph
+        :param value the possibly modified value extracted from the event
+        :param event_count number of events processed by the graph when
+            this event was received
+        """
+        # A newer event has been processed since this run was scheduled
+        if event_count != self._event_count:
+            return
+
         # Processing an event twice is needed when a virtual axis button has
         # "jumped" over it's activation region without triggering it. Once
-        # this is detected the "press" event is sent and the second run ensures
-        # a "release" event is sent.
+        # this is detected the "press" event is sent and a second run, shortly
+        # after, ensures a "release" event is sent. The second run is
+        # scheduled rather than waited for to not stall event processing.
         process_again = False
 
         while self.current_index is not None and len(self.functors) > 0:
@@ -181,8 +232,54 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         self.current_index = 0
 
         if process_again:
-            time.sleep(0.05)
-            self.process_event(event, value)
+            event_handler.EventHandler().call_later(
+                0.05,
+                functools.partial(self._interpret, event, value, event_count)
+            )
+
+    def _compile(self):
+        """Compiles the graph into a function with the branches inlined.
+
+        The node sequence consists of blocks of conditions each followed by
+        an action. A failed condition skips the remainder of its block, and
+        an action returning neither True nor False terminates the graph, as
+        there is no transition for such a result. Each block thus becomes
+        nested if statements guarding the action's invocation.
+
+        :return function executing the graph, None if the graph has to be
+            interpreted
+        """
+        # Virtual axis buttons may require processing an event twice,
+        # which only the interpreter handles
+        if any(isinstance(f, actions.AxisButton) for f in self.functors):
+            return None
+
+        namespace = {}
+        lines = ["def execute(event, value):"]
+        indent = "    "
+        last_index = len(self._sequence) - 1
+        for i, node_type in enumerate(self._sequence):
+            name = "f{:d}".format(i)
+            namespace[name] = self.functors[i].process_event
+            if node_type == "Condition":
+                lines.append("{}if {}(event, value):".format(indent, name))
+                indent += "    "
+            elif i == last_index:
+                lines.append("{}{}(event, value)".format(indent, name))
+            else:
+                lines.append(
+                    "{}if {}(event, value) not in (True, False):".format(
+                        indent,
+                        name
+                    )
+                )
+                lines.append("{}    return".format(indent))
+                indent = "    "
+        if lines[-1].endswith(":"):
+            lines.append("{}pass".format(indent))
+
+        exec(compile("\n".join(lines), "<execution graph>", "exec"), namespace)
+        return namespace["execute"]
 
     @abstractmethod
     def _build_graph(self, instance):
@@ -249,6 +346,7 @@ class AbstractExecutionGraph(metaclass=ABCMeta):
         :param sequence the sequence of nodes
         """
         seq_count = len(sequence)
+        self._sequence = list(sequence)
         self.transitions = {}
         for i, seq in enumerate(sequence):
             if seq == "Condition":
@@ -0,0 +1,83 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Stand-in for the win32con constants used where pywin32 is unavailable.
+
+Only used when the GREMLIN_BACKEND environment variable is set to "fake" and
+pywin32 cannot be imported. Provides the virtual key codes referenced by the
+key table of the macro module.
+
+https://docs.microsoft.com/en-us/windows/win32/inputdev/virtual-key-codes
+"""
+
+VK_ADD = 0x6b
+VK_APPS = 0x5d
+VK_BACK = 0x08
+VK_CAPITAL = 0x14
+VK_DECIMAL = 0x6e
+VK_DELETE = 0x2e
+VK_DIVIDE = 0x6f
+VK_DOWN = 0x28
+VK_END = 0x23
+VK_ESCAPE = 0x1b
+VK_F1 = 0x70
+VK_F10 = 0x79
+VK_F11 = 0x7a
+VK_F12 = 0x7b
+VK_F2 = 0x71
+VK_F3 = 0x72
+VK_F4 = 0x73
+VK_F5 = 0x74
+VK_F6 = 0x75
+VK_F7 = 0x76
+VK_F8 = 0x77
+VK_F9 = 0x78
+VK_HOME = 0x24
+VK_INSERT = 0x2d
+VK_LCONTROL = 0xa2
+VK_LEFT = 0x25
+VK_LMENU = 0xa4
+VK_LSHIFT = 0xa0
+VK_LWIN = 0x5b
+VK_MULTIPLY = 0x6a
+VK_NEXT = 0x22
+VK_NUMLOCK = 0x90
+VK_NUMPAD0 = 0x60
+VK_NUMPAD1 = 0x61
+VK_NUMPAD2 = 0x62
+VK_NUMPAD3 = 0x63
+VK_NUMPAD4 = 0x64
+VK_NUMPAD5 = 0x65
+VK_NUMPAD6 = 0x66
+VK_NUMPAD7 = 0x67
+VK_NUMPAD8 = 0x68
+VK_NUMPAD9 = 0x69
+VK_PAUSE = 0x13
+VK_PRINT = 0x2a
+VK_PRIOR = 0x21
+VK_RCONTROL = 0xa3
+VK_RETURN = 0x0d
+VK_RIGHT = 0x27
+VK_RMENU = 0xa5
+VK_RSHIFT = 0xa1
+VK_RWIN = 0x5c
+VK_SCROLL = 0x91
+VK_SEPARATOR = 0x6c
+VK_SPACE = 0x20
+VK_SUBTRACT = 0x6d
+VK_TAB = 0x09
+VK_UP = 0x26
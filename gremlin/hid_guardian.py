@@ -17,19 +17,27 @@
 
 
 import re
-import winreg
+
+# The registry only exists on Windows
+try:
+    import winreg
+except ImportError:
+    winreg = None
 
 from gremlin.error import HidGuardianError
 import gremlin.util
 
 
-def _open_key(sub_key, access=winreg.KEY_READ):
+def _open_key(sub_key, access=None):
     """Opens a key and returns the handle to it.
 
     :param sub_key the key to open
-    :param access the access rights to use when opening the key
+    :param access the access rights to use when opening the key, defaults
+        to read access
     :return the handle to the opened key
     """
+    if access is None:
+        access = winreg.KEY_READ
     try:
         return winreg.OpenKey(
             winreg.HKEY_LOCAL_MACHINE,
@@ -57,9 +57,13 @@ class CallbackRegistry:
         if mode not in self._registry[event.device_guid]:
             self._registry[event.device_guid][mode] = {}
 
-        if event not in self._registry[event.device_guid][mode]:
-            self._registry[event.device_guid][mode][event] = {}
-        self._registry[event.device_guid][mode][event][function_name] = \
+        # Callbacks are keyed on the event's integer input key while the
+        # event itself is kept alongside them for the consumers of the
+        # registry
+        mode_registry = self._registry[event.device_guid][mode]
+        if event.key not in mode_registry:
+            mode_registry[event.key] = (event, {})
+        mode_registry[event.key][1][function_name] = \
             (callback, always_execute)
 
     @property
@@ -211,7 +215,11 @@ class JoystickWrapper:
 
     class Input:
 
-        """Represents a joystick input."""
+        """Represents a joystick input.
+
+        The state of the input is read from the input state mirror, DILL is
+        only queried if the device is not part of the mirror.
+        """
 
         def __init__(self, joystick_guid, index):
             """Creates a new instance.
@@ -231,6 +239,9 @@ class JoystickWrapper:
 
         @property
         def value(self):
+            state = joystick_handling.input_state.device(self._joystick_guid)
+            if state is not None:
+                return state.axes[self._index]
             return DILL.get_axis(self._joystick_guid, self._index) / float(32768)
 
     class Button(Input):
@@ -242,8 +253,10 @@ class JoystickWrapper:
 
         @property
         def is_pressed(self):
-            val = DILL.get_button(self._joystick_guid, self._index)
-            return val #DILL.get_button(self._joystick_guid, self._index)
+            state = joystick_handling.input_state.device(self._joystick_guid)
+            if state is not None:
+                return state.buttons[self._index] == 1
+            return DILL.get_button(self._joystick_guid, self._index)
 
     class Hat(Input):
 
@@ -254,6 +267,9 @@ class JoystickWrapper:
 
         @property
         def direction(self):
+            state = joystick_handling.input_state.device(self._joystick_guid)
+            if state is not None:
+                return util.dill_hat_lookup[state.hats[self._index]]
             return util.dill_hat_lookup[
                 DILL.get_hat(self._joystick_guid, self._index)
             ]
@@ -576,10 +592,6 @@ class ButtonReleaseActions(QtCore.QObject):
         QtCore.QObject.__init__(self)
 
         self._registry = {}
-        el = event_handler.EventListener()
-        el.joystick_event.connect(self._input_event_cb)
-        el.keyboard_event.connect(self._input_event_cb)
-        el.virtual_event.connect(self._input_event_cb)
         eh = event_handler.EventHandler()
         self._current_mode = eh.active_mode
         eh.mode_changed.connect(self._mode_changed_cb)
@@ -591,14 +603,11 @@ class ButtonReleaseActions(QtCore.QObject):
             released
         :param physical_event the physical event of the button being pressed
         """
-        release_evt = physical_event.clone()
-        release_evt.is_pressed = False
-
-        if release_evt not in self._registry:
-            self._registry[release_evt] = []
+        if physical_event.key not in self._registry:
+            self._registry[physical_event.key] = []
         # Do not record the mode since we may want to run the release action
         # independent of a mode
-        self._registry[release_evt].append((callback, None))
+        self._registry[physical_event.key].append((callback, None))
 
     def register_button_release(self, vjoy_input, physical_event):
         """Registers a physical and vjoy button pair for tracking.
@@ -612,13 +621,10 @@ class ButtonReleaseActions(QtCore.QObject):
         :param physical_event the button event when release should
             trigger the release of the vjoy button
         """
-        release_evt = physical_event.clone()
-        release_evt.is_pressed = False
-
-        if release_evt not in self._registry:
-            self._registry[release_evt] = []
+        if physical_event.key not in self._registry:
+            self._registry[physical_event.key] = []
         # Record current mode so we only release if we've changed mode
-        self._registry[release_evt].append((
+        self._registry[physical_event.key].append((
             lambda: self._create_release_callback(vjoy_input),
             self._current_mode
         ))
@@ -640,15 +646,23 @@ class ButtonReleaseActions(QtCore.QObject):
                     vjoy_input[0], vjoy_input[1])
             )
 
-    def _input_event_cb(self, evt):
+    @QtCore.pyqtSlot(event_handler.Event)
+    def process_event(self, evt):
         """Runs callbacks associated with the given event.
 
+        The code runner connects this ahead of the event handler, such that
+        release actions run before any other callback of the event.
+
         :param evt the event to process
         """
-        if evt in self._registry and not evt.is_pressed:
-            for entry in self._registry[evt]:
+        if evt.is_pressed:
+            return
+
+        entries = self._registry.get(evt.key)
+        if entries:
+            for entry in entries:
                 entry[0]()
-            self._registry[evt] = []
+            self._registry[evt.key] = []
 
     def _mode_changed_cb(self, mode):
         """Updates the current mode variable.
@@ -676,7 +690,7 @@ class JoystickInputSignificant:
         :param event the event to check for significance
         :return True if it should be processed, False otherwise
         """
-        self._mre_registry[event] = event
+        self._mre_registry[event.key] = event
 
         if event.event_type == common.InputType.JoystickAxis:
             return self._process_axis(event)
@@ -695,7 +709,7 @@ class JoystickInputSignificant:
 
         :param event the type of event for which to return the most recent one
         """
-        return self._mre_registry[event]
+        return self._mre_registry[event.key]
 
     def reset(self):
         """Resets the detector to a clean state for subsequent uses."""
@@ -709,24 +723,25 @@ class JoystickInputSignificant:
         :param event the axis event to process
         :return True if it should be processed, False otherwise
         """
-        if event in self._event_registry:
+        key = event.key
+        if key in self._event_registry:
             # Reset everything if we have no recent data
-            if self._time_registry[event] + 5.0 < time.time():
-                self._event_registry[event] = event
-                self._time_registry[event] = time.time()
+            if self._time_registry[key] + 5.0 < time.time():
+                self._event_registry[key] = event
+                self._time_registry[key] = time.time()
                 return False
             # Update state
             else:
-                self._time_registry[event] = time.time()
-                if abs(self._event_registry[event].value - event.value) > 0.25:
-                    self._event_registry[event] = event
-                    self._time_registry[event] = time.time()
+                self._time_registry[key] = time.time()
+                if abs(self._event_registry[key].value - event.value) > 0.25:
+                    self._event_registry[key] = event
+                    self._time_registry[key] = time.time()
                     return True
                 else:
                     return False
         else:
-            self._event_registry[event] = event
-            self._time_registry[event] = time.time()
+            self._event_registry[key] = event
+            self._time_registry[key] = time.time()
             return False
 
     def _process_button(self, event):
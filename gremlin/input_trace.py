@@ -0,0 +1,257 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Recording and replaying of raw joystick input streams.
+
+A trace file consists of a fixed size header, a sequence of fixed size
+event records, and a table of the device GUIDs referenced by the records.
+The header stores the offset of the device table which is written once the
+recording is complete.
+"""
+
+import logging
+import mmap
+import struct
+import threading
+import time
+
+import dill
+
+from . import error
+
+
+# Header: magic, format version, offset of the device table
+_header = struct.Struct("<8sIQ")
+# Record: timestamp, device index, input type, input index, value
+_record = struct.Struct("<dHBBi")
+
+_magic = b"JGTRACE\0"
+_version = 1
+
+
+class TraceRecorder:
+
+    """Writes the raw events received from DILL to a trace file."""
+
+    def __init__(self, fname):
+        """Creates a new recorder writing to the given file.
+
+        :param fname path of the trace file to create
+        """
+        self._file = open(fname, "wb")
+        self._file.write(_header.pack(_magic, _version, 0))
+        self._devices = {}
+        self._guids = []
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self.record_count = 0
+
+    def record(self, data):
+        """Writes a single raw DILL event to the trace.
+
+        :param data the _JoystickInputData structure received from DILL
+        """
+        timestamp = time.perf_counter() - self._start_time
+        guid = bytes(data.device_guid)
+        with self._lock:
+            if self._file is None:
+                return
+            device_index = self._devices.get(guid)
+            if device_index is None:
+                device_index = len(self._guids)
+                self._devices[guid] = device_index
+                self._guids.append(guid)
+            self._file.write(_record.pack(
+                timestamp,
+                device_index,
+                data.input_type,
+                data.input_index,
+                data.value
+            ))
+            self.record_count += 1
+
+    def close(self):
+        """Writes the device table and closes the trace file."""
+        with self._lock:
+            if self._file is None:
+                return
+            table_offset = self._file.tell()
+            for guid in self._guids:
+                self._file.write(guid)
+            self._file.seek(0)
+            self._file.write(_header.pack(_magic, _version, table_offset))
+            self._file.close()
+            self._file = None
+
+
+class TraceReader:
+
+    """Provides random access to the records of a trace file.
+
+    The file is accessed through a memory map, as such traces do not need
+    to fit into memory.
+    """
+
+    def __init__(self, fname):
+        """Opens the given trace file.
+
+        :param fname path of the trace file to open
+        """
+        self._file = open(fname, "rb")
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(),
+                0,
+                access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            self._file.close()
+            raise error.GremlinError("Empty trace file {}".format(fname))
+
+        magic, version, table_offset = _header.unpack_from(self._map, 0)
+        if magic != _magic or version != _version:
+            self.close()
+            raise error.GremlinError("Invalid trace file {}".format(fname))
+        if table_offset == 0:
+            self.close()
+            raise error.GremlinError(
+                "Trace file {} was not closed properly".format(fname)
+            )
+
+        self.devices = []
+        guid_size = len(bytes(dill._GUID()))
+        for offset in range(table_offset, len(self._map), guid_size):
+            raw_guid = dill._GUID.from_buffer_copy(
+                self._map[offset:offset+guid_size]
+            )
+            self.devices.append(raw_guid)
+        self._count = (table_offset - _header.size) // _record.size
+
+    def __len__(self):
+        """Returns the number of records in the trace.
+
+        :return number of records
+        """
+        return self._count
+
+    def __getitem__(self, index):
+        """Returns a single record.
+
+        :param index the index of the record
+        :return (timestamp, device index, input type, input index, value)
+            tuple
+        """
+        if not 0 <= index < self._count:
+            raise IndexError("Trace record index out of range")
+        return _record.unpack_from(
+            self._map,
+            _header.size + index * _record.size
+        )
+
+    def records(self):
+        """Returns an iterator over all records.
+
+        :return iterator over all records in the trace
+        """
+        end = _header.size + self._count * _record.size
+        return _record.iter_unpack(memoryview(self._map)[_header.size:end])
+
+    def close(self):
+        """Closes the trace file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class TraceReplayer:
+
+    """Feeds the events of a trace file into an input event callback."""
+
+    def __init__(self, fname, callback, real_time=True):
+        """Creates a new replayer.
+
+        :param fname path of the trace file to replay
+        :param callback function receiving each event as a
+            _JoystickInputData structure, i.e. the DILL input event callback
+        :param real_time if True events are replayed with their recorded
+            timing, otherwise as fast as possible
+        """
+        self._fname = fname
+        self._callback = callback
+        self._real_time = real_time
+        self._running = False
+        self._thread = None
+        self.replayed_count = 0
+
+    def start(self):
+        """Starts replaying the trace on a separate thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.start()
+
+    def stop(self):
+        """Stops replaying the trace."""
+        self._running = False
+        if self._thread is not None and \
+                self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """Returns whether or not the trace is currently being replayed.
+
+        :return True if the replay is in progress, False otherwise
+        """
+        return self._running
+
+    def _run(self):
+        """Replays all events contained in the trace."""
+        reader = TraceReader(self._fname)
+        start_time = time.perf_counter()
+        # The callback consumes the structure immediately, allowing a single
+        # instance to be reused for all events
+        data = dill._JoystickInputData()
+        try:
+            for timestamp, device_index, input_type, index, value in \
+                    reader.records():
+                if not self._running:
+                    break
+                if self._real_time:
+                    delay = start_time + timestamp - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                data.device_guid = reader.devices[device_index]
+                data.input_type = input_type
+                data.input_index = index
+                data.value = value
+                self._callback(data)
+                self.replayed_count += 1
+        finally:
+            reader.close()
+            self._running = False
+            logging.getLogger("system").info(
+                "Replayed {:d} events from {} in {:.2f} s".format(
+                    self.replayed_count,
+                    self._fname,
+                    time.perf_counter() - start_time
+                )
+            )
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import array
 import logging
 import threading
 
@@ -32,6 +33,230 @@ _joystick_devices = []
 _joystick_init_lock = threading.Lock()
 
 
+class InputKeyRegistry:
+
+    """Assigns a small dense integer key to every input known to the system.
+
+    An input is identified by the GUID of its device, its input type, and
+    its identifier. Hashing these objects is expensive, hence every input is
+    interned once and from then on referred to by its integer key.
+    """
+
+    def __init__(self):
+        """Creates a new, empty, registry."""
+        self._keys = {}
+        self._inputs = []
+        self._lock = threading.Lock()
+
+    def key(self, device_guid, input_type, identifier):
+        """Returns the integer key of the specified input.
+
+        Inputs which have not been seen before are assigned a new key.
+
+        :param device_guid GUID of the device the input belongs to
+        :param input_type the InputType of the input
+        :param identifier the identifier of the input
+        :return integer key uniquely identifying the input
+        """
+        input_id = (device_guid, input_type, identifier)
+        key = self._keys.get(input_id)
+        if key is None:
+            with self._lock:
+                key = self._keys.get(input_id)
+                if key is None:
+                    key = len(self._inputs)
+                    self._inputs.append(input_id)
+                    self._keys[input_id] = key
+        return key
+
+    def input(self, key):
+        """Returns the input corresponding to the given key.
+
+        :param key the integer key of the input
+        :return (device_guid, input_type, identifier) tuple of the input
+        """
+        return self._inputs[key]
+
+    def register_device(self, device_info):
+        """Assigns keys to all inputs of the provided device.
+
+        :param device_info information about the device to register
+        """
+        guid = device_info.device_guid
+        for i in range(device_info.axis_count):
+            self.key(
+                guid,
+                common.InputType.JoystickAxis,
+                device_info.axis_map[i].axis_index
+            )
+        for i in range(1, device_info.button_count+1):
+            self.key(guid, common.InputType.JoystickButton, i)
+        for i in range(1, device_info.hat_count+1):
+            self.key(guid, common.InputType.JoystickHat, i)
+
+    def __len__(self):
+        """Returns the number of keys that have been assigned.
+
+        :return number of assigned keys
+        """
+        return len(self._keys)
+
+
+# Registry of the integer keys of all inputs
+input_key_registry = InputKeyRegistry()
+
+
+class DeviceState:
+
+    """Current state of all inputs of a single device.
+
+    The state of each input type is stored in a flat array indexed by the
+    1 based index of the input. Axes hold their raw value normalized to
+    [-1, 1], buttons whether or not they are pressed, and hats their raw
+    DILL value.
+    """
+
+    __slots__ = ("axes", "buttons", "hats")
+
+    def __init__(self, device_info):
+        """Creates a new instance sized for the given device.
+
+        :param device_info information about the device
+        """
+        axis_count = max(
+            (device_info.axis_map[i].axis_index
+             for i in range(device_info.axis_count)),
+            default=0
+        )
+        self.axes = array.array("d", [0.0] * (axis_count+1))
+        self.buttons = bytearray(device_info.button_count+1)
+        self.hats = array.array("i", [-1] * (device_info.hat_count+1))
+
+    def axis(self, index):
+        """Returns the value of an axis.
+
+        :param index the index of the axis
+        :return value of the axis in [-1, 1]
+        """
+        return self.axes[index]
+
+    def button(self, index):
+        """Returns whether or not a button is pressed.
+
+        :param index the index of the button
+        :return True if the button is pressed, False otherwise
+        """
+        return self.buttons[index] == 1
+
+    def hat(self, index):
+        """Returns the direction of a hat.
+
+        :param index the index of the hat
+        :return direction tuple of the hat
+        """
+        return util.dill_hat_lookup[self.hats[index]]
+
+    def matches(self, device_info):
+        """Returns whether or not this state can hold the given device.
+
+        :param device_info information about the device
+        :return True if the input counts match, False otherwise
+        """
+        return len(self.buttons) == device_info.button_count+1 and \
+            len(self.hats) == device_info.hat_count+1 and \
+            all(device_info.axis_map[i].axis_index < len(self.axes)
+                for i in range(device_info.axis_count))
+
+
+class InputStateMirror:
+
+    """Mirrors the state of all inputs of all connected devices.
+
+    The state is updated by the input ingestion path with every event
+    received from DILL. Reading the state of an input therefore requires
+    no call into DILL.
+    """
+
+    def __init__(self):
+        """Creates a new, empty, instance."""
+        self._devices = {}
+        self._vjoy_devices = {}
+
+    def register_devices(self, devices):
+        """Creates the state of all devices and initializes it from DILL.
+
+        The state object of a device is retained across calls, such that
+        references to it remain valid while the device stays connected.
+
+        :param devices information about all connected devices
+        """
+        vjoy_devices = {}
+        for dev in devices:
+            state = self._devices.get(dev.device_guid)
+            if state is None or not state.matches(dev):
+                state = DeviceState(dev)
+                self._devices[dev.device_guid] = state
+            self._read_state(dev, state)
+            if dev.is_virtual:
+                vjoy_devices[dev.vjoy_id] = state
+        self._vjoy_devices = vjoy_devices
+
+    def device(self, device_guid):
+        """Returns the state of the given device.
+
+        :param device_guid GUID of the device
+        :return DeviceState of the device, None if it is not known
+        """
+        return self._devices.get(device_guid)
+
+    def vjoy_device(self, vjoy_id):
+        """Returns the state of the given vJoy device as seen by DILL.
+
+        :param vjoy_id id of the vJoy device
+        :return DeviceState of the device, None if it is not known
+        """
+        return self._vjoy_devices.get(vjoy_id)
+
+    def update(self, event):
+        """Updates the state with the contents of a DILL input event.
+
+        :param event the dill.InputEvent to apply
+        """
+        state = self._devices.get(event.device_guid)
+        if state is None:
+            return
+        index = event.input_index
+        input_type = event.input_type
+        if input_type == dill.InputType.Axis:
+            if index < len(state.axes):
+                state.axes[index] = event.value / 32768.0
+        elif input_type == dill.InputType.Button:
+            if index < len(state.buttons):
+                state.buttons[index] = event.value == 1
+        elif input_type == dill.InputType.Hat:
+            if index < len(state.hats):
+                state.hats[index] = event.value
+
+    def _read_state(self, device_info, state):
+        """Initializes the state of a device with the values held by DILL.
+
+        :param device_info information about the device
+        :param state the DeviceState to initialize
+        """
+        guid = device_info.device_guid
+        for i in range(device_info.axis_count):
+            index = device_info.axis_map[i].axis_index
+            state.axes[index] = dill.DILL.get_axis(guid, index) / 32768.0
+        for i in range(1, device_info.button_count+1):
+            state.buttons[i] = dill.DILL.get_button(guid, i)
+        for i in range(1, device_info.hat_count+1):
+            state.hats[i] = dill.DILL.get_hat(guid, i)
+
+
+# Mirror of the state of all joystick inputs
+input_state = InputStateMirror()
+
+
 class VJoyProxy:
 
     """Manages the usage of vJoy and allows shared access all callbacks."""
@@ -332,4 +557,9 @@ def joystick_devices_initialization():
     # are made
     _joystick_devices = devices
 
+    # Intern the inputs of all devices such that events can be keyed on them
+    for dev in devices:
+        input_key_registry.register_device(dev)
+    input_state.register_devices(devices)
+
     _joystick_init_lock.release()
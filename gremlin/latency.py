@@ -0,0 +1,268 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import bisect
+import enum
+import threading
+import time
+
+import dill
+
+from . import joystick_handling
+
+
+# Flag indicating whether or not latencies are recorded. Every measurement
+# point checks this flag before doing any work, keeping the overhead of the
+# instrumentation negligible while it is disabled.
+enabled = False
+
+
+class Stage(enum.Enum):
+
+    """Enumeration of the measured stages of input processing."""
+
+    Dispatch = 1
+    Callback = 2
+    Completion = 3
+    VJoyWrite = 4
+
+    @staticmethod
+    def to_string(value):
+        return _Stage_to_string_lookup[value]
+
+
+_Stage_to_string_lookup = {
+    Stage.Dispatch: "Ingestion to dispatch",
+    Stage.Callback: "Callback duration",
+    Stage.Completion: "Ingestion to completion",
+    Stage.VJoyWrite: "Ingestion to vJoy write",
+}
+
+
+class Histogram:
+
+    """Histogram of latencies using logarithmically spaced bins."""
+
+    # Upper limit, in microseconds, of each bin, values exceeding the last
+    # limit are placed in an additional overflow bin
+    bin_limits = tuple(2**i for i in range(21))
+
+    def __init__(self):
+        """Creates a new, empty, histogram."""
+        self.bins = [0] * (len(Histogram.bin_limits) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """Adds a single measurement to the histogram.
+
+        :param seconds the measured latency in seconds
+        """
+        usec = seconds * 1e6
+        self.bins[bisect.bisect_left(Histogram.bin_limits, usec)] += 1
+        self.count += 1
+        self.total += usec
+        if usec > self.maximum:
+            self.maximum = usec
+
+    @property
+    def mean(self):
+        """Returns the mean latency in microseconds.
+
+        :return mean latency in microseconds
+        """
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, fraction):
+        """Returns an upper bound of the given percentile in microseconds.
+
+        :param fraction the percentile to compute as a value in [0, 1]
+        :return upper limit of the bin containing the percentile
+        """
+        threshold = fraction * self.count
+        accumulated = 0
+        for i, count in enumerate(self.bins):
+            accumulated += count
+            if accumulated >= threshold and count > 0:
+                if i < len(Histogram.bin_limits):
+                    return float(Histogram.bin_limits[i])
+                return self.maximum
+        return 0.0
+
+    def copy(self):
+        """Returns a copy of this histogram.
+
+        :return copy of this histogram
+        """
+        histogram = Histogram()
+        histogram.bins = list(self.bins)
+        histogram.count = self.count
+        histogram.total = self.total
+        histogram.maximum = self.maximum
+        return histogram
+
+
+class LatencyRecorder:
+
+    """Aggregates latency measurements per input and stage.
+
+    Latencies are measured relative to the time an event was ingested. The
+    event currently being processed is tracked per thread, which allows
+    attributing vJoy writes to the input that caused them.
+    """
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._current = threading.local()
+
+    def begin(self, event):
+        """Marks the start of processing an event.
+
+        :param event the event about to be processed
+        """
+        self._current.event = event
+        self._add(
+            event.key,
+            Stage.Dispatch,
+            time.perf_counter() - event.timestamp
+        )
+
+    def end(self, event):
+        """Marks the end of processing an event.
+
+        :param event the event which has been processed
+        """
+        self._current.event = None
+        self._add(
+            event.key,
+            Stage.Completion,
+            time.perf_counter() - event.timestamp
+        )
+
+    def record_callback(self, event, duration):
+        """Records the execution time of a single callback.
+
+        :param event the event the callback processed
+        :param duration the time in seconds the callback took
+        """
+        self._add(event.key, Stage.Callback, duration)
+
+    def record_vjoy_write(self):
+        """Records a vJoy write caused by the event currently processed."""
+        event = getattr(self._current, "event", None)
+        # Writes not caused by an input, e.g. by macros, are ignored
+        if event is None:
+            return
+        self._add(
+            event.key,
+            Stage.VJoyWrite,
+            time.perf_counter() - event.timestamp
+        )
+
+    def reset(self):
+        """Removes all recorded measurements."""
+        with self._lock:
+            self._histograms = {}
+
+    def histograms(self):
+        """Returns a copy of all histograms.
+
+        :return list of (input key, stage, histogram) tuples
+        """
+        with self._lock:
+            return [
+                (key[0], key[1], histogram.copy())
+                for key, histogram in self._histograms.items()
+            ]
+
+    def dump(self, fname):
+        """Writes all histograms to the given file.
+
+        :param fname path of the file to write
+        """
+        header = ["input", "stage", "count", "mean_us", "p50_us", "p99_us",
+                  "max_us"]
+        header.extend(
+            "le_{:d}us".format(limit) for limit in Histogram.bin_limits
+        )
+        header.append("overflow")
+        with open(fname, "w") as out:
+            out.write(",".join(header) + "\n")
+            for key, stage, histogram in sorted(
+                    self.histograms(),
+                    key=lambda x: (x[0], x[1].value)
+            ):
+                row = [
+                    "\"{}\"".format(input_description(key)),
+                    Stage.to_string(stage),
+                    str(histogram.count),
+                    "{:.1f}".format(histogram.mean),
+                    "{:.1f}".format(histogram.percentile(0.5)),
+                    "{:.1f}".format(histogram.percentile(0.99)),
+                    "{:.1f}".format(histogram.maximum)
+                ]
+                row.extend(str(count) for count in histogram.bins)
+                out.write(",".join(row) + "\n")
+
+    def _add(self, key, stage, seconds):
+        """Adds a measurement to the corresponding histogram.
+
+        :param key the integer key of the input
+        :param stage the stage the measurement belongs to
+        :param seconds the measured time in seconds
+        """
+        with self._lock:
+            histogram = self._histograms.get((key, stage))
+            if histogram is None:
+                histogram = Histogram()
+                self._histograms[(key, stage)] = histogram
+            histogram.add(seconds)
+
+
+def input_description(key):
+    """Returns a human readable description of the input with the given key.
+
+    :param key the integer key of the input
+    :return textual description of the input
+    """
+    device_guid, input_type, identifier = \
+        joystick_handling.input_key_registry.input(key)
+
+    device_name = str(device_guid)
+    if device_guid == dill.GUID_Keyboard:
+        device_name = "Keyboard"
+    elif device_guid == dill.GUID_Virtual:
+        device_name = "Virtual"
+    else:
+        for dev in joystick_handling.joystick_devices():
+            if dev.device_guid == device_guid:
+                device_name = dev.name
+                break
+
+    return "{} - {} {}".format(
+        device_name,
+        getattr(input_type, "name", input_type),
+        identifier
+    )
+
+
+# Recorder collecting all latency measurements
+recorder = LatencyRecorder()
@@ -20,35 +20,133 @@ import ctypes
 from ctypes import wintypes
 import functools
 import logging
+import os
+import queue
 import time
 from threading import Event, Lock, Thread
 from xml.etree import ElementTree
 
-import win32con
-import win32api
+try:
+    import win32con
+except ImportError:
+    # pywin32 only exists on Windows, elsewhere the fake backend provides the
+    # constants used by the key table
+    if os.environ.get("GREMLIN_BACKEND") != "fake":
+        raise
+    from gremlin import fake_win32con as win32con
 
 import gremlin
+import vjoy.vjoy
 
 
-MacroEntry = collections.namedtuple(
-    "MacroEntry",
-    ["macro", "state"]
-)
+class MacroQueue:
+
+    """Queue of macros waiting to be dispatched, indexed by macro id.
+
+    Each macro is held by a single entry which counts how often the macro
+    has been queued. Entries are kept in the order in which their macro was
+    first queued. Adding, removing, and dispatching a macro are constant
+    time operations.
+    """
+
+    def __init__(self):
+        """Creates a new, empty, queue."""
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    def push(self, macro):
+        """Queues the given macro.
+
+        :param macro the macro to queue
+        """
+        entry = self._entries.get(macro.id)
+        if entry is None:
+            self._entries[macro.id] = [macro, 1]
+        else:
+            entry[1] += 1
+        self._size += 1
+
+    def pop(self, macro_id):
+        """Removes one queued instance of the given macro.
+
+        :param macro_id id of the macro to remove
+        """
+        entry = self._entries[macro_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._entries[macro_id]
+        self._size -= 1
+
+    def remove(self, macro_id):
+        """Removes all queued instances of the given macro.
+
+        :param macro_id id of the macro to remove
+        """
+        entry = self._entries.pop(macro_id, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def macros(self):
+        """Returns the queued macros in the order they were first queued.
+
+        :return list of queued macros
+        """
+        return [entry[0] for entry in self._entries.values()]
+
+    def __len__(self):
+        """Returns the number of queued macro instances.
+
+        :return number of queued macro instances
+        """
+        return self._size
+
+
+class MacroExecution:
+
+    """State of a single macro execution processed by the worker pool."""
+
+    def __init__(self, macro, steps, generation):
+        """Creates a new instance.
+
+        :param macro the macro being executed
+        :param steps generator executing the macro's actions, yielding the
+            time, as per time.perf_counter, at which to resume whenever the
+            execution has to pause
+        :param generation generation of the manager the execution belongs to
+        """
+        self.macro = macro
+        self.steps = steps
+        self.generation = generation
+        self.dispatch_time = time.perf_counter()
+        self.has_started = False
+        # Time at which the execution is due to resume
+        self.deadline = None
 
 
 def _create_function(lib_name, fn_name, param_types, return_type):
     """Creates a handle to a windows dll library function.
 
+    The library is only loaded when the function is called for the first
+    time, which allows this module to be imported where it does not exist.
+
     :param lib_name name of the library to retrieve a function handle from
     :param fn_name name of the function
     :param param_types input parameter types
     :param return_type return parameter type
     :return function handle
     """
-    fn = getattr(ctypes.WinDLL(lib_name), fn_name)
-    fn.argtypes = param_types
-    fn.restype = return_type
-    return fn
+    handle = None
+
+    def call(*args):
+        nonlocal handle
+        if handle is None:
+            fn = getattr(ctypes.WinDLL(lib_name), fn_name)
+            fn.argtypes = param_types
+            fn.restype = return_type
+            handle = fn
+        return handle(*args)
+
+    return call
 
 
 # https://msdn.microsoft.com/en-us/library/windows/desktop/ms646296(v=vs.85).aspx
@@ -188,25 +286,6 @@ def _unicode_to_key(character):
     return Key(character, scan_code, is_extended, virtual_code)
 
 
-def _send_key_down(key):
-    """Sends the KEYDOWN event for a single key.
-
-    :param key the key for which to send the KEYDOWN event
-    """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
-
-
-def _send_key_up(key):
-    """Sends the KEYUP event for a single key.
-
-    :param key the key for which to send the KEYUP event
-    """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    flags |= win32con.KEYEVENTF_KEYUP
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
-
-
 @gremlin.common.SingletonDecorator
 class MacroManager:
 
@@ -215,7 +294,8 @@ class MacroManager:
     def __init__(self):
         """Initializes the instance."""
         self._active = {}
-        self._queue = []
+        self._queue = MacroQueue()
+        self._terminations = set()
         self._flags = {}
         self._flags_lock = Lock()
         self._queue_lock = Lock()
@@ -225,21 +305,93 @@ class MacroManager:
         # quick a succession.
         self.default_delay = 0.05
 
-        self._is_executing_exclusive = False
+        # Id of the exclusive macro currently being executed, no other macro
+        # may be dispatched while one is set
+        self._exclusive_id = None
         self._is_running = False
         self._schedule_event = Event()
 
         self._run_scheduler_thread = None
 
+        # Macros are executed by a fixed number of worker threads. A macro
+        # waiting for a pause to elapse releases its worker and is placed
+        # back into the ready queue by the shared scheduler once the pause
+        # is over.
+        self.worker_count = 4
+        self._ready = queue.Queue()
+        self._workers = []
+        # Incremented when stopping, executions of previous generations are
+        # discarded by the workers
+        self._generation = 0
+
+        # Macro waits lagging behind by more than this many seconds are not
+        # caught up with but restart timing from the current time instead
+        self.max_timing_lag = 0.25
+
+        # Time between dispatching a macro and its first action running, and
+        # per macro the delay between the end of waits and resuming
+        self._start_delay = gremlin.latency.Histogram()
+        self._jitter = {}
+        self._statistics_lock = Lock()
+
+    @property
+    def queue_depth(self):
+        """Returns the number of macros waiting to be dispatched.
+
+        :return number of queued macros
+        """
+        return len(self._queue)
+
+    @property
+    def ready_count(self):
+        """Returns the number of executions waiting for a worker.
+
+        :return number of executions ready to run
+        """
+        return self._ready.qsize()
+
+    def start_delay(self):
+        """Returns the distribution of delays until macros start running.
+
+        :return histogram of the times, in microseconds, between dispatching
+            macros and their first action running
+        """
+        with self._statistics_lock:
+            return self._start_delay.copy()
+
+    def jitter(self):
+        """Returns the timing jitter of each macro.
+
+        :return dictionary mapping macro ids to histograms of the delays, in
+            microseconds, between the end of waits and the macro resuming
+        """
+        with self._statistics_lock:
+            return {
+                macro_id: histogram.copy()
+                for macro_id, histogram in self._jitter.items()
+            }
+
+    def reset_statistics(self):
+        """Removes all start delay and jitter measurements."""
+        with self._statistics_lock:
+            self._start_delay = gremlin.latency.Histogram()
+            self._jitter = {}
+
     def start(self):
         """Starts the scheduler."""
         self._active = {}
         self._flags = {}
+        self._exclusive_id = None
         self._is_running = True
         if self._run_scheduler_thread is None:
             self._run_scheduler_thread = Thread(target=self._run_scheduler)
         if not self._run_scheduler_thread.is_alive():
             self._run_scheduler_thread.start()
+        if len(self._workers) == 0:
+            for _ in range(self.worker_count):
+                worker = Thread(target=self._run_worker, daemon=True)
+                worker.start()
+                self._workers.append(worker)
 
     def stop(self):
         """Stops the scheduler."""
@@ -257,6 +409,14 @@ class MacroManager:
                 for key, value in self._flags.items():
                     self._flags[key] = False
 
+        # Terminate the workers, discarding any unfinished execution
+        self._generation += 1
+        for _ in self._workers:
+            self._ready.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
     def queue_macro(self, macro):
         """Queues a macro in the schedule taking the repeat type into account.
 
@@ -265,10 +425,8 @@ class MacroManager:
         if isinstance(macro.repeat, ToggleRepeat) and macro.id in self._active:
             self.terminate_macro(macro)
         else:
-            # Preprocess macro to contain pauses as necessary
-            self._preprocess_macro(macro)
             with self._queue_lock:
-                self._queue.append(MacroEntry(macro, True))
+                self._queue.push(macro)
             self._schedule_event.set()
 
     def terminate_macro(self, macro):
@@ -276,7 +434,8 @@ class MacroManager:
 
         :param macro the macro to terminate
         """
-        self._queue.append(MacroEntry(macro, False))
+        with self._queue_lock:
+            self._terminations.add(macro.id)
         self._schedule_event.set()
 
     def _run_scheduler(self):
@@ -286,50 +445,34 @@ class MacroManager:
             self._schedule_event.wait()
             self._schedule_event.clear()
 
-            # Run scheduled macros and ensure exclusive ones run separately
-            # from all other macros
             with self._queue_lock:
-                entries_to_remove = []
+                # Terminate running macros and drop queued instances of them
+                for macro_id in self._terminations:
+                    self._queue.remove(macro_id)
+                    with self._flags_lock:
+                        if self._flags.get(macro_id, False):
+                            self._flags[macro_id] = False
+                self._terminations.clear()
+
+                # Run scheduled macros and ensure exclusive ones run
+                # separately from all other macros
                 has_exclusive = False
-                for i, entry in enumerate(self._queue):
-                    # Terminate macro if needed
-                    if entry.state is False:
-                        if entry.macro.id in self._flags \
-                                and self._flags[entry.macro.id]:
-                            # Terminate currently running macro
-                            with self._flags_lock:
-                                self._flags[entry.macro.id] = False
-                            # del self._queue[i]
-
-                            # Remove all queued up macros with the same id as
-                            # they should have been impossible to queue up
-                            # in the first place
-                            removal_list = []
-                            for queue_entry in self._queue:
-                                if queue_entry.macro.id == entry.macro.id:
-                                    removal_list.append(queue_entry)
-                            for queue_entry in removal_list:
-                                self._queue.remove(queue_entry)
+                for macro in self._queue.macros():
                     # Don't run a queued macro if the same instance is already
                     # running
-                    elif entry.macro.id in self._active:
+                    if macro.id in self._active:
                         continue
                     # Handle exclusive macros
-                    elif entry.macro.exclusive:
+                    elif macro.exclusive:
                         has_exclusive = True
                         if len(self._active) == 0:
-                            self._dispatch_macro(entry.macro)
-                            self._is_executing_exclusive = True
-                            entries_to_remove.append(entry)
+                            self._exclusive_id = macro.id
+                            self._queue.pop(macro.id)
+                            self._dispatch_macro(macro)
                     # Start a queued up macro
-                    elif not has_exclusive and not self._is_executing_exclusive:
-                        self._dispatch_macro(entry.macro)
-                        entries_to_remove.append(entry)
-
-                # Remove all entries we've processed
-                for entry in entries_to_remove:
-                    if entry in self._queue:
-                        self._queue.remove(entry)
+                    elif not has_exclusive and self._exclusive_id is None:
+                        self._queue.pop(macro.id)
+                        self._dispatch_macro(macro)
 
     def _dispatch_macro(self, macro):
         """Dispatches a single macro to be run.
@@ -338,69 +481,238 @@ class MacroManager:
         """
         if macro.id not in self._active:
             self._active[macro.id] = macro
-            Thread(target=functools.partial(self._execute_macro, macro)).start()
+            self._ready.put(MacroExecution(
+                macro,
+                self._execute_macro(macro, self._generation),
+                self._generation
+            ))
         else:
             logging.getLogger("system").warning(
                 "Attempting to dispatch an already running macro"
             )
 
-    def _execute_macro(self, macro):
-        """Executes a given macro in a separate thread.
+    def _run_worker(self):
+        """Runs macro executions from the ready queue until stopped."""
+        while True:
+            execution = self._ready.get()
+            if execution is None:
+                return
+            self._step(execution)
+
+    def _step(self, execution):
+        """Runs a macro execution until it pauses or completes.
+
+        A paused execution is queued again once the pause has elapsed.
+
+        :param execution the MacroExecution to run
+        """
+        if execution.generation != self._generation:
+            execution.steps.close()
+            return
+
+        now = time.perf_counter()
+        with self._statistics_lock:
+            if not execution.has_started:
+                execution.has_started = True
+                self._start_delay.add(now - execution.dispatch_time)
+            else:
+                histogram = self._jitter.get(execution.macro.id)
+                if histogram is None:
+                    histogram = gremlin.latency.Histogram()
+                    self._jitter[execution.macro.id] = histogram
+                histogram.add(now - execution.deadline)
+
+        try:
+            execution.deadline = next(execution.steps)
+        except StopIteration:
+            return
+        except Exception as e:
+            logging.getLogger("system").exception(
+                "Error while executing macro: {}".format(e)
+            )
+            return
+
+        gremlin.scheduler.scheduler.schedule_at(
+            execution.deadline,
+            functools.partial(self._ready.put, execution)
+        )
 
-        This method will run all provided actions and once they all have been
+    def _execute_macro(self, macro, generation):
+        """Executes a given macro.
+
+        This generator runs all provided actions and once they all have been
         executed will remove the macro from the set of active macros and
-        inform the scheduler of the completion.
+        inform the scheduler of the completion. Whenever the macro has to
+        wait the generator yields the time, as per time.perf_counter, at
+        which to resume. These times are computed from the time the macro
+        started, such that the time spent executing actions does not delay
+        subsequent actions or repetitions.
 
         :param macro the macro object to be executed
+        :param generation generation of the manager the execution belongs to
+        """
+        deadline = time.perf_counter()
+        try:
+            # Handle macros with a repeat mode
+            if macro.repeat is not None:
+                delay = macro.repeat.delay
+
+                with self._flags_lock:
+                    self._flags[macro.id] = True
+
+                # Handle count repeat mode
+                if isinstance(macro.repeat, CountRepeat):
+                    count = 0
+                    while count < macro.repeat.count and self._flags[macro.id]:
+                        deadline = yield from \
+                            self._execute_sequence(macro, deadline)
+                        count += 1
+                        deadline = yield from self._wait(deadline + delay)
+
+                # Handle continuous repeat modes
+                elif type(macro.repeat) in [HoldRepeat, ToggleRepeat]:
+                    while self._flags[macro.id]:
+                        deadline = yield from \
+                            self._execute_sequence(macro, deadline)
+                        deadline = yield from self._wait(deadline + delay)
+
+            # Handle simple one shot macros
+            else:
+                yield from self._execute_sequence(macro, deadline)
+
+        finally:
+            # Executions of a previous generation have been discarded and
+            # their state reset already
+            if generation == self._generation:
+                # Remove macro from active set, notify manager, and remove
+                # any potential callbacks
+                self._active.pop(macro.id, None)
+                if self._exclusive_id == macro.id:
+                    self._exclusive_id = None
+                with self._flags_lock:
+                    if macro.id in self._flags:
+                        self._flags[macro.id] = False
+                self._schedule_event.set()
+
+    def _execute_sequence(self, macro, deadline):
+        """Executes the actions of a macro once.
+
+        Pauses are not waited for, instead the time at which they end is
+        yielded.
+
+        :param macro the macro whose actions to execute
+        :param deadline time at which the sequence is due to start
+        :return time at which the sequence is due to end
         """
-        # Handle macros with a repeat mode
-        if macro.repeat is not None:
-            delay = macro.repeat.delay
+        timeline = macro.timeline(self.default_delay)
+        offset = 0.0
+        for step_offset, operations in timeline.steps:
+            if step_offset > offset:
+                deadline = yield from self._wait(
+                    deadline + step_offset - offset
+                )
+                offset = step_offset
+            # vJoy writes of a step are sent to the driver together
+            vjoy.vjoy.write_combiner.begin()
+            try:
+                for operation in operations:
+                    operation()
+            finally:
+                vjoy.vjoy.write_combiner.end()
+        if timeline.duration > offset:
+            deadline = yield from self._wait(
+                deadline + timeline.duration - offset
+            )
+        return deadline
 
-            with self._flags_lock:
-                self._flags[macro.id] = True
-
-            # Handle count repeat mode
-            if isinstance(macro.repeat, CountRepeat):
-                count = 0
-                while count < macro.repeat.count and self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    count += 1
-                    time.sleep(delay)
-
-            # Handle continuous repeat modes
-            elif type(macro.repeat) in [HoldRepeat, ToggleRepeat]:
-                while self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    time.sleep(delay)
-
-        # Handle simple one shot macros
-        else:
-            for action in macro.sequence:
-                action()
-
-        # Remove macro from active set, notify manager, and remove any
-        # potential callbacks
-        del self._active[macro.id]
-        if macro.exclusive:
-            self._is_executing_exclusive = False
-        with self._flags_lock:
-            if macro.id in self._flags:
-                self._flags[macro.id] = False
-        self._schedule_event.set()
+    def _wait(self, deadline):
+        """Yields the time until which to wait.
+
+        :param deadline time at which to resume
+        :return time from which to compute subsequent deadlines
+        """
+        yield deadline
+        # Restart timing if the macro fell too far behind, instead of
+        # catching up with a burst of actions
+        now = time.perf_counter()
+        if now - deadline > self.max_timing_lag:
+            return now
+        return deadline
+
+
+class MacroTimeline:
+
+    """Immutable schedule of the operations performed by a macro.
+
+    The timeline consists of steps, each of which holds the offset in
+    seconds from the start of the macro and the operations to perform at
+    that time. Pauses of the default delay are placed between consecutive
+    actions which are not separated by an explicit pause. Consecutive key
+    and mouse actions of a step are combined into a single batch of inputs
+    which is injected with one call.
+    """
+
+    __slots__ = ("steps", "duration")
 
-    def _preprocess_macro(self, macro):
-        """Inserts pauses as necessary into the macro."""
-        new_sequence = [macro.sequence[0]]
-        for a1, a2 in zip(macro.sequence[:-1], macro.sequence[1:]):
-            if isinstance(a1, PauseAction) or isinstance(a2, PauseAction):
-                new_sequence.append(a2)
+    def __init__(self, sequence, default_delay):
+        """Creates a new timeline.
+
+        :param sequence the actions of the macro
+        :param default_delay pause between consecutive actions
+        """
+        steps = []
+        operations = []
+        inputs = []
+        offset = 0.0
+        previous = None
+
+        for action in sequence:
+            if isinstance(action, PauseAction):
+                delay = action.duration
+            elif previous is not None and \
+                    not isinstance(previous, PauseAction):
+                delay = default_delay
             else:
-                new_sequence.append(PauseAction(self.default_delay))
-                new_sequence.append(a2)
-        macro._sequence = new_sequence
+                delay = 0.0
+            previous = action
+
+            # Close the current step once time advances
+            if delay > 0:
+                MacroTimeline._flush(operations, inputs)
+                if operations:
+                    steps.append((offset, tuple(operations)))
+                    operations = []
+                offset += delay
+            if isinstance(action, PauseAction):
+                continue
+
+            action_inputs = action.inputs()
+            if action_inputs is None:
+                MacroTimeline._flush(operations, inputs)
+                operations.append(action)
+            else:
+                inputs.extend(action_inputs)
+
+        MacroTimeline._flush(operations, inputs)
+        if operations:
+            steps.append((offset, tuple(operations)))
+
+        self.steps = tuple(steps)
+        self.duration = offset
+
+    @staticmethod
+    def _flush(operations, inputs):
+        """Turns the accumulated inputs into a single batch operation.
+
+        :param operations list of operations to add the batch to
+        :param inputs list of accumulated inputs, emptied by this call
+        """
+        if inputs:
+            operations.append(functools.partial(
+                gremlin.sendinput.send_inputs,
+                gremlin.sendinput.input_array(inputs)
+            ))
+            del inputs[:]
 
 
 class Macro:
@@ -413,6 +725,7 @@ class Macro:
     def __init__(self):
         """Creates a new macro instance."""
         self._sequence = []
+        self._timeline = None
         self._id = Macro._next_macro_id
         Macro._next_macro_id += 1
         self.repeat = None
@@ -434,12 +747,31 @@ class Macro:
         """
         return self._sequence
 
+    def timeline(self, default_delay):
+        """Returns the timeline executing this macro.
+
+        The timeline is compiled once and reused until the macro or the
+        default delay changes.
+
+        :param default_delay pause between consecutive actions
+        :return MacroTimeline of this macro
+        """
+        timeline = self._timeline
+        if timeline is None or timeline[0] != default_delay:
+            timeline = (
+                default_delay,
+                MacroTimeline(self._sequence, default_delay)
+            )
+            self._timeline = timeline
+        return timeline[1]
+
     def add_action(self, action):
         """Adds an action to the list of actions to perform.
 
         :param action the action to add
         """
         self._sequence.append(action)
+        self._timeline = None
 
     def pause(self, duration):
         """Adds a pause of the given duration to the macro.
@@ -447,6 +779,7 @@ class Macro:
         :param duration the duration of the pause in seconds
         """
         self._sequence.append(PauseAction(duration))
+        self._timeline = None
 
     def press(self, key):
         """Presses the specified key down.
@@ -485,6 +818,7 @@ class Macro:
             raise gremlin.error.KeyboardError("Invalid key specified")
 
         self._sequence.append(KeyAction(key, is_pressed))
+        self._timeline = None
 
 
 class AbstractAction:
@@ -496,6 +830,17 @@ class AbstractAction:
             "AbstractAction.__call__ not implemented in derived class."
         )
 
+    def inputs(self):
+        """Returns the inputs this action injects into the system.
+
+        Actions providing inputs are executed by injecting these as part of
+        a batch rather than by calling them.
+
+        :return list of INPUT structures, None if the action does not
+            inject inputs
+        """
+        return None
+
 
 class JoystickAction(AbstractAction):
 
@@ -560,10 +905,12 @@ class KeyAction(AbstractAction):
         self.is_pressed = is_pressed
 
     def __call__(self):
-        if self.is_pressed:
-            _send_key_down(self.key)
-        else:
-            _send_key_up(self.key)
+        gremlin.sendinput.send_inputs(
+            gremlin.sendinput.input_array(self.inputs())
+        )
+
+    def inputs(self):
+        return [gremlin.sendinput.key_input(self.key, self.is_pressed)]
 
 
 class MouseButtonAction(AbstractAction):
@@ -593,6 +940,17 @@ class MouseButtonAction(AbstractAction):
             else:
                 gremlin.sendinput.mouse_release(self.button)
 
+    def inputs(self):
+        if self.button == gremlin.common.MouseButton.WheelDown:
+            return [gremlin.sendinput.mouse_wheel_input(1)]
+        elif self.button == gremlin.common.MouseButton.WheelUp:
+            return [gremlin.sendinput.mouse_wheel_input(-1)]
+        mouse_input = gremlin.sendinput.mouse_button_input(
+            self.button,
+            self.is_pressed
+        )
+        return [] if mouse_input is None else [mouse_input]
+
 
 class MouseMotionAction(AbstractAction):
 
@@ -610,6 +968,9 @@ class MouseMotionAction(AbstractAction):
     def __call__(self):
         gremlin.sendinput.mouse_relative_motion(self.dx, self.dy)
 
+    def inputs(self):
+        return [gremlin.sendinput.mouse_motion_input(self.dx, self.dy)]
+
 
 class PauseAction(AbstractAction):
 
@@ -23,9 +23,6 @@ import threading
 
 from PyQt5 import QtCore
 
-import win32gui
-import win32process
-
 
 class ProcessMonitor(QtCore.QObject):
 
@@ -42,9 +39,6 @@ class ProcessMonitor(QtCore.QObject):
     # Definition of the flags for limited information queries
     PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
 
-    # kernel32.dll library handle
-    kernel32 = ctypes.windll.kernel32
-
     def __init__(self):
         """Creates a new instance."""
         QtCore.QObject.__init__(self)
@@ -72,6 +66,10 @@ class ProcessMonitor(QtCore.QObject):
 
     def _update(self):
         """Monitors the active process for changes."""
+        import win32gui
+        import win32process
+        kernel32 = ctypes.windll.kernel32
+
         while self.running:
             _, pid = win32process.GetWindowThreadProcessId(
                 win32gui.GetForegroundWindow()
@@ -79,20 +77,20 @@ class ProcessMonitor(QtCore.QObject):
 
             if pid != self._current_pid:
                 self._current_pid = pid
-                handle = ProcessMonitor.kernel32.OpenProcess(
+                handle = kernel32.OpenProcess(
                     ProcessMonitor.PROCESS_QUERY_LIMITED_INFORMATION,
                     False,
                     pid
                 )
 
                 self._buffer_size = ctypes.wintypes.DWORD(1024)
-                ProcessMonitor.kernel32.QueryFullProcessImageNameA(
+                kernel32.QueryFullProcessImageNameA(
                     handle,
                     0,
                     self._buffer,
                     ctypes.byref(self._buffer_size)
                 )
-                ProcessMonitor.kernel32.CloseHandle(handle)
+                kernel32.CloseHandle(handle)
 
                 self._current_path = os.path.normpath(
                     str(self._buffer.value)[2:-1]
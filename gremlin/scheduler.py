@@ -0,0 +1,247 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import ctypes
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from . import latency
+
+
+class ScheduledCall:
+
+    """Handle of a function scheduled for execution by the Scheduler."""
+
+    __slots__ = ("deadline", "callback", "_scheduler", "_state")
+
+    # States of a scheduled call
+    Pending, Cancelled, Done = range(3)
+
+    def __init__(self, scheduler, deadline, callback):
+        """Creates a new instance.
+
+        :param scheduler the scheduler executing the call
+        :param deadline time, as per time.perf_counter, of the execution
+        :param callback the function to execute
+        """
+        self.deadline = deadline
+        self.callback = callback
+        self._scheduler = scheduler
+        self._state = ScheduledCall.Pending
+
+    @property
+    def is_pending(self):
+        """Returns whether or not the call still has to be executed.
+
+        :return True if the call is yet to be executed, False otherwise
+        """
+        return self._state == ScheduledCall.Pending
+
+    def cancel(self):
+        """Cancels the call, does nothing if it has already been executed."""
+        self._scheduler.cancel(self)
+
+
+def _enable_high_resolution_timer():
+    """Requests a system timer resolution of one millisecond.
+
+    Without this waits on Windows are only accurate to about 15 ms.
+    """
+    windll = getattr(ctypes, "windll", None)
+    if windll is not None:
+        try:
+            windll.winmm.timeBeginPeriod(1)
+        except (AttributeError, OSError):
+            logging.getLogger("system").warning(
+                "Unable to increase the system timer resolution"
+            )
+
+
+class Scheduler:
+
+    """Executes functions at given points in time on a single thread.
+
+    Pending calls are kept in a heap ordered by their deadline. Cancelled
+    calls are only marked as such and discarded once they reach the top of
+    the heap. The delay between the deadline of a call and its actual
+    execution is recorded as the scheduling jitter.
+
+    The thread blocks until shortly before the next deadline and yields
+    its time slice for the remainder, as blocking waits are not accurate
+    enough to hit deadlines to within a millisecond.
+
+    All calls are executed on the scheduler's thread, thus a call that
+    blocks delays every other call. Calls must therefore only hand work
+    off to another thread, for example via EventHandler.call_later. Calls
+    running longer than block_threshold are reported.
+    """
+
+    # Time in seconds before a deadline at which to stop blocking
+    spin_threshold = 0.002
+    # Run time in seconds above which a call is reported as blocking
+    block_threshold = 0.005
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._pending_count = 0
+        self._thread = None
+
+        # Delay between the deadline and the execution of calls
+        self._jitter = latency.Histogram()
+        self._jitter_lock = threading.Lock()
+
+    @property
+    def pending_count(self):
+        """Returns the number of calls waiting to be executed.
+
+        :return number of pending calls
+        """
+        return self._pending_count
+
+    def jitter(self):
+        """Returns the distribution of the scheduling jitter.
+
+        :return histogram of the delays, in microseconds, between the
+            deadline of calls and their execution
+        """
+        with self._jitter_lock:
+            return self._jitter.copy()
+
+    def reset_jitter(self):
+        """Removes all jitter measurements."""
+        with self._jitter_lock:
+            self._jitter = latency.Histogram()
+
+    def schedule(self, delay, callback):
+        """Schedules a function for execution after the given delay.
+
+        The function is executed on the scheduler's thread and therefore
+        should not block.
+
+        :param delay time in seconds after which to execute the function
+        :param callback the function to execute
+        :return ScheduledCall handle of the scheduled call
+        """
+        return self.schedule_at(time.perf_counter() + delay, callback)
+
+    def schedule_at(self, deadline, callback):
+        """Schedules a function for execution at the given time.
+
+        The function is executed on the scheduler's thread and therefore
+        should not block.
+
+        :param deadline time, as per time.perf_counter, of the execution
+        :param callback the function to execute
+        :return ScheduledCall handle of the scheduled call
+        """
+        call = ScheduledCall(self, deadline, callback)
+        with self._condition:
+            heapq.heappush(
+                self._heap,
+                (call.deadline, next(self._sequence), call)
+            )
+            self._pending_count += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            # Only an earlier deadline requires the thread to recompute its
+            # waiting time
+            if self._heap[0][2] is call:
+                self._condition.notify()
+        return call
+
+    def cancel(self, call):
+        """Cancels a pending call.
+
+        :param call the call to cancel
+        """
+        with self._condition:
+            if call._state == ScheduledCall.Pending:
+                call._state = ScheduledCall.Cancelled
+                self._pending_count -= 1
+
+    def _run(self):
+        """Executes scheduled calls as their deadlines pass."""
+        _enable_high_resolution_timer()
+        while True:
+            with self._condition:
+                call = self._next_due()
+
+            # Yield the time slice until the deadline is reached
+            while time.perf_counter() < call.deadline:
+                time.sleep(0)
+
+            with self._condition:
+                # An earlier call may have been scheduled or the call been
+                # cancelled in the meantime
+                if self._heap[0][2] is not call or \
+                        call._state != ScheduledCall.Pending:
+                    continue
+                heapq.heappop(self._heap)
+                call._state = ScheduledCall.Done
+                self._pending_count -= 1
+
+            now = time.perf_counter()
+            with self._jitter_lock:
+                self._jitter.add(now - call.deadline)
+            try:
+                call.callback()
+            except Exception as e:
+                logging.getLogger("system").exception(
+                    "Error in scheduled call: {}".format(e)
+                )
+
+            duration = time.perf_counter() - now
+            if duration > Scheduler.block_threshold:
+                logging.getLogger("system").warning(
+                    "Scheduled call {} blocked the scheduler for {:.1f} ms"
+                    .format(call.callback, duration * 1000)
+                )
+
+    def _next_due(self):
+        """Waits until the next call is almost due and returns it.
+
+        Has to be called while holding the condition's lock.
+
+        :return the call whose deadline is about to be reached
+        """
+        while True:
+            while self._heap and \
+                    self._heap[0][2]._state == ScheduledCall.Cancelled:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._condition.wait()
+                continue
+
+            call = self._heap[0][2]
+            delay = call.deadline - time.perf_counter() - \
+                Scheduler.spin_threshold
+            if delay <= 0:
+                return call
+            self._condition.wait(delay)
+
+
+# Scheduler shared by all functionality executing delayed calls
+scheduler = Scheduler()
@@ -19,7 +19,9 @@
 import ctypes
 import ctypes.wintypes
 import enum
+import logging
 import math
+import os
 import threading
 import time
 
@@ -50,6 +52,14 @@ MOUSEEVENTF_XDOWN = 0x0080
 MOUSEEVENTF_XUP = 0x0100
 
 
+"""Defines flags used when specifying KEYBDINPUT structures.
+
+https://msdn.microsoft.com/en-us/library/ms646271(v=vs.85).aspx
+"""
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+
+
 """Defines data structure type for INPUT structures.
 
 https://msdn.microsoft.com/en-us/library/ms646270(v=vs.85).aspx
@@ -366,40 +376,184 @@ class _INPUT(ctypes.Structure):
     )
 
 
-def mouse_relative_motion(dx, dy):
-    _send_input(
-        _mouse_input(MOUSEEVENTF_MOVE, dx, dy)
+class SendInputBackend:
+
+    """Injects inputs into the system via the SendInput API."""
+
+    def send(self, inputs):
+        """Injects the given inputs as a single uninterrupted batch.
+
+        :param inputs ctypes array of INPUT structures
+        :return number of inputs that were injected
+        """
+        return ctypes.windll.user32.SendInput(
+            len(inputs),
+            inputs,
+            ctypes.sizeof(_INPUT)
+        )
+
+
+class RecordingBackend:
+
+    """Records inputs instead of injecting them into the system."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def send(self, inputs):
+        """Records the given inputs as a single batch.
+
+        :param inputs ctypes array of INPUT structures
+        :return number of recorded inputs
+        """
+        with self._lock:
+            self.batches.append(list(inputs))
+        return len(inputs)
+
+    def clear(self):
+        """Removes all recorded batches."""
+        with self._lock:
+            self.batches = []
+
+
+def _create_backend():
+    """Returns the backend to inject inputs with.
+
+    Setting the GREMLIN_BACKEND environment variable to "fake" selects the
+    recording backend, otherwise inputs are injected via SendInput.
+
+    :return backend used to inject inputs
+    """
+    if os.environ.get("GREMLIN_BACKEND") == "fake":
+        return RecordingBackend()
+    return SendInputBackend()
+
+
+# Backend all inputs are injected with
+_backend = _create_backend()
+
+
+def backend():
+    """Returns the backend used to inject inputs.
+
+    :return backend used to inject inputs
+    """
+    return _backend
+
+
+def set_backend(new_backend):
+    """Sets the backend used to inject inputs.
+
+    :param new_backend object with a send method accepting an array of INPUT
+        structures
+    """
+    global _backend
+    _backend = new_backend
+
+
+def input_array(inputs):
+    """Returns an array of INPUT structures which can be injected at once.
+
+    :param inputs sequence of INPUT structures
+    :return ctypes array containing the provided inputs
+    """
+    return (_INPUT * len(inputs))(*inputs)
+
+
+def send_inputs(inputs):
+    """Injects a batch of inputs which are processed without interruption.
+
+    :param inputs ctypes array of INPUT structures, as created by input_array
+    """
+    if _backend.send(inputs) != len(inputs):
+        logging.getLogger("system").warning(
+            "Only part of {:d} inputs could be injected".format(len(inputs))
+        )
+
+
+def key_input(key, is_pressed):
+    """Returns the INPUT structure pressing or releasing a key.
+
+    :param key the key to press or release
+    :param is_pressed True if the key is pressed, False if it is released
+    :return INPUT structure describing the key event
+    """
+    flags = KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
+    if not is_pressed:
+        flags |= KEYEVENTF_KEYUP
+    return _INPUT(
+        INPUT_KEYBOARD,
+        _INPUTunion(ki=_KEYBDINPUT(
+            key.virtual_code, key.scan_code, flags, 0, None
+        ))
     )
 
 
-def mouse_press(button):
+def mouse_button_input(button, is_pressed):
+    """Returns the INPUT structure pressing or releasing a mouse button.
+
+    :param button the mouse button to press or release
+    :param is_pressed True if the button is pressed, False if it is released
+    :return INPUT structure describing the button event, None if the button
+        cannot be pressed or released
+    """
     if button == MouseButton.Left:
-        _send_input(_mouse_input(MOUSEEVENTF_LEFTDOWN))
+        flags = MOUSEEVENTF_LEFTDOWN if is_pressed else MOUSEEVENTF_LEFTUP
+        return _mouse_input(flags)
     elif button == MouseButton.Right:
-        _send_input(_mouse_input(MOUSEEVENTF_RIGHTDOWN))
+        flags = MOUSEEVENTF_RIGHTDOWN if is_pressed else MOUSEEVENTF_RIGHTUP
+        return _mouse_input(flags)
     elif button == MouseButton.Middle:
-        _send_input(_mouse_input(MOUSEEVENTF_MIDDLEDOWN))
+        flags = MOUSEEVENTF_MIDDLEDOWN if is_pressed else MOUSEEVENTF_MIDDLEUP
+        return _mouse_input(flags)
     elif button == MouseButton.Back:
-        _send_input(_mouse_input(MOUSEEVENTF_XDOWN, data=XBUTTON1))
+        flags = MOUSEEVENTF_XDOWN if is_pressed else MOUSEEVENTF_XUP
+        return _mouse_input(flags, data=XBUTTON1)
     elif button == MouseButton.Forward:
-        _send_input(_mouse_input(MOUSEEVENTF_XDOWN, data=XBUTTON2))
+        flags = MOUSEEVENTF_XDOWN if is_pressed else MOUSEEVENTF_XUP
+        return _mouse_input(flags, data=XBUTTON2)
+    return None
+
+
+def mouse_wheel_input(motion):
+    """Returns the INPUT structure rotating the mouse wheel.
+
+    :param motion number of wheel clicks, positive values scroll down
+    :return INPUT structure describing the wheel motion
+    """
+    return _mouse_input(MOUSEEVENTF_WHEEL, data=-motion*WHEEL_DELTA)
+
+
+def mouse_motion_input(dx, dy):
+    """Returns the INPUT structure moving the mouse.
+
+    :param dx change along the X axis in pixels
+    :param dy change along the Y axis in pixels
+    :return INPUT structure describing the mouse motion
+    """
+    return _mouse_input(MOUSEEVENTF_MOVE, dx, dy)
+
+
+def mouse_relative_motion(dx, dy):
+    _send_input(mouse_motion_input(dx, dy))
+
+
+def mouse_press(button):
+    mouse_input = mouse_button_input(button, True)
+    if mouse_input is not None:
+        _send_input(mouse_input)
 
 
 def mouse_release(button):
-    if button == MouseButton.Left:
-        _send_input(_mouse_input(MOUSEEVENTF_LEFTUP))
-    elif button == MouseButton.Right:
-        _send_input(_mouse_input(MOUSEEVENTF_RIGHTUP))
-    elif button == MouseButton.Middle:
-        _send_input(_mouse_input(MOUSEEVENTF_MIDDLEUP))
-    elif button == MouseButton.Back:
-        _send_input(_mouse_input(MOUSEEVENTF_XUP, data=XBUTTON1))
-    elif button == MouseButton.Forward:
-        _send_input(_mouse_input(MOUSEEVENTF_XUP, data=XBUTTON2))
+    mouse_input = mouse_button_input(button, False)
+    if mouse_input is not None:
+        _send_input(mouse_input)
 
 
 def mouse_wheel(motion):
-    _send_input(_mouse_input(MOUSEEVENTF_WHEEL, data=-motion*WHEEL_DELTA))
+    _send_input(mouse_wheel_input(motion))
 
 
 def _mouse_input(flags, dx=0, dy=0, data=0):
@@ -410,9 +564,4 @@ def _mouse_input(flags, dx=0, dy=0, data=0):
 
 
 def _send_input(*inputs):
-    nInputs = len(inputs)
-    LPINPUT = _INPUT * nInputs
-    pInputs = LPINPUT(*inputs)
-    cbSize = ctypes.c_int(ctypes.sizeof(_INPUT))
-
-    return ctypes.windll.user32.SendInput(nInputs, pInputs, cbSize)
+    send_inputs(input_array(inputs))
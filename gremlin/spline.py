@@ -16,9 +16,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import bisect
 import collections
 import gremlin.util
 
+# NumPy is optional and only used to speed up batch evaluations
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 # Named tuple to facilitate working with 2D coordinates
 Point2D = collections.namedtuple("Point2D", ["x", "y"])
@@ -44,6 +51,7 @@ class CubicSpline:
         self.x = [v[0] for v in ordered_points]
         self.y = [v[1] for v in ordered_points]
         self.z = [0] * len(points)
+        self._arrays = None
 
         self._fit()
 
@@ -80,12 +88,7 @@ class CubicSpline:
         :param x the location at which to evaluate the function
         :return function value at the provided position
         """
-        n = len(self.x)
-
-        i = 0
-        for i in range(n-1):
-            if self.x[i] <= x <= self.x[i+1]:
-                break
+        i = self._segment(x)
 
         h = self.x[i+1] - self.x[i]
         tmp = (self.z[i] / 2.0) + (x - self.x[i]) * \
@@ -95,6 +98,45 @@ class CubicSpline:
 
         return self.y[i] + (x - self.x[i]) * tmp
 
+    def evaluate(self, xs):
+        """Returns the function values at all the desired positions.
+
+        :param xs the locations at which to evaluate the function
+        :return list of function values at the provided positions
+        """
+        if numpy is None or len(self.x) < 2:
+            return [self(x) for x in xs]
+
+        if self._arrays is None:
+            self._arrays = (
+                numpy.array(self.x, dtype=float),
+                numpy.array(self.y, dtype=float),
+                numpy.array(self.z, dtype=float)
+            )
+        kx, ky, kz = self._arrays
+
+        x = numpy.asarray(xs, dtype=float)
+        i = numpy.clip(numpy.searchsorted(kx, x) - 1, 0, len(kx) - 2)
+
+        h = kx[i+1] - kx[i]
+        dx = x - kx[i]
+        tmp = (kz[i] / 2.0) + dx * (kz[i+1] - kz[i]) / (6 * h)
+        tmp = -(h/6.0) * (kz[i+1] + 2 * kz[i]) + \
+            (ky[i+1] - ky[i]) / h + dx * tmp
+
+        return (ky[i] + dx * tmp).tolist()
+
+    def _segment(self, x):
+        """Returns the index of the segment containing the given position.
+
+        Positions outside of the control points are assigned to the first
+        and last segment respectively.
+
+        :param x the location for which to find the segment
+        :return index of the first control point of the segment
+        """
+        return min(max(bisect.bisect_left(self.x, x) - 1, 0), len(self.x) - 2)
+
 
 class CubicBezierSpline:
 
@@ -201,3 +243,11 @@ class CubicBezierSpline:
         high = self._lookup[index][interval[1]][1]
 
         return low.y + (x - low.x) * ((high.y - low.y) / (high.x - low.x))
+
+    def evaluate(self, xs):
+        """Returns the function values at all the desired positions.
+
+        :param xs the locations at which to evaluate the function
+        :return list of function values at the provided positions
+        """
+        return [self(x) for x in xs]
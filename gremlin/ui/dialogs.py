@@ -29,6 +29,7 @@ from inspect import getdoc
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 import dill
+import vjoy.vjoy
 
 import gremlin
 import gremlin.error
@@ -167,6 +168,36 @@ class OptionsUi(common.BaseDialogUi):
         )
         self.macro_axis_minimum_change_layout.addStretch()
 
+        # Axis event coalescing
+        self.axis_coalescing_layout = QtWidgets.QHBoxLayout()
+        self.axis_coalescing = QtWidgets.QCheckBox(
+            "Coalesce axis events, maximum rate (Hz)"
+        )
+        self.axis_coalescing.clicked.connect(self._axis_coalescing)
+        self.axis_coalescing.setChecked(self.config.axis_coalescing)
+        self.axis_dispatch_rate = QtWidgets.QSpinBox()
+        self.axis_dispatch_rate.setRange(10, 2000)
+        self.axis_dispatch_rate.setSingleStep(50)
+        self.axis_dispatch_rate.setValue(self.config.axis_dispatch_rate)
+        self.axis_dispatch_rate.valueChanged.connect(self._axis_dispatch_rate)
+        self.axis_coalescing_layout.addWidget(self.axis_coalescing)
+        self.axis_coalescing_layout.addWidget(self.axis_dispatch_rate)
+        self.axis_coalescing_layout.addStretch()
+
+        # Dedicated event dispatch thread
+        self.dispatch_thread = QtWidgets.QCheckBox(
+            "Process inputs on a dedicated thread (applies on activation)"
+        )
+        self.dispatch_thread.clicked.connect(self._dispatch_thread)
+        self.dispatch_thread.setChecked(self.config.dispatch_thread)
+
+        # Combined vJoy writes
+        self.vjoy_write_combining = QtWidgets.QCheckBox(
+            "Send all vJoy changes caused by an input in a single update"
+        )
+        self.vjoy_write_combining.clicked.connect(self._vjoy_write_combining)
+        self.vjoy_write_combining.setChecked(self.config.vjoy_write_combining)
+
         self.general_layout.addWidget(self.highlight_input)
         self.general_layout.addWidget(self.highlight_device)
         self.general_layout.addWidget(self.close_to_systray)
@@ -177,6 +208,9 @@ class OptionsUi(common.BaseDialogUi):
         self.general_layout.addLayout(self.default_action_layout)
         self.general_layout.addLayout(self.macro_axis_polling_layout)
         self.general_layout.addLayout(self.macro_axis_minimum_change_layout)
+        self.general_layout.addLayout(self.axis_coalescing_layout)
+        self.general_layout.addWidget(self.dispatch_thread)
+        self.general_layout.addWidget(self.vjoy_write_combining)
         self.general_layout.addStretch()
         self.tab_container.addTab(self.general_page, "General")
 
@@ -575,6 +609,37 @@ If this option is on, the last active profile will remain active until a differe
         """
         self.config.macro_axis_minimum_change_rate = value
 
+    def _axis_coalescing(self, clicked):
+        """Stores whether or not axis events are coalesced.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.axis_coalescing = clicked
+        gremlin.event_handler.EventListener().configure_axis_coalescing()
+
+    def _axis_dispatch_rate(self, value):
+        """Updates the config with the newly set axis dispatch rate.
+
+        :param value the new maximum axis dispatch rate
+        """
+        self.config.axis_dispatch_rate = value
+        gremlin.event_handler.EventListener().configure_axis_coalescing()
+
+    def _dispatch_thread(self, clicked):
+        """Stores whether or not inputs are processed on a dedicated thread.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.dispatch_thread = clicked
+
+    def _vjoy_write_combining(self, clicked):
+        """Stores whether or not vJoy writes are combined.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        self.config.vjoy_write_combining = clicked
+        vjoy.vjoy.write_combiner.enabled = clicked
+
     def _create_hg_cb(self, *params):
         return lambda x: self._update_hg_device(x, *params)
 
@@ -713,6 +778,160 @@ class LogWindowUi(common.BaseDialogUi):
         )
 
 
+class LatencyUi(common.BaseDialogUi):
+
+    """Window displaying input processing latency statistics."""
+
+    def __init__(self, parent=None):
+        """Creates a new instance.
+
+        :param parent the parent of this widget
+        """
+        super().__init__(parent)
+
+        self.setWindowTitle("Latency Statistics")
+        self.setMinimumWidth(800)
+
+        self.main_layout = QtWidgets.QVBoxLayout(self)
+
+        self.enable_recording = QtWidgets.QCheckBox("Record latencies")
+        self.enable_recording.setChecked(gremlin.latency.enabled)
+        self.enable_recording.clicked.connect(self._enable_recording)
+        self.main_layout.addWidget(self.enable_recording)
+
+        self.table = QtWidgets.QTableWidget(0, 7)
+        self.table.setHorizontalHeaderLabels([
+            "Input", "Stage", "Count", "Mean (us)", "Median (us)",
+            "99th (us)", "Max (us)"
+        ])
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            0,
+            QtWidgets.QHeaderView.Stretch
+        )
+        self.main_layout.addWidget(self.table)
+
+        self.scheduler_label = QtWidgets.QLabel()
+        self.main_layout.addWidget(self.scheduler_label)
+        self.macro_label = QtWidgets.QLabel()
+        self.main_layout.addWidget(self.macro_label)
+        self.vjoy_label = QtWidgets.QLabel()
+        self.main_layout.addWidget(self.vjoy_label)
+
+        self.button_layout = QtWidgets.QHBoxLayout()
+        self.reset_button = QtWidgets.QPushButton("Reset")
+        self.reset_button.clicked.connect(self._reset)
+        self.save_button = QtWidgets.QPushButton("Save")
+        self.save_button.clicked.connect(self._save)
+        self.button_layout.addStretch()
+        self.button_layout.addWidget(self.reset_button)
+        self.button_layout.addWidget(self.save_button)
+        self.main_layout.addLayout(self.button_layout)
+
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.timeout.connect(self._update)
+        self.update_timer.start(1000)
+        self._update()
+
+    def closeEvent(self, event):
+        """Handles closing of the window.
+
+        :param event the closing event
+        """
+        self.update_timer.stop()
+        super().closeEvent(event)
+
+    def _enable_recording(self, clicked):
+        """Enables or disables the recording of latencies.
+
+        :param clicked whether or not the checkbox is ticked
+        """
+        gremlin.latency.enabled = clicked
+
+    def _reset(self):
+        """Removes all recorded latencies."""
+        gremlin.latency.recorder.reset()
+        gremlin.scheduler.scheduler.reset_jitter()
+        gremlin.macro.MacroManager().reset_statistics()
+        for device in gremlin.joystick_handling.VJoyProxy.vjoy_devices.values():
+            device.reset_statistics()
+        self._update()
+
+    def _save(self):
+        """Writes the recorded latencies to a file."""
+        fname, _ = QtWidgets.QFileDialog.getSaveFileName(
+            None,
+            "Save latency statistics",
+            gremlin.util.userprofile_path(),
+            "CSV files (*.csv)"
+        )
+        if fname != "":
+            gremlin.latency.recorder.dump(fname)
+
+    def _update(self):
+        """Displays the current latency statistics."""
+        histograms = sorted(
+            gremlin.latency.recorder.histograms(),
+            key=lambda x: (x[0], x[1].value)
+        )
+        self.table.setRowCount(len(histograms))
+        for row, (key, stage, histogram) in enumerate(histograms):
+            values = [
+                gremlin.latency.input_description(key),
+                gremlin.latency.Stage.to_string(stage),
+                str(histogram.count),
+                "{:.1f}".format(histogram.mean),
+                "{:.1f}".format(histogram.percentile(0.5)),
+                "{:.1f}".format(histogram.percentile(0.99)),
+                "{:.1f}".format(histogram.maximum)
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(
+                    row,
+                    column,
+                    QtWidgets.QTableWidgetItem(value)
+                )
+
+        jitter = gremlin.scheduler.scheduler.jitter()
+        self.scheduler_label.setText(
+            "Pending timers: {:d}    Timer jitter (us): mean {:.1f}, "
+            "99th {:.1f}, max {:.1f}".format(
+                gremlin.scheduler.scheduler.pending_count,
+                jitter.mean,
+                jitter.percentile(0.99),
+                jitter.maximum
+            )
+        )
+
+        macro_manager = gremlin.macro.MacroManager()
+        start_delay = macro_manager.start_delay()
+        max_jitter = max(
+            [h.maximum for h in macro_manager.jitter().values()],
+            default=0.0
+        )
+        self.macro_label.setText(
+            "Queued macros: {:d}    Ready macros: {:d}    Dispatch to first "
+            "action (us): mean {:.1f}, 99th {:.1f}, max {:.1f}    "
+            "Macro timing jitter (us): max {:.1f}".format(
+                macro_manager.queue_depth,
+                macro_manager.ready_count,
+                start_delay.mean,
+                start_delay.percentile(0.99),
+                start_delay.maximum,
+                max_jitter
+            )
+        )
+
+        vjoy_devices = gremlin.joystick_handling.VJoyProxy.vjoy_devices.values()
+        self.vjoy_label.setText(
+            "vJoy driver calls: {:d}    Suppressed unchanged writes: {:d}"
+            .format(
+                sum(dev.driver_call_count for dev in vjoy_devices),
+                sum(dev.suppressed_count for dev in vjoy_devices)
+            )
+        )
+
+
 class AboutUi(common.BaseDialogUi):
 
     """Widget which displays information about the application."""
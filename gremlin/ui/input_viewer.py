@@ -213,13 +213,13 @@ class JoystickDeviceWidget(QtWidgets.QWidget):
         el = gremlin.event_handler.EventListener()
         if vis_type == VisualizationType.AxisCurrent:
             self._create_current_axis()
-            el.joystick_event.connect(self._current_axis_update)
+            el.joystick_ui_event.connect(self._current_axis_update)
         elif vis_type == VisualizationType.AxisTemporal:
             self._create_temporal_axis()
-            el.joystick_event.connect(self._temporal_axis_update)
+            el.joystick_ui_event.connect(self._temporal_axis_update)
         elif vis_type == VisualizationType.ButtonHat:
             self._create_button_hat()
-            el.joystick_event.connect(self._button_hat_update)
+            el.joystick_ui_event.connect(self._button_hat_update)
 
     def minimumSizeHint(self):
         """Returns the minimum size of this widget.
@@ -345,6 +345,14 @@ class ButtonState(QtWidgets.QGroupBox):
         button_layout.setColumnStretch(10, 1)
         self.setLayout(button_layout)
 
+        # Show the current state until the first event is received
+        state = gremlin.joystick_handling.input_state.device(
+            device.device_guid
+        )
+        if state is not None:
+            for i in range(1, device.button_count+1):
+                self.buttons[i].setDown(state.button(i))
+
     def process_event(self, event):
         """Updates state visualization based on the given event.
 
@@ -384,6 +392,14 @@ class HatState(QtWidgets.QGroupBox):
 
         self.setLayout(hat_layout)
 
+        # Show the current state until the first event is received
+        state = gremlin.joystick_handling.input_state.device(
+            device.device_guid
+        )
+        if state is not None:
+            for i in range(1, device.hat_count+1):
+                self.hats[i].set_angle(state.hat(i))
+
     def process_event(self, event):
         """Updates state visualization based on the given event.
 
@@ -469,11 +485,18 @@ class AxesCurrentState(QtWidgets.QGroupBox):
         else:
             self.setTitle("{} - Axes".format(device.name))
 
+        state = gremlin.joystick_handling.input_state.device(
+            device.device_guid
+        )
+
         self.axes = [None]
         axes_layout = QtWidgets.QHBoxLayout()
         for i in range(device.axis_count):
             axis = AxisStateWidget(i+1)
-            axis.set_value(0.0)
+            if state is not None:
+                axis.set_value(state.axis(device.axis_map[i].axis_index))
+            else:
+                axis.set_value(0.0)
             self.axes.append(axis)
             axes_layout.addWidget(axis)
         axes_layout.addStretch()
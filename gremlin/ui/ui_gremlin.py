@@ -103,6 +103,8 @@ class Ui_Gremlin(object):
         self.actionSwapDevices.setObjectName("actionSwapDevices")
         self.actionInputViewer = QtWidgets.QAction(Gremlin)
         self.actionInputViewer.setObjectName("actionInputViewer")
+        self.actionLatencyStatistics = QtWidgets.QAction(Gremlin)
+        self.actionLatencyStatistics.setObjectName("actionLatencyStatistics")
         self.actionExportBindings = QtWidgets.QAction(Gremlin)
         self.actionExportBindings.setObjectName("actionExportBindings")
         self.actionImportBindings = QtWidgets.QAction(Gremlin)
@@ -122,6 +124,7 @@ class Ui_Gremlin(object):
         self.menuTools.addAction(self.actionDeviceInformation)
         self.menuTools.addAction(self.actionCalibration)
         self.menuTools.addAction(self.actionInputViewer)
+        self.menuTools.addAction(self.actionLatencyStatistics)
         self.menuTools.addSeparator()
         self.menuTools.addAction(self.actionImportBindings)
         self.menuTools.addAction(self.actionExportBindings)
@@ -180,5 +183,6 @@ class Ui_Gremlin(object):
         self.actionEmpty.setText(_translate("Gremlin", "Empty"))
         self.actionSwapDevices.setText(_translate("Gremlin", "Swap Devices"))
         self.actionInputViewer.setText(_translate("Gremlin", "Input Viewer"))
+        self.actionLatencyStatistics.setText(_translate("Gremlin", "Latency Statistics"))
         self.actionExportBindings.setText(_translate("Gremlin", "&Export Bindings"))
         self.actionImportBindings.setText(_translate("Gremlin", "&Import Bindings"))
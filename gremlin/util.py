@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import array
 import ctypes
 import importlib
 import logging
@@ -33,6 +34,12 @@ from . import common, error, joystick_handling
 # Table storing which modules have been imported already
 g_loaded_modules = {}
 
+# Calibration lookup tables shared between axes with identical limits
+g_calibration_tables = {}
+
+# Offset mapping a raw axis value onto its calibration table index
+calibration_table_offset = 32768
+
 
 class FileWatcher(QtCore.QObject):
 
@@ -127,6 +134,31 @@ def create_calibration_function(minimum, center, maximum):
         return lambda x: axis_calibration(x, minimum, center, maximum)
 
 
+def calibration_table(minimum, center, maximum):
+    """Returns a lookup table holding the calibrated value of every raw value.
+
+    The table contains one entry for each of the 65536 possible raw axis
+    values, the entry for a raw value is located at its value plus
+    calibration_table_offset. Tables are cached and shared between all
+    axes using the same limits.
+
+    :param minimum the minimal value ever reported
+    :param center the value in the neutral position
+    :param maximum the maximal value ever reported
+    :return array containing the calibrated value in [-1, 1] of every raw
+        input value
+    """
+    key = (minimum, center, maximum)
+    if key not in g_calibration_tables:
+        calibrate = create_calibration_function(minimum, center, maximum)
+        g_calibration_tables[key] = array.array(
+            "d",
+            (calibrate(value - calibration_table_offset)
+             for value in range(65536))
+        )
+    return g_calibration_tables[key]
+
+
 def truncate(text, left_size, right_size):
     """Returns a truncated string matching the specified character counts.
 
@@ -152,9 +184,12 @@ def script_path():
 
 
 def userprofile_path():
-    """Returns the path to the user's profile folder, %userprofile%."""
+    """Returns the path to the user's profile folder, %userprofile%.
+
+    Falls back to the home directory where %userprofile% is not defined.
+    """
     return os.path.normcase(os.path.abspath(os.path.join(
-        os.getenv("userprofile"),
+        os.getenv("userprofile", os.path.expanduser("~")),
         "Joystick Gremlin")
     ))
 
@@ -18,12 +18,26 @@
 
 import ctypes
 from ctypes import wintypes
+import os
 import threading
 
 import gremlin.common
 
 
-user32 = ctypes.WinDLL("user32")
+def _load_library():
+    """Returns the library providing the hook functions.
+
+    Setting the GREMLIN_BACKEND environment variable to "fake" disables the
+    system wide hooks, in which case no library is loaded.
+
+    :return user32 library or None if hooks are disabled
+    """
+    if os.environ.get("GREMLIN_BACKEND") == "fake":
+        return None
+    return ctypes.WinDLL("user32")
+
+
+user32 = _load_library()
 
 
 g_keyboard_callbacks = []
@@ -43,45 +57,48 @@ g_mouse_callbacks = []
 # KBDLLHOOKSTRUCT
 #     https://msdn.microsoft.com/en-us/library/windows/desktop/ms644967(v=vs.85).aspx
 
-# Signature of a hook callback function which can be used as a decorator
-HOOKPROC = ctypes.WINFUNCTYPE(
+# Signature of a hook callback function which can be used as a decorator,
+# the stdcall calling convention only exists on Windows
+HOOKPROC = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)(
     wintypes.LPARAM,
     ctypes.c_int,
     wintypes.WPARAM,
     wintypes.LPARAM
 )
 
-# Function to hook into an event stream
-user32.SetWindowsHookExW.restype = wintypes.HHOOK
-user32.SetWindowsHookExW.argtypes = (
-    ctypes.c_int,           # _In_ idHook
-    HOOKPROC,               # _In_ lpfn
-    wintypes.HINSTANCE,     # _In_ hMod
-    wintypes.DWORD          # _In_ dwThreadId
-)
+# Function declarations are only needed when hooks are installed
+if user32 is not None:
+    # Function to hook into an event stream
+    user32.SetWindowsHookExW.restype = wintypes.HHOOK
+    user32.SetWindowsHookExW.argtypes = (
+        ctypes.c_int,           # _In_ idHook
+        HOOKPROC,               # _In_ lpfn
+        wintypes.HINSTANCE,     # _In_ hMod
+        wintypes.DWORD          # _In_ dwThreadId
+    )
 
-# Function to call next hook in the chain
-user32.CallNextHookEx.restype = wintypes.LPARAM
-user32.CallNextHookEx.argtypes = (
-    wintypes.HHOOK,         # _In_opt_ hhk
-    ctypes.c_int,           # _In_     nCode
-    wintypes.WPARAM,        # _In_     wParam
-    wintypes.LPARAM         # _In_     lParam
-)
+    # Function to call next hook in the chain
+    user32.CallNextHookEx.restype = wintypes.LPARAM
+    user32.CallNextHookEx.argtypes = (
+        wintypes.HHOOK,         # _In_opt_ hhk
+        ctypes.c_int,           # _In_     nCode
+        wintypes.WPARAM,        # _In_     wParam
+        wintypes.LPARAM         # _In_     lParam
+    )
 
-# Retrieve a single message from a stream
-user32.GetMessageW.argtypes = (
-    wintypes.LPMSG,         # _Out_    lpMsg
-    wintypes.HWND,          # _In_opt_ hWnd
-    wintypes.UINT,          # _In_     wMsgFilterMin
-    wintypes.UINT           # _In_     wMsgFilterMax
-)
+    # Retrieve a single message from a stream
+    user32.GetMessageW.argtypes = (
+        wintypes.LPMSG,         # _Out_    lpMsg
+        wintypes.HWND,          # _In_opt_ hWnd
+        wintypes.UINT,          # _In_     wMsgFilterMin
+        wintypes.UINT           # _In_     wMsgFilterMax
+    )
 
-# Convert message content
-user32.TranslateMessage.argtypes = (wintypes.LPMSG,)
+    # Convert message content
+    user32.TranslateMessage.argtypes = (wintypes.LPMSG,)
 
-# Dispatch message to hooked processes
-user32.DispatchMessageW.argtypes = (wintypes.LPMSG,)
+    # Dispatch message to hooked processes
+    user32.DispatchMessageW.argtypes = (wintypes.LPMSG,)
 
 # Action definitions
 HC_ACTION       = 0
@@ -304,12 +321,15 @@ class KeyboardHook:
         if self._running:
             return
         self._running = True
-        self._listen_thread.start()
+        if user32 is not None:
+            self._listen_thread.start()
 
     def stop(self):
         """Stops the hook from running."""
         if self._running:
             self._running = False
+            if user32 is None:
+                return
             user32.PostThreadMessageW(self._listen_thread.ident, WM_QUIT, 0, 0)
             self._listen_thread.join()
             # Recreate thread so we can launch it again
@@ -359,12 +379,15 @@ class MouseHook:
         if self._running:
             return
         self._running = True
-        self._listen_thread.start()
+        if user32 is not None:
+            self._listen_thread.start()
 
     def stop(self):
         """Stops the hook from running."""
         if self._running:
             self._running = False
+            if user32 is None:
+                return
             user32.PostThreadMessageW(self._listen_thread.ident, WM_QUIT, 0, 0)
             self._listen_thread.join()
             # Recreate thread so we can launch it again
@@ -210,6 +210,14 @@ class GremlinUi(QtWidgets.QMainWindow):
             lambda: self._remove_modal_window("device_information")
         )
 
+    def latency_statistics(self):
+        """Opens the latency statistics window."""
+        self.modal_windows["latency"] = gremlin.ui.dialogs.LatencyUi()
+        self.modal_windows["latency"].show()
+        self.modal_windows["latency"].closed.connect(
+            lambda: self._remove_modal_window("latency")
+        )
+
     def log_window(self):
         """Opens the log display window."""
         self.modal_windows["log"] = gremlin.ui.dialogs.LogWindowUi()
@@ -532,6 +540,9 @@ class GremlinUi(QtWidgets.QMainWindow):
         self.ui.actionInputRepeater.triggered.connect(self.input_repeater)
         self.ui.actionCalibration.triggered.connect(self.calibration)
         self.ui.actionInputViewer.triggered.connect(self.input_viewer)
+        self.ui.actionLatencyStatistics.triggered.connect(
+            self.latency_statistics
+        )
         self.ui.actionPDFCheatsheet.triggered.connect(
             lambda: self._create_cheatsheet()
         )
@@ -1142,14 +1153,14 @@ class GremlinUi(QtWidgets.QMainWindow):
         """
         el = gremlin.event_handler.EventListener()
         if is_enabled:
-            el.joystick_event.connect(
+            el.joystick_ui_event.connect(
                 self._joystick_input_selection
             )
         else:
             # Try to disconnect the handler and if it's not there ignore
             # the exception raised by QT
             try:
-                el.joystick_event.disconnect(self._joystick_input_selection)
+                el.joystick_ui_event.disconnect(self._joystick_input_selection)
             except TypeError:
                 pass
 
@@ -1249,6 +1260,19 @@ if __name__ == "__main__":
         help="Start Joystick Gremlin minimized",
         action="store_true"
     )
+    parser.add_argument(
+        "--record-trace",
+        help="Path to a file to which all raw joystick events are recorded",
+    )
+    parser.add_argument(
+        "--replay-trace",
+        help="Path to a recorded trace to replay once launched",
+    )
+    parser.add_argument(
+        "--replay-fast",
+        help="Replay the trace as fast as possible instead of in real time",
+        action="store_true"
+    )
     args = parser.parse_args()
 
     # Path manging to ensure Gremlin starts independent of the CWD
@@ -1348,6 +1372,15 @@ if __name__ == "__main__":
         ui.activate(True)
     if args.start_minimized:
         ui.setHidden(True)
+    if args.record_trace is not None:
+        gremlin.event_handler.EventListener().start_trace_recording(
+            args.record_trace
+        )
+    if args.replay_trace is not None and os.path.isfile(args.replay_trace):
+        gremlin.event_handler.EventListener().start_trace_replay(
+            args.replay_trace,
+            not args.replay_fast
+        )
 
     # Run UI
     syslog.info("Gremlin UI launching")
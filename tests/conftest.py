@@ -0,0 +1,131 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test configuration running Joystick Gremlin on the fake backends.
+
+The backend is selected via environment variables, which have to be set
+before any gremlin, dill, or vjoy module is imported.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["GREMLIN_BACKEND"] = "fake"
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["userprofile"] = tempfile.mkdtemp(prefix="gremlin_test_")
+os.makedirs(os.path.join(os.environ["userprofile"], "Joystick Gremlin"))
+
+# Resources are located relative to the started script, which normally is
+# joystick_gremlin.py in the repository root
+sys.argv[0] = os.path.join(root_path, "joystick_gremlin.py")
+sys.path.insert(0, root_path)
+
+from PyQt5 import QtCore
+
+# Application processing queued signals, kept alive for the whole session
+qt_application = QtCore.QCoreApplication([])
+
+import gremlin
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    """Returns the Qt application processing queued signals."""
+    return qt_application
+
+
+@pytest.fixture(scope="session")
+def fake_dill():
+    """Returns the fake DILL library."""
+    import dill
+    return dill.DILL._dll
+
+
+@pytest.fixture(scope="session")
+def fake_vjoy():
+    """Returns the fake vJoy interface library."""
+    from vjoy.vjoy_interface import VJoyInterface
+    return VJoyInterface.vjoy_dll
+
+
+@pytest.fixture
+def deferred_calls(qt_app):
+    """Runs deferred calls on the Qt event loop, as the code runner does."""
+    handler = gremlin.event_handler.EventHandler()
+    handler.deferred_call.connect(
+        handler.run_deferred,
+        QtCore.Qt.QueuedConnection
+    )
+    yield qt_app
+    handler.deferred_call.disconnect(handler.run_deferred)
+
+
+@pytest.fixture(scope="session")
+def event_listener(fake_dill):
+    """Returns the event listener once it receives DILL events."""
+    import dill
+    listener = gremlin.event_handler.EventListener()
+    # The listener registers its callback from its own thread
+    deadline = time.perf_counter() + 5.0
+    while dill.DILL.input_event_callback_fn is None:
+        assert time.perf_counter() < deadline
+        time.sleep(0.01)
+    return listener
+
+
+def pytest_addoption(parser):
+    """Adds the option enabling benchmarks."""
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run benchmarks measuring wall-clock time"
+    )
+
+
+def pytest_configure(config):
+    """Registers the benchmark marker."""
+    config.addinivalue_line(
+        "markers",
+        "benchmark: measures wall-clock time, only run with --benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skips benchmarks unless they have been requested."""
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Stops the event listener thread, which otherwise keeps running."""
+    listener = gremlin.event_handler.EventListener()
+    # Devices added by tests trigger a delayed device list update
+    if listener._device_update_timer is not None:
+        listener._device_update_timer.join()
+    listener.terminate()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+import pytest
+from PyQt5 import QtCore
+
+from gremlin import event_handler
+
+
+@pytest.fixture
+def emitted(deferred_calls):
+    """Returns an event set once a deferred call has been emitted."""
+    emitted = threading.Event()
+
+    def set_emitted(callback):
+        emitted.set()
+
+    handler = event_handler.EventHandler()
+    handler.deferred_call.connect(set_emitted, QtCore.Qt.DirectConnection)
+    yield emitted
+    handler.deferred_call.disconnect(set_emitted)
+
+
+def test_deferred_call_runs(deferred_calls, emitted):
+    calls = []
+    call = event_handler.EventHandler().call_later(
+        0.0,
+        lambda: calls.append(1)
+    )
+
+    assert emitted.wait(1.0)
+    assert call.is_pending
+    deferred_calls.processEvents()
+    assert calls == [1]
+    assert not call.is_pending
+
+
+def test_cancel_after_emit_prevents_call(deferred_calls, emitted):
+    calls = []
+    call = event_handler.EventHandler().call_later(
+        0.0,
+        lambda: calls.append(1)
+    )
+
+    # The call has been handed to the event processing thread but not run
+    assert emitted.wait(1.0)
+    assert call.is_pending
+    call.cancel()
+    assert not call.is_pending
+
+    deferred_calls.processEvents()
+    assert calls == []
+    assert not call.is_pending
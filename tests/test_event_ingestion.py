@@ -0,0 +1,211 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import gc
+import os
+import statistics
+import tracemalloc
+
+from PyQt5 import QtCore
+
+import dill
+from gremlin import common, joystick_handling
+
+
+# Bytes the ingestion of an axis event may allocate, including objects
+# freed again before the next event: the Event and dill InputEvent, their
+# values, and ctypes views of the event data. One more object per event
+# exceeds it.
+max_bytes_per_axis_event = 576
+
+# Allowance per event for objects created by unrelated threads while
+# measuring, far below a single object per event
+object_noise = 0.1
+
+# Traces of the code ingesting events
+ingestion_filters = [
+    tracemalloc.Filter(True, os.path.join("*", "dill", "*")),
+    tracemalloc.Filter(True, os.path.join("*", "gremlin", "*"))
+]
+
+
+def _axis_data(guid):
+    """Returns DILL event data of an axis of the given device.
+
+    :param guid GUID of the device the event originates from
+    :return joystick input data of the device's first axis
+    """
+    data = dill._JoystickInputData()
+    data.device_guid = guid.ctypes
+    data.input_type = 1
+    data.input_index = 1
+    return data
+
+
+def _ingestion_allocations(listener, data, count):
+    """Returns the memory and objects allocated by ingesting axis events.
+
+    The events are passed directly to the listener's DILL callback, such
+    that only the ingestion itself is measured. Memory is traced for each
+    event individually, the peak captures objects which are allocated and
+    freed again while the event is being ingested. Objects tracked by the
+    garbage collector, which trigger its collections, are counted while
+    collections are disabled.
+
+    :param listener the event listener ingesting the events
+    :param data joystick input data to ingest with varying values
+    :param count number of events to ingest
+    :return median of the bytes allocated while ingesting an event, number
+        of garbage collected objects created, and number of memory blocks
+        allocated by the ingestion code which are still alive afterwards
+    """
+    # Preallocated such that storing measurements does not allocate memory
+    allocated = array.array("q", bytes(8 * count))
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before_snapshot = tracemalloc.take_snapshot()
+        start_objects = gc.get_count()[0]
+        for i in range(count):
+            data.value = 1000 + i * 17
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            listener._joystick_event_handler(data)
+            allocated[i] = tracemalloc.get_traced_memory()[1] - before
+        objects = gc.get_count()[0] - start_objects
+        after_snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    retained = sum(
+        stat.count_diff for stat in
+        after_snapshot.filter_traces(ingestion_filters).compare_to(
+            before_snapshot.filter_traces(ingestion_filters),
+            "filename"
+        )
+    )
+    # The median discards allocations of unrelated threads
+    return statistics.median(allocated), objects, retained
+
+
+def test_guid_is_shared_per_device(fake_dill):
+    guid = fake_dill.add_device("Shared GUID", 2, 2, 0)
+    data_a = dill._JoystickInputData()
+    data_a.device_guid = guid.ctypes
+    data_a.input_type = 1
+    data_b = dill._JoystickInputData()
+    data_b.device_guid = guid.ctypes
+    data_b.input_type = 1
+
+    assert dill.InputEvent(data_a).device_guid is \
+        dill.InputEvent(data_b).device_guid
+    assert dill.GUID.from_ctype(guid.ctypes) == guid
+
+
+def test_events_are_converted(fake_dill, event_listener):
+    guid = fake_dill.add_device("Conversion", 2, 2, 1)
+    events = []
+    event_listener.joystick_event.connect(
+        events.append,
+        QtCore.Qt.DirectConnection
+    )
+    try:
+        fake_dill.inject_axis(guid, 1, 32767)
+        fake_dill.inject_button(guid, 2, True)
+        fake_dill.inject_hat(guid, 1, 9000)
+    finally:
+        event_listener.joystick_event.disconnect(events.append)
+
+    assert [evt.event_type for evt in events] == [
+        common.InputType.JoystickAxis,
+        common.InputType.JoystickButton,
+        common.InputType.JoystickHat
+    ]
+    assert all(evt.device_guid is guid for evt in events)
+    assert events[0].raw_value == 32767
+    assert events[0].value == 1.0
+    assert events[1].identifier == 2 and events[1].is_pressed
+    assert events[2].value == (1, 0)
+
+
+def test_input_keys_are_interned_once(fake_dill, event_listener, monkeypatch):
+    guid = fake_dill.add_device("Input keys", 2, 2, 1)
+    registry = joystick_handling.input_key_registry
+    expected = [
+        registry.key(guid, common.InputType.JoystickAxis, 2),
+        registry.key(guid, common.InputType.JoystickButton, 1),
+        registry.key(guid, common.InputType.JoystickHat, 1)
+    ]
+    lookups = []
+    registry_key = registry.key
+
+    def counting_key(*args):
+        lookups.append(args)
+        return registry_key(*args)
+
+    monkeypatch.setattr(registry, "key", counting_key)
+    events = []
+    event_listener.joystick_event.connect(
+        events.append,
+        QtCore.Qt.DirectConnection
+    )
+    try:
+        for value in (100, 200):
+            fake_dill.inject_axis(guid, 2, value)
+            fake_dill.inject_button(guid, 1, value == 100)
+            fake_dill.inject_hat(guid, 1, 9000)
+        clone = events[0].clone()
+    finally:
+        event_listener.joystick_event.disconnect(events.append)
+
+    assert [evt.key for evt in events] == expected * 2
+    assert clone.key == expected[0]
+    # Each input is looked up when it is first seen only
+    assert len(lookups) == 3
+
+
+def test_ingestion_allocations_are_bounded(fake_dill, event_listener):
+    guid = fake_dill.add_device("Allocations", 2, 2, 0)
+    data = _axis_data(guid)
+    count = 2000
+    # Warm up lookup tables and caches
+    _ingestion_allocations(event_listener, data, 100)
+
+    # Events which are kept alive are the only objects left behind
+    events = []
+    event_listener.joystick_event.connect(
+        events.append,
+        QtCore.Qt.DirectConnection
+    )
+    try:
+        allocated, objects, _ = \
+            _ingestion_allocations(event_listener, data, count)
+    finally:
+        event_listener.joystick_event.disconnect(events.append)
+    assert len(events) == count
+    assert allocated < max_bytes_per_axis_event
+    assert objects < count * (1 + object_noise)
+
+    # Events nobody keeps must not leave anything behind
+    events = None
+    allocated, objects, retained = \
+        _ingestion_allocations(event_listener, data, count)
+    assert allocated < max_bytes_per_axis_event
+    assert objects < count * object_noise
+    assert retained < count * object_noise
@@ -0,0 +1,166 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+import random
+import time
+
+import pytest
+
+from gremlin import execution_graph
+
+
+class RecordingFunctor:
+
+    """Functor recording its invocations and returning preset results."""
+
+    def __init__(self, name, log, results):
+        """Creates a new instance.
+
+        :param name name recorded for each invocation
+        :param log list the invocations are recorded in
+        :param results iterator providing the result of each invocation
+        """
+        self.name = name
+        self.log = log
+        self.results = results
+
+    def process_event(self, event, value):
+        self.log.append(self.name)
+        return next(self.results)
+
+
+class SyntheticExecutionGraph(execution_graph.AbstractExecutionGraph):
+
+    """Execution graph built from a node sequence and node results."""
+
+    def _build_graph(self, instance):
+        sequence, log, results = instance
+        for i, node_type in enumerate(sequence):
+            self.functors.append(
+                RecordingFunctor(i, log, iter(results[i]))
+            )
+        self._create_transitions(sequence)
+
+
+class NullLog:
+
+    """Log discarding all entries."""
+
+    def append(self, entry):
+        pass
+
+
+def _deep_sequence(blocks, conditions_per_block):
+    """Returns the node sequence of a deep action set.
+
+    :param blocks number of actions
+    :param conditions_per_block number of conditions guarding each action
+    :return list of node types
+    """
+    block = ["Condition"] * conditions_per_block + ["Action"]
+    return block * blocks
+
+
+def _create_graphs(sequence, results):
+    """Creates a compiled and an interpreted graph of the same structure.
+
+    :param sequence the node sequence of the graphs
+    :param results list of the results of each node for each event
+    :return (compiled graph, compiled log, interpreted graph,
+        interpreted log) tuple
+    """
+    compiled_log = []
+    compiled = SyntheticExecutionGraph((sequence, compiled_log, results))
+    interpreted_log = []
+    interpreted = SyntheticExecutionGraph(
+        (sequence, interpreted_log, results)
+    )
+    interpreted._compiled = None
+    assert compiled._compiled is not None
+    return compiled, compiled_log, interpreted, interpreted_log
+
+
+def test_compiled_graph_matches_interpreter():
+    rng = random.Random(42)
+    event_count = 200
+    for blocks, conditions in itertools.product((1, 3, 8), (0, 1, 2)):
+        sequence = _deep_sequence(blocks, conditions)
+        # Conditions pass or fail, actions succeed, fail, or return None
+        # which terminates the graph
+        results = [
+            [
+                rng.choice((True, False)) if node_type == "Condition"
+                else rng.choice((True, True, False, None))
+                for _ in range(event_count)
+            ]
+            for node_type in sequence
+        ]
+        compiled, compiled_log, interpreted, interpreted_log = \
+            _create_graphs(sequence, results)
+
+        # Each node consumes its next result only when it is invoked, so
+        # both graphs see the same results as long as they invoke the same
+        # nodes
+        for _ in range(event_count):
+            compiled_log.append("event")
+            interpreted_log.append("event")
+            compiled.process_event(None, None)
+            interpreted.process_event(None, None)
+
+        assert compiled_log == interpreted_log
+
+
+def _time_graph(graph, event_count, repeats=5):
+    """Returns the best time taken to process the given number of events.
+
+    :param graph the graph to process events with
+    :param event_count number of events to process per run
+    :param repeats number of runs
+    :return shortest run time in seconds
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(event_count):
+            graph.process_event(None, None)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+@pytest.mark.benchmark
+def test_benchmark_deep_action_sets():
+    event_count = 2000
+    for blocks in (4, 16, 64):
+        sequence = _deep_sequence(blocks, 2)
+        results = [itertools.repeat(True)] * len(sequence)
+        compiled = SyntheticExecutionGraph((sequence, NullLog(), results))
+        interpreted = SyntheticExecutionGraph(
+            (sequence, NullLog(), results)
+        )
+        interpreted._compiled = None
+
+        interpreted_time = _time_graph(interpreted, event_count)
+        compiled_time = _time_graph(compiled, event_count)
+        assert compiled_time < interpreted_time, \
+            "{:d} actions: interpreted {:.2f} us, compiled {:.2f} us " \
+            "per event".format(
+                blocks,
+                interpreted_time / event_count * 1e6,
+                compiled_time / event_count * 1e6
+            )
@@ -0,0 +1,217 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import time
+
+import pytest
+
+from gremlin import macro
+
+
+class ScanCountingDict(collections.OrderedDict):
+
+    """Ordered dictionary counting how often its entries are iterated."""
+
+    def __init__(self):
+        """Creates a new, empty, instance."""
+        super().__init__()
+        self.scans = 0
+
+    def __iter__(self):
+        self.scans += 1
+        return super().__iter__()
+
+    def keys(self):
+        self.scans += 1
+        return super().keys()
+
+    def values(self):
+        self.scans += 1
+        return super().values()
+
+    def items(self):
+        self.scans += 1
+        return super().items()
+
+
+class CountingAction(macro.AbstractAction):
+
+    """Action counting how often each macro ran."""
+
+    def __init__(self, macro_id, counts, manager):
+        """Creates a new instance.
+
+        :param macro_id id of the macro the action belongs to
+        :param counts dictionary mapping macro ids to their run count
+        :param manager MacroManager running the macro
+        """
+        self.macro_id = macro_id
+        self.counts = counts
+        self.manager = manager
+        self.active_counts = []
+
+    def __call__(self):
+        self.active_counts.append(len(self.manager._active))
+        self.counts[self.macro_id] = self.counts.get(self.macro_id, 0) + 1
+
+
+def _counting_macro(counts, manager, exclusive=False):
+    """Returns a macro consisting of a single CountingAction.
+
+    :param counts dictionary mapping macro ids to their run count
+    :param manager MacroManager running the macro
+    :param exclusive whether or not the macro runs exclusively
+    :return new macro and its action
+    """
+    new_macro = macro.Macro()
+    action = CountingAction(new_macro.id, counts, manager)
+    new_macro.add_action(action)
+    new_macro.exclusive = exclusive
+    return new_macro, action
+
+
+def _time_queue(macros, repeats=3):
+    """Returns the best time to queue, dispatch, and remove the macros.
+
+    Each macro is queued twice, one instance is dispatched and the remaining
+    one removed by terminating the macro.
+
+    :param macros macros to queue
+    :param repeats number of measurements to take the best one of
+    :return best measured duration in seconds
+    """
+    best = None
+    for _ in range(repeats):
+        queue = macro.MacroQueue()
+        start = time.perf_counter()
+        for entry in macros:
+            queue.push(entry)
+        for entry in macros:
+            queue.push(entry)
+        for entry in macros:
+            queue.pop(entry.id)
+        for entry in macros:
+            queue.remove(entry.id)
+        duration = time.perf_counter() - start
+        assert len(queue) == 0
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def test_queue_dedupes_by_macro_id():
+    macros = [macro.Macro() for _ in range(3)]
+    queue = macro.MacroQueue()
+    for entry in macros + macros[::-1] + macros[:1]:
+        queue.push(entry)
+
+    assert len(queue) == 7
+    assert queue.macros() == macros
+
+    queue.pop(macros[0].id)
+    assert len(queue) == 6
+    assert queue.macros() == macros
+
+    queue.remove(macros[0].id)
+    assert len(queue) == 4
+    assert queue.macros() == macros[1:]
+
+    queue.pop(macros[1].id)
+    queue.pop(macros[1].id)
+    queue.remove(macros[1].id)
+    assert len(queue) == 2
+    assert queue.macros() == macros[2:]
+
+
+def test_queue_operations_do_not_scan():
+    macros = [macro.Macro() for _ in range(5000)]
+    queue = macro.MacroQueue()
+    queue._entries = ScanCountingDict()
+
+    for entry in macros:
+        queue.push(entry)
+    for entry in macros:
+        queue.push(entry)
+    for entry in macros[::2]:
+        queue.pop(entry.id)
+    for entry in macros[1::2]:
+        queue.remove(entry.id)
+    assert queue._entries.scans == 0
+    assert len(queue) == len(macros) // 2
+
+    # Only listing the queued macros visits every entry
+    assert queue.macros() == macros[::2]
+    assert queue._entries.scans == 1
+
+
+@pytest.mark.benchmark
+def test_benchmark_queue_scaling():
+    small = [macro.Macro() for _ in range(1000)]
+    large = [macro.Macro() for _ in range(16000)]
+
+    # Every entry takes four operations
+    small_time = _time_queue(small) / (4 * len(small))
+    large_time = _time_queue(large) / (4 * len(large))
+    # Linear time operations would be sixteen times slower on the large queue
+    assert large_time < 4 * small_time, \
+        "{:d} macros: {:.3f} us, {:d} macros: {:.3f} us per " \
+        "operation".format(
+            len(small), small_time * 1e6, len(large), large_time * 1e6
+        )
+
+
+def test_stress_manager_runs_queued_macros():
+    manager = macro.MacroManager()
+    counts = {}
+    macro_count = 2000
+
+    macros = [_counting_macro(counts, manager) for _ in range(macro_count)]
+    exclusive_macro, exclusive_action = _counting_macro(counts, manager, True)
+
+    # Queue every macro twice and terminate every fourth one before the
+    # scheduler runs, which drops both of its queued instances
+    manager.stop()
+    for entry, _ in macros[:macro_count // 2]:
+        manager.queue_macro(entry)
+    manager.queue_macro(exclusive_macro)
+    for entry, _ in macros[macro_count // 2:]:
+        manager.queue_macro(entry)
+    for entry, _ in macros:
+        manager.queue_macro(entry)
+    terminated = set(entry.id for entry, _ in macros[::4])
+    for entry, _ in macros[::4]:
+        manager.terminate_macro(entry)
+    assert manager.queue_depth == 2 * macro_count + 1
+
+    manager.start()
+    try:
+        expected = sum(
+            0 if entry.id in terminated else 2 for entry, _ in macros
+        ) + 1
+        deadline = time.perf_counter() + 10.0
+        while sum(counts.values()) < expected or manager.queue_depth > 0 \
+                or len(manager._active) > 0:
+            assert time.perf_counter() < deadline
+            time.sleep(0.01)
+    finally:
+        manager.stop()
+
+    for entry, _ in macros:
+        assert counts.get(entry.id, 0) == \
+            (0 if entry.id in terminated else 2)
+    # The exclusive macro ran on its own
+    assert exclusive_action.active_counts == [1]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import pytest
+
+from gremlin import common, macro, sendinput
+
+
+@pytest.fixture
+def recorder():
+    """Records injected inputs, restoring the previous backend afterwards."""
+    previous = sendinput.backend()
+    backend = sendinput.RecordingBackend()
+    sendinput.set_backend(backend)
+    yield backend
+    sendinput.set_backend(previous)
+
+
+def _describe(inputs):
+    """Returns comparable tuples describing the given INPUT structures.
+
+    :param inputs sequence of INPUT structures
+    :return list of (type, ...) tuples holding the relevant fields
+    """
+    result = []
+    for entry in inputs:
+        if entry.type == sendinput.INPUT_KEYBOARD:
+            result.append((
+                "key",
+                entry.union.ki.wVk,
+                entry.union.ki.wScan,
+                entry.union.ki.dwFlags
+            ))
+        else:
+            result.append((
+                "mouse",
+                entry.union.mi.dx,
+                entry.union.mi.dy,
+                entry.union.mi.mouseData & 0xFFFFFFFF,
+                entry.union.mi.dwFlags
+            ))
+    return result
+
+
+def _key(name, is_pressed):
+    """Returns the description of a key event.
+
+    :param name name of the key
+    :param is_pressed True if the key is pressed, False if it is released
+    :return tuple describing the key event
+    """
+    key = macro.key_from_name(name)
+    flags = sendinput.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
+    if not is_pressed:
+        flags |= sendinput.KEYEVENTF_KEYUP
+    return ("key", key.virtual_code, key.scan_code, flags)
+
+
+def _shortcut_macro():
+    """Returns a macro pressing shift+F1, moving the mouse, and after a
+    pause tapping delete and scrolling the wheel.
+
+    :return new macro
+    """
+    shortcut = macro.Macro()
+    shortcut.press("leftshift")
+    shortcut.tap("f1")
+    shortcut.release("leftshift")
+    shortcut.add_action(macro.MouseMotionAction(5, -3))
+    shortcut.pause(0.02)
+    shortcut.tap("delete")
+    shortcut.add_action(
+        macro.MouseButtonAction(common.MouseButton.WheelDown, True)
+    )
+    return shortcut
+
+
+expected_batches = [
+    [
+        _key("leftshift", True),
+        _key("f1", True),
+        _key("f1", False),
+        _key("leftshift", False),
+        ("mouse", 5, -3, 0, sendinput.MOUSEEVENTF_MOVE),
+    ],
+    [
+        _key("delete", True),
+        _key("delete", False),
+        (
+            "mouse", 0, 0,
+            -sendinput.WHEEL_DELTA & 0xFFFFFFFF,
+            sendinput.MOUSEEVENTF_WHEEL
+        ),
+    ],
+]
+
+
+def test_timeline_batches_simultaneous_actions(recorder):
+    timeline = _shortcut_macro().timeline(0.0)
+
+    assert [offset for offset, _ in timeline.steps] == [0.0, 0.02]
+    assert timeline.duration == pytest.approx(0.02)
+    for _, operations in timeline.steps:
+        assert len(operations) == 1
+        for operation in operations:
+            operation()
+
+    assert [_describe(batch) for batch in recorder.batches] == \
+        expected_batches
+
+
+def test_timeline_separates_delayed_actions(recorder):
+    timeline = _shortcut_macro().timeline(0.01)
+
+    assert [offset for offset, _ in timeline.steps] == \
+        pytest.approx([0.0, 0.01, 0.02, 0.03, 0.04, 0.06, 0.07, 0.08])
+    for _, operations in timeline.steps:
+        for operation in operations:
+            operation()
+
+    assert [_describe(batch) for batch in recorder.batches] == \
+        [[entry] for batch in expected_batches for entry in batch]
+
+
+def test_manager_injects_batches(recorder):
+    manager = macro.MacroManager()
+    default_delay = manager.default_delay
+    manager.default_delay = 0.0
+    manager.start()
+    try:
+        manager.queue_macro(_shortcut_macro())
+        deadline = time.perf_counter() + 5.0
+        while len(recorder.batches) < len(expected_batches):
+            assert time.perf_counter() < deadline
+            time.sleep(0.01)
+    finally:
+        manager.stop()
+        manager.default_delay = default_delay
+
+    assert [_describe(batch) for batch in recorder.batches] == \
+        expected_batches
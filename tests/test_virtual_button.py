@@ -0,0 +1,243 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import pytest
+from PyQt5 import QtCore
+
+from gremlin import actions, base_classes, common, event_handler, \
+    execution_graph
+
+
+# Upper bound in seconds on processing a single event, well below the
+# 50 ms delay of the forced activation follow-up
+max_dispatch_latency = 0.01
+
+
+class GraphAxisButton(actions.AxisButton):
+
+    """Axis button usable as a node of an execution graph."""
+
+    def process_event(self, event, value):
+        return super().process_event(event)
+
+
+class RecordingAction:
+
+    """Action recording the times at which it is executed."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.times = []
+
+    def process_event(self, event, value):
+        self.times.append(time.perf_counter())
+        return True
+
+
+class AxisButtonGraph(execution_graph.AbstractExecutionGraph):
+
+    """Execution graph running an action after an axis button."""
+
+    def _build_graph(self, instance):
+        self.functors = list(instance)
+        self._create_transitions(["Action"] * len(self.functors))
+
+
+@pytest.fixture
+def virtual_events(event_listener):
+    """Returns the list of emitted virtual button events."""
+    events = []
+    event_listener.virtual_event.connect(
+        events.append,
+        QtCore.Qt.DirectConnection
+    )
+    yield events
+    event_listener.virtual_event.disconnect(events.append)
+
+
+def _axis_event(device_guid, value):
+    """Returns an axis event with the given value.
+
+    :param device_guid GUID of the device the event originates from
+    :param value the value of the axis
+    :return axis event
+    """
+    return event_handler.Event(
+        common.InputType.JoystickAxis,
+        1,
+        device_guid=device_guid,
+        value=value,
+        raw_value=int(value * 32767),
+        timestamp=time.perf_counter()
+    )
+
+
+def _button_event(device_guid):
+    """Returns a button press event.
+
+    :param device_guid GUID of the device the event originates from
+    :return button event
+    """
+    return event_handler.Event(
+        common.InputType.JoystickButton,
+        1,
+        device_guid=device_guid,
+        is_pressed=True,
+        timestamp=time.perf_counter()
+    )
+
+
+def _wait_until(predicate, timeout=1.0):
+    """Waits until the predicate holds or time runs out.
+
+    :param predicate function returning True once done
+    :param timeout maximum time in seconds to wait
+    :return True if the predicate holds, False otherwise
+    """
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    return predicate()
+
+
+def _process_events_until(app, predicate, timeout=1.0):
+    """Processes Qt events until the predicate holds or time runs out.
+
+    :param app the Qt application
+    :param predicate function returning True once done
+    :param timeout maximum time in seconds to wait
+    :return True if the predicate holds, False otherwise
+    """
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
+
+
+def test_sweep_does_not_stall_unrelated_inputs(fake_dill, virtual_events):
+    guid = fake_dill.add_device("Sweep", 2, 2, 0)
+    process = execution_graph.VirtualButtonProcess(
+        base_classes.VirtualAxisButton(-0.1, 0.1)
+    )
+
+    # Axis events go to the virtual button, the delay until button events
+    # of the same device are processed is recorded
+    latencies = []
+
+    def handle(event):
+        if event.event_type == common.InputType.JoystickAxis:
+            process(event)
+        else:
+            latencies.append(time.perf_counter() - event.timestamp)
+
+    # Deferred calls run on the dispatch thread, as the code runner does
+    # when the dispatch thread is enabled
+    dispatcher = event_handler.EventDispatcher(handle, lambda event: None)
+    handler = event_handler.EventHandler()
+    handler.deferred_call.connect(dispatcher.call, QtCore.Qt.DirectConnection)
+    dispatcher.start()
+    try:
+        # Sweep the axis across the button's range faster than events
+        # report positions within it, each jump forcing a press
+        dispatcher.push(_axis_event(guid, -1.0))
+        for i in range(20):
+            dispatcher.push(_axis_event(guid, 1.0 if i % 2 == 0 else -1.0))
+            dispatcher.push(_button_event(guid))
+
+        # Only the follow-up of the last event is run, releasing the button
+        assert _wait_until(lambda: len(latencies) == 20)
+        assert _wait_until(lambda: len(virtual_events) == 2)
+    finally:
+        handler.deferred_call.disconnect(dispatcher.call)
+        dispatcher.stop()
+
+    assert max(latencies) < max_dispatch_latency
+    assert [evt.is_pressed for evt in virtual_events] == [True, False]
+
+
+def test_followup_runs_after_delay(deferred_calls, virtual_events):
+    process = execution_graph.VirtualButtonProcess(
+        base_classes.VirtualAxisButton(-0.1, 0.1)
+    )
+
+    process(_axis_event(None, -1.0))
+    start = time.perf_counter()
+    process(_axis_event(None, 1.0))
+    assert time.perf_counter() - start < max_dispatch_latency
+    assert process.virtual_button.is_pressed
+
+    # The follow-up is delivered through the Qt event loop
+    assert _process_events_until(
+        deferred_calls,
+        lambda: not process.virtual_button.is_pressed
+    )
+    assert time.perf_counter() - start >= 0.05
+    assert [evt.is_pressed for evt in virtual_events] == [True, False]
+
+
+def test_graph_followup_runs_after_delay(deferred_calls, virtual_events):
+    button = GraphAxisButton(
+        -0.1,
+        0.1,
+        common.AxisButtonDirection.Anywhere
+    )
+    action = RecordingAction()
+    graph = AxisButtonGraph([button, action])
+    assert graph._compiled is None
+
+    graph.process_event(_axis_event(None, -1.0), None)
+    start = time.perf_counter()
+    graph.process_event(_axis_event(None, 1.0), None)
+    assert time.perf_counter() - start < max_dispatch_latency
+    assert button.is_pressed
+    assert len(action.times) == 2
+
+    # The interpreter runs the whole graph again once the delay has passed
+    assert _process_events_until(
+        deferred_calls,
+        lambda: not button.is_pressed
+    )
+    assert len(action.times) == 3
+    assert action.times[2] - start >= 0.05
+    assert [evt.is_pressed for evt in virtual_events] == [True, False]
+
+
+def test_graph_followup_skipped_after_newer_event(
+        deferred_calls,
+        virtual_events
+):
+    button = GraphAxisButton(
+        -0.1,
+        0.1,
+        common.AxisButtonDirection.Anywhere
+    )
+    action = RecordingAction()
+    graph = AxisButtonGraph([button, action])
+
+    graph.process_event(_axis_event(None, -1.0), None)
+    graph.process_event(_axis_event(None, 1.0), None)
+    # A newer event releases the button and supersedes the follow-up
+    graph.process_event(_axis_event(None, 0.5), None)
+    assert not button.is_pressed
+
+    time.sleep(0.1)
+    deferred_calls.processEvents()
+    assert len(action.times) == 3
+    assert [evt.is_pressed for evt in virtual_events] == [True, False]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+from vjoy import vjoy
+
+
+class RecordingDevice:
+
+    """Device recording the threads it is maintained on."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.threads = []
+
+    def maintain(self):
+        self.threads.append(threading.current_thread())
+
+
+def test_maintenance_runs_on_event_thread(deferred_calls, monkeypatch):
+    monkeypatch.setattr(vjoy.Housekeeping, "interval", 0.01)
+    device = RecordingDevice()
+    vjoy.housekeeping.register(device)
+    try:
+        deadline = time.perf_counter() + 1.0
+        while len(device.threads) < 2 and time.perf_counter() < deadline:
+            deferred_calls.processEvents()
+            time.sleep(0.001)
+    finally:
+        vjoy.housekeeping.unregister(device)
+
+    assert len(device.threads) >= 2
+    assert all(
+        thread is threading.current_thread() for thread in device.threads
+    )
@@ -0,0 +1,281 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2019 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Pure Python stand-in for the vJoy interface library.
+
+The fake library exposes the same functions as the dll and is used in place
+of it when the GREMLIN_BACKEND environment variable is set to "fake". Every
+write to an axis, button, or hat is recorded in memory.
+"""
+
+import os
+import threading
+import time
+
+
+class FakeVJoyDevice:
+
+    """State of a single fake vJoy device."""
+
+    def __init__(self, axis_ids, button_count, hat_count):
+        """Creates a new device.
+
+        :param axis_ids the vJoy usage ids of the axes present on the device
+        :param button_count number of buttons
+        :param hat_count number of continuous hats
+        """
+        self.axis_ids = set(axis_ids)
+        self.button_count = button_count
+        self.hat_count = hat_count
+        self.owner_pid = 0
+        self.reset()
+
+    def reset(self):
+        """Resets all inputs to their default values."""
+        self.axes = {aid: 16384 for aid in self.axis_ids}
+        self.buttons = {bid: False for bid in range(1, self.button_count+1)}
+        self.hats = {hid: -1 for hid in range(1, self.hat_count+1)}
+
+
+class FakeVJoyInterface:
+
+    """Implementation of the vJoy interface API backed by in memory devices.
+
+    Writes are recorded as (timestamp, vjoy_id, input_type, index, value)
+    tuples, with input_type being one of "axis", "button", or "hat". Full
+    position updates are recorded with an input_type of "position", no
+    index, and the resulting state of all inputs as the value.
+    """
+
+    # vJoy usage ids of the X, Y, Z, RX, RY, RZ, SL0, and SL1 axes
+    default_axis_ids = (0x30, 0x31, 0x32, 0x33, 0x34, 0x35, 0x36, 0x37)
+
+    # Maximum raw value of an axis
+    axis_maximum = 32767
+
+    def __init__(self):
+        """Creates a new instance without any devices."""
+        self.devices = {}
+        self.writes = []
+        self._lock = threading.Lock()
+
+    # Control functions
+
+    def add_device(
+            self,
+            vjoy_id,
+            axis_count=8,
+            button_count=32,
+            hat_count=0
+    ):
+        """Adds a new device.
+
+        :param vjoy_id id of the new device
+        :param axis_count number of axes, the first axis_count default axes
+            are present on the device
+        :param button_count number of buttons
+        :param hat_count number of continuous hats
+        """
+        self.devices[vjoy_id] = FakeVJoyDevice(
+            FakeVJoyInterface.default_axis_ids[:axis_count],
+            button_count,
+            hat_count
+        )
+
+    def clear_writes(self):
+        """Removes all recorded writes."""
+        with self._lock:
+            self.writes = []
+
+    def _record(self, vjoy_id, input_type, index, value):
+        """Records a single write.
+
+        :param vjoy_id id of the device written to
+        :param input_type the type of input written to
+        :param index the index of the input written to
+        :param value the value written
+        """
+        with self._lock:
+            self.writes.append(
+                (time.perf_counter(), vjoy_id, input_type, index, value)
+            )
+
+    def _owned(self, vjoy_id):
+        """Returns the device if it is owned by this process.
+
+        :param vjoy_id id of the device
+        :return device object or None if the device is not owned
+        """
+        device = self.devices.get(vjoy_id)
+        if device is None or device.owner_pid != os.getpid():
+            return None
+        return device
+
+    # General vJoy information
+
+    def GetvJoyVersion(self):
+        return 0x218
+
+    def vJoyEnabled(self):
+        return True
+
+    def GetvJoyProductString(self):
+        return "vJoy - Virtual Joystick"
+
+    def GetvJoyManufacturerString(self):
+        return "Fake"
+
+    def GetvJoySerialNumberString(self):
+        return "0"
+
+    # Device properties
+
+    def GetVJDButtonNumber(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        return device.button_count if device else 0
+
+    def GetVJDDiscPovNumber(self, vjoy_id):
+        return 0
+
+    def GetVJDContPovNumber(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        return device.hat_count if device else 0
+
+    def GetVJDAxisExist(self, vjoy_id, axis_id):
+        device = self.devices.get(vjoy_id)
+        return 1 if device and axis_id in device.axis_ids else 0
+
+    def GetVJDAxisMax(self, vjoy_id, axis_id, value_ref):
+        value_ref._obj.value = FakeVJoyInterface.axis_maximum
+        return self.GetVJDAxisExist(vjoy_id, axis_id) > 0
+
+    def GetVJDAxisMin(self, vjoy_id, axis_id, value_ref):
+        value_ref._obj.value = 0
+        return self.GetVJDAxisExist(vjoy_id, axis_id) > 0
+
+    # Device management
+
+    def GetOwnerPid(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        return device.owner_pid if device else 0
+
+    def AcquireVJD(self, vjoy_id):
+        device = self.devices.get(vjoy_id)
+        if device is None or device.owner_pid not in (0, os.getpid()):
+            return False
+        device.owner_pid = os.getpid()
+        return True
+
+    def RelinquishVJD(self, vjoy_id):
+        device = self._owned(vjoy_id)
+        if device is not None:
+            device.owner_pid = 0
+
+    def UpdateVJD(self, vjoy_id, data):
+        device = self._owned(vjoy_id)
+        if device is None:
+            return False
+
+        # Data is passed as a reference to a JoystickPosition structure
+        position = getattr(data, "_obj", data)
+        for axis_id in device.axis_ids:
+            device.axes[axis_id] = getattr(
+                position,
+                position.axis_fields[axis_id]
+            )
+        for button_id in device.buttons:
+            field = position.button_fields[(button_id-1) // 32]
+            device.buttons[button_id] = \
+                getattr(position, field) & (1 << ((button_id-1) % 32)) != 0
+        for hat_id in device.hats:
+            value = getattr(position, position.hat_fields[hat_id-1])
+            device.hats[hat_id] = -1 if value == 0xFFFFFFFF else value
+
+        self._record(vjoy_id, "position", None, {
+            "axes": dict(device.axes),
+            "buttons": dict(device.buttons),
+            "hats": dict(device.hats)
+        })
+        return True
+
+    def GetVJDStatus(self, vjoy_id):
+        # Values correspond to the VJoyState enum
+        device = self.devices.get(vjoy_id)
+        if device is None:
+            return 3
+        elif device.owner_pid == 0:
+            return 1
+        elif device.owner_pid == os.getpid():
+            return 0
+        else:
+            return 2
+
+    # Reset functions
+
+    def ResetVJD(self, vjoy_id):
+        device = self._owned(vjoy_id)
+        if device is None:
+            return False
+        device.reset()
+        return True
+
+    def ResetAll(self):
+        for device in self.devices.values():
+            device.reset()
+
+    def ResetButtons(self, vjoy_id):
+        device = self._owned(vjoy_id)
+        if device is None:
+            return False
+        device.buttons = {bid: False for bid in device.buttons}
+        return True
+
+    def ResetPovs(self, vjoy_id):
+        device = self._owned(vjoy_id)
+        if device is None:
+            return False
+        device.hats = {hid: -1 for hid in device.hats}
+        return True
+
+    # Set values
+
+    def SetAxis(self, value, vjoy_id, axis_id):
+        device = self._owned(vjoy_id)
+        if device is None or axis_id not in device.axis_ids:
+            return False
+        device.axes[axis_id] = value
+        self._record(vjoy_id, "axis", axis_id, value)
+        return True
+
+    def SetBtn(self, value, vjoy_id, button_id):
+        device = self._owned(vjoy_id)
+        if device is None or button_id not in device.buttons:
+            return False
+        device.buttons[button_id] = bool(value)
+        self._record(vjoy_id, "button", button_id, bool(value))
+        return True
+
+    def SetDiscPov(self, value, vjoy_id, hat_id):
+        return False
+
+    def SetContPov(self, value, vjoy_id, hat_id):
+        device = self._owned(vjoy_id)
+        if device is None or hat_id not in device.hats:
+            return False
+        device.hats[hat_id] = value
+        self._record(vjoy_id, "hat", hat_id, value)
+        return True
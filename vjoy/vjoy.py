@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import array
 import ctypes
 import enum
 import logging
@@ -23,9 +24,12 @@ import threading
 import time
 import os
 
-from vjoy.vjoy_interface import VJoyState, VJoyInterface
+from vjoy.vjoy_interface import JoystickPosition, VJoyState, VJoyInterface
 from gremlin.error import VJoyError
 import gremlin.common
+import gremlin.event_handler
+import gremlin.latency
+import gremlin.scheduler
 import gremlin.spline
 
 
@@ -40,6 +44,155 @@ def _error_string(vid, iid, value):
     return "vjoy: {} input: {} value: {}".format(vid, iid, value)
 
 
+class _BatchState(threading.local):
+
+    """Per thread state of the write combining batches."""
+
+    def __init__(self):
+        self.depth = 0
+        self.devices = []
+
+
+class WriteCombiner:
+
+    """Combines the writes made to vJoy devices into full position updates.
+
+    Writes performed while a batch is open on the calling thread only update
+    the position report of the device and mark it as modified. Once the
+    outermost batch ends every modified device is sent to the driver with a
+    single UpdateVJD call. Writes made outside of a batch, or while write
+    combining is disabled, are sent to the driver immediately.
+    """
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.enabled = True
+        self._state = _BatchState()
+
+    def begin(self):
+        """Opens a batch on the calling thread, batches can be nested."""
+        self._state.depth += 1
+
+    def end(self):
+        """Closes a batch and sends all modified devices to the driver.
+
+        Devices are only sent once the outermost batch is closed.
+        """
+        state = self._state
+        state.depth -= 1
+        if state.depth > 0 or not state.devices:
+            return
+
+        devices = state.devices
+        state.devices = []
+        failed = None
+        for device in devices:
+            try:
+                device.flush()
+            except VJoyError as e:
+                failed = e
+        if failed is not None:
+            raise failed
+
+    def defer(self, device):
+        """Defers sending a modified device until the current batch ends.
+
+        :param device the VJoy device that has been modified
+        :return True if sending is deferred, False if the modification has
+            to be sent immediately
+        """
+        state = self._state
+        if not self.enabled or state.depth == 0:
+            return False
+        if device not in state.devices:
+            state.devices.append(device)
+        return True
+
+
+# Write combining shared by all vJoy devices
+write_combiner = WriteCombiner()
+
+
+class Housekeeping:
+
+    """Performs the periodic maintenance of all acquired vJoy devices.
+
+    A single periodic call on the shared scheduler checks the ownership of
+    every registered device and keeps idle devices alive, instead of each
+    device running its own timer. As maintenance calls the driver and may
+    reset devices, the scheduler only hands it to the event processing
+    thread which performs all other vJoy writes.
+    """
+
+    # Time in seconds between two maintenance runs
+    interval = 5.0
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._devices = []
+        self._lock = threading.Lock()
+        self._call = None
+
+    def register(self, device):
+        """Adds a device to be maintained.
+
+        :param device the VJoy device to maintain
+        """
+        with self._lock:
+            if device not in self._devices:
+                self._devices.append(device)
+            if self._call is None:
+                self._call = gremlin.scheduler.scheduler.schedule(
+                    Housekeeping.interval,
+                    self._run
+                )
+
+    def unregister(self, device):
+        """Removes a device from maintenance.
+
+        :param device the VJoy device to no longer maintain
+        """
+        with self._lock:
+            if device in self._devices:
+                self._devices.remove(device)
+            if not self._devices and self._call is not None:
+                self._call.cancel()
+                self._call = None
+
+    def _run(self):
+        """Posts maintenance to the event thread and reschedules itself."""
+        gremlin.event_handler.EventHandler().call_later(0.0, self._maintain)
+
+        with self._lock:
+            # A device registered during the run may already have scheduled
+            # the next run
+            if self._call is not None and self._call.is_pending:
+                return
+            if self._devices:
+                self._call = gremlin.scheduler.scheduler.schedule(
+                    Housekeeping.interval,
+                    self._run
+                )
+            else:
+                self._call = None
+
+    def _maintain(self):
+        """Maintains all registered devices."""
+        with self._lock:
+            devices = list(self._devices)
+        for device in devices:
+            try:
+                device.maintain()
+            except VJoyError as e:
+                logging.getLogger("system").error(
+                    "vJoy maintenance failed: {}".format(e)
+                )
+
+
+# Maintenance shared by all vJoy devices
+housekeeping = Housekeeping()
+
+
 class AxisName(enum.Enum):
 
     """Enumeration of the valid axis names."""
@@ -173,8 +326,19 @@ class Axis:
         self._max_value = tmp.value
         self._half_range = int(self._max_value / 2)
 
-        self._deadzone_fn = lambda x: deadzone(x, -1.0, -0.0, 0.0, 1.0)
-        self._response_curve_fn = lambda x: x
+        # Combined deadzone and response curve transfer function, baked
+        # into a table with one entry per axis position
+        self._deadzone = (-1.0, 0.0, 0.0, 1.0)
+        self._spline_type = None
+        self._control_points = None
+        self._table = None
+        self._table_scale = 0.0
+        self.configure(
+            self._deadzone,
+            None,
+            None,
+            _linear_table(self.resolution)
+        )
 
         # If this is not the case our value setter needs to change
         if self._min_value != 0:
@@ -182,20 +346,47 @@ class Axis:
                     _error_string(self.vjoy_id, self.axis_id, self._min_value)
             ))
 
+    @property
+    def resolution(self):
+        """Returns the number of entries of the transfer function table.
+
+        :return number of distinct axis positions, at most 32768
+        """
+        return max(2, min(32768, self._max_value + 1))
+
+    def configure(self, deadzone, spline_type, control_points, table=None):
+        """Sets the deadzone and response curve of the axis.
+
+        :param deadzone the (low, center_low, center_high, high) deadzone
+            limits
+        :param spline_type the type of spline to use, None for a linear
+            response
+        :param control_points the control points defining the spline
+        :param table transfer function table to use, baked from the other
+            parameters if None
+        :return the transfer function table used by the axis
+        """
+        if table is None:
+            table = bake_transfer_table(
+                self.resolution,
+                deadzone,
+                spline_type,
+                control_points
+            )
+        self._deadzone = tuple(deadzone)
+        self._spline_type = spline_type
+        self._control_points = control_points
+        self._table_scale = (len(table) - 1) / 2.0
+        self._table = table
+        return table
+
     def set_response_curve(self, spline_type, control_points):
         """Sets the response curve to use for the axis.
 
         :param spline_type the type of spline to use
         :param control_points the control points defining the spline
         """
-        if spline_type == "cubic-spline":
-            self._response_curve_fn = gremlin.spline.CubicSpline(control_points)
-        elif spline_type == "cubic-bezier-spline":
-            self._response_curve_fn = \
-                gremlin.spline.CubicBezierSpline(control_points)
-        else:
-            logging.getLogger("system").error("Invalid spline type specified")
-            self._response_curve_fn = lambda x: x
+        self.configure(self._deadzone, spline_type, control_points)
 
     def set_deadzone(self, low, center_low, center_high, high):
         """Sets the deadzone for the axis.
@@ -205,8 +396,10 @@ class Axis:
         :param center_high upper center deadzone limit
         :param high high deadzone limit
         """
-        self._deadzone_fn = lambda x: deadzone(
-            x, low, center_low, center_high, high
+        self.configure(
+            (low, center_low, center_high, high),
+            self._spline_type,
+            self._control_points
         )
 
     @property
@@ -224,8 +417,6 @@ class Axis:
 
         :param value the position of the axis in the range [-1, 1]
         """
-        self.vjoy_dev.ensure_ownership()
-
         # Log an error on invalid data but continue processing by clamping
         # the values in the next step
         if 1.0 - abs(value) < -0.001:
@@ -234,16 +425,15 @@ class Axis:
                 " provided value was {:.2f}".format(value)
             )
 
-        # Normalize value to [-1, 1] and apply response curve and deadzone
-        # settings
-        self._value = self._response_curve_fn(
-            self._deadzone_fn(min(1.0, max(-1.0, value)))
-        )
+        # Normalize value to [-1, 1] and look up the result of the response
+        # curve and deadzone settings
+        self._value = self._table[
+            int((min(1.0, max(-1.0, value)) + 1.0) * self._table_scale + 0.5)
+        ]
 
-        if not VJoyInterface.SetAxis(
-                int(self._half_range + self._half_range * self._value),
-                self.vjoy_id,
-                self.axis_id
+        if not self.vjoy_dev.set_axis(
+                self.axis_id,
+                int(self._half_range + self._half_range * self._value)
         ):
             raise VJoyError(
                 "Failed setting axis value - {}".format(
@@ -272,10 +462,9 @@ class Axis:
         # settings
         self._value = value
 
-        if not VJoyInterface.SetAxis(
-                int(self._half_range + self._half_range * self._value),
-                self.vjoy_id,
-                self.axis_id
+        if not self.vjoy_dev.set_axis(
+                self.axis_id,
+                int(self._half_range + self._half_range * self._value)
         ):
             raise VJoyError(
                 "Failed setting axis value - {}".format(
@@ -316,13 +505,8 @@ class Button:
         :param is_pressed True if the button is pressed, False otherwise
         """
         assert(isinstance(is_pressed, bool))
-        self.vjoy_dev.ensure_ownership()
         self._is_pressed = is_pressed
-        if not VJoyInterface.SetBtn(
-                self._is_pressed,
-                self.vjoy_id,
-                self.button_id
-        ):
+        if not self.vjoy_dev.set_button(self.button_id, self._is_pressed):
             raise VJoyError(
                 "Failed setting button value - {}".format(
                     _error_string(self.vjoy_id, self.button_id, self._is_pressed)
@@ -386,8 +570,6 @@ class Hat:
 
         :param direction the new direction of the hat
         """
-        self.vjoy_dev.ensure_ownership()
-
         if self.hat_type == HatType.Discrete:
             self._set_discrete_direction(direction)
         elif self.hat_type == HatType.Continuous:
@@ -411,10 +593,9 @@ class Hat:
             )
 
         self._direction = direction
-        if not VJoyInterface.SetDiscPov(
-                Hat.to_discrete_direction[direction],
-                self.vjoy_id,
-                self.hat_id
+        if not self.vjoy_dev.set_discrete_hat(
+                self.hat_id,
+                Hat.to_discrete_direction[direction]
         ):
             raise VJoyError(
                 "Failed to set hat direction - {}".format(
@@ -435,10 +616,9 @@ class Hat:
             )
 
         self._direction = direction
-        if not VJoyInterface.SetContPov(
-                Hat.to_continuous_direction[direction],
-                self.vjoy_id,
-                self.hat_id
+        if not self.vjoy_dev.set_continuous_hat(
+                self.hat_id,
+                Hat.to_continuous_direction[direction]
         ):
             raise VJoyError(
                 "Failed to set hat direction - {}".format(
@@ -499,6 +679,22 @@ class VJoy:
         self.vjoy_id = vjoy_id
         self.pid = os.getpid()
 
+        # Complete state of the device as sent by UpdateVJD
+        self._position = JoystickPosition()
+        self._position.bDevice = vjoy_id
+        self._position_lock = threading.Lock()
+
+        # Last value sent to the driver for each input, writes of unchanged
+        # values are skipped
+        self._axis_cache = {}
+        self._button_cache = {}
+        self._hat_cache = {}
+        self.driver_call_count = 0
+        self.suppressed_count = 0
+
+        # Buttons and hats changed by the current batch and not yet sent
+        self._batched_inputs = set()
+
         # Initialize all controls
         self._axis_lookup = {}
         self._axis_names = {}
@@ -508,11 +704,7 @@ class VJoy:
 
         # Timestamp of the last time the device was used
         self._last_active = time.time()
-        self._keep_alive_timer = threading.Timer(
-            VJoy.keep_alive_timeout,
-            self._keep_alive
-        )
-        self._keep_alive_timer.start()
+        housekeeping.register(self)
 
         # Reset all controls
         self.reset()
@@ -526,20 +718,147 @@ class VJoy:
 
         Under certain circumstances the vJoy devices are reset (issue #129).
         By checking for ownership and reacquiring if needed this can be solved.
+        This is done periodically by the housekeeping service and whenever a
+        write fails, the complete state of the device is sent once it has
+        been reacquired.
+
+        :return True if the device had to be reacquired, False otherwise
         """
         if self.vjoy_id is None:
-            return
+            return False
 
-        if self.pid != VJoyInterface.GetOwnerPid(self.vjoy_id):
-            if not VJoyInterface.AcquireVJD(self.vjoy_id):
-                logging.getLogger("system").error(
-                    "Failed to re-acquire the vJoy device - vid: {}".format(
-                        self.vjoy_id
-                ))
-                raise VJoyError(
-                    "Failed to re-acquire the vJoy device - vid: {}".format(
-                        self.vjoy_id
-                ))
+        if self.pid == VJoyInterface.GetOwnerPid(self.vjoy_id):
+            return False
+
+        # The driver state is unknown after losing the device
+        self._invalidate_cache()
+        if not VJoyInterface.AcquireVJD(self.vjoy_id):
+            logging.getLogger("system").error(
+                "Failed to re-acquire the vJoy device - vid: {}".format(
+                    self.vjoy_id
+            ))
+            raise VJoyError(
+                "Failed to re-acquire the vJoy device - vid: {}".format(
+                    self.vjoy_id
+            ))
+        with self._position_lock:
+            VJoyInterface.UpdateVJD(self.vjoy_id, ctypes.byref(self._position))
+        return True
+
+    def set_axis(self, axis_id, value):
+        """Sets the raw value of an axis.
+
+        :param axis_id the usage id of the axis
+        :param value the raw value of the axis
+        :return True if the value was accepted, False otherwise
+        """
+        with self._position_lock:
+            if self._axis_cache.get(axis_id) == value:
+                self.suppressed_count += 1
+                return True
+            self._axis_cache[axis_id] = value
+            setattr(
+                self._position,
+                JoystickPosition.axis_fields[axis_id],
+                value
+            )
+        if write_combiner.defer(self):
+            return True
+        return self._send(VJoyInterface.SetAxis, value, self.vjoy_id, axis_id)
+
+    def set_button(self, button_id, is_pressed):
+        """Sets the state of a button.
+
+        :param button_id the id of the button
+        :param is_pressed True if the button is pressed, False otherwise
+        :return True if the state was accepted, False otherwise
+        """
+        field = JoystickPosition.button_fields[(button_id-1) // 32]
+        mask = 1 << ((button_id-1) % 32)
+        with self._position_lock:
+            if self._button_cache.get(button_id) == is_pressed:
+                self.suppressed_count += 1
+                return True
+        is_deferred = self._defer_state_change(("button", button_id))
+        with self._position_lock:
+            self._button_cache[button_id] = is_pressed
+            state = getattr(self._position, field)
+            setattr(
+                self._position,
+                field,
+                state | mask if is_pressed else state & ~mask
+            )
+        if is_deferred:
+            return True
+        return self._send(
+            VJoyInterface.SetBtn,
+            is_pressed,
+            self.vjoy_id,
+            button_id
+        )
+
+    def set_continuous_hat(self, hat_id, value):
+        """Sets the raw value of a continuous hat.
+
+        :param hat_id the id of the hat
+        :param value angle in hundredths of a degree, -1 for centered
+        :return True if the value was accepted, False otherwise
+        """
+        with self._position_lock:
+            if self._hat_cache.get(hat_id) == value:
+                self.suppressed_count += 1
+                return True
+        is_deferred = self._defer_state_change(("hat", hat_id))
+        with self._position_lock:
+            self._hat_cache[hat_id] = value
+            setattr(
+                self._position,
+                JoystickPosition.hat_fields[hat_id-1],
+                value & 0xFFFFFFFF
+            )
+        if is_deferred:
+            return True
+        return self._send(
+            VJoyInterface.SetContPov,
+            value,
+            self.vjoy_id,
+            hat_id
+        )
+
+    def set_discrete_hat(self, hat_id, value):
+        """Sets the raw value of a discrete hat.
+
+        Discrete hats are not part of the position report and thus are
+        always sent immediately.
+
+        :param hat_id the id of the hat
+        :param value direction index, -1 for centered
+        :return True if the value was accepted, False otherwise
+        """
+        return self._send(
+            VJoyInterface.SetDiscPov,
+            value,
+            self.vjoy_id,
+            hat_id
+        )
+
+    def flush(self):
+        """Sends the complete state of the device to the driver."""
+        with self._position_lock:
+            self.driver_call_count += 1
+            self._batched_inputs.clear()
+            success = VJoyInterface.UpdateVJD(
+                self.vjoy_id,
+                ctypes.byref(self._position)
+            )
+        # Reacquiring the device sends its complete state
+        if not success and not self.ensure_ownership():
+            self._invalidate_cache()
+            raise VJoyError(
+                "Failed updating device state - vid: {}".format(self.vjoy_id)
+            )
+        if gremlin.latency.enabled:
+            gremlin.latency.recorder.record_vjoy_write()
 
     @property
     def axis_count(self):
@@ -713,6 +1032,7 @@ class VJoy:
 
         # Perform reset using default vJoy functionality
         success = VJoyInterface.ResetVJD(self.vjoy_id)
+        self._invalidate_cache()
 
         # Restore input states based on what we recorded
         if success:
@@ -727,6 +1047,23 @@ class VJoy:
                 "Could not reset vJoy device, are we using it?"
             )
 
+    def maintain(self):
+        """Performs the periodic maintenance of the device.
+
+        Reacquires the device if it was lost and, if the device hasn't been
+        used for the keep alive timeout, resets it to ensure it doesn't
+        time out.
+        """
+        self.ensure_ownership()
+        if self._last_active + VJoy.keep_alive_timeout < time.time():
+            self.reset()
+
+    def reset_statistics(self):
+        """Resets the driver call and suppressed write counters."""
+        with self._position_lock:
+            self.driver_call_count = 0
+            self.suppressed_count = 0
+
     def used(self):
         """Updates the timestamp of the last time the device has been used."""
         self._last_active = time.time()
@@ -734,28 +1071,66 @@ class VJoy:
     def invalidate(self):
         """Releases all resources claimed by this instance.
 
-        Releases the lock on the vjoy device instance as well as terminating
-        the keep alive timer.
+        Releases the lock on the vjoy device instance as well as removing it
+        from the housekeeping service.
         """
         if self.vjoy_id:
+            housekeeping.unregister(self)
             self.reset()
             VJoyInterface.RelinquishVJD(self.vjoy_id)
             self.vjoy_id = None
-            self._keep_alive_timer.cancel()
 
-    def _keep_alive(self):
-        """Timer callback ensuring the vJoy device stays active.
+    def _send(self, driver_fn, *args):
+        """Calls a driver function changing the state of an input.
+
+        If the call fails ownership of the device is verified, as the device
+        may have been lost, in which case the device is reacquired and its
+        complete state sent again.
 
-        If the device hasn't been used in the last 60 seconds the device will
-        be reset to ensure it doesn't time out.
+        :param driver_fn the driver function to call
+        :param args the arguments of the driver function
+        :return True if the value was accepted, False otherwise
         """
-        if self._last_active + VJoy.keep_alive_timeout < time.time():
-            self.reset()
-        self._keep_alive_timer = threading.Timer(
-            VJoy.keep_alive_timeout,
-            self._keep_alive
-        )
-        self._keep_alive_timer.start()
+        self.driver_call_count += 1
+        if driver_fn(*args) or self.ensure_ownership():
+            if gremlin.latency.enabled:
+                gremlin.latency.recorder.record_vjoy_write()
+            return True
+        self._invalidate_cache()
+        return False
+
+    def _defer_state_change(self, input_id):
+        """Decides whether the state change of a button or hat is deferred.
+
+        A button or hat changing its state twice within the same batch would
+        lose its first state, for example the press of a press and release.
+        In that case the batched changes are sent before the new one is made.
+        Axes always report their latest position and are combined freely.
+
+        :param input_id (input type, id) tuple of the changing input
+        :return True if the change is deferred, False if it has to be sent
+            immediately
+        """
+        if not write_combiner.defer(self):
+            return False
+        with self._position_lock:
+            is_repeated = input_id in self._batched_inputs
+        if is_repeated:
+            self.flush()
+        with self._position_lock:
+            self._batched_inputs.add(input_id)
+        return True
+
+    def _invalidate_cache(self):
+        """Forgets the values last sent to the driver.
+
+        Required whenever the state of the driver is no longer known, which
+        causes the next write to every input to be sent.
+        """
+        with self._position_lock:
+            self._axis_cache = {}
+            self._button_cache = {}
+            self._hat_cache = {}
 
     def _init_axes(self):
         """Retrieves all axes present on the vJoy device and creates their
@@ -822,6 +1197,56 @@ class VJoy:
         )
 
 
+def bake_transfer_table(size, deadzone_limits, spline_type, control_points):
+    """Returns the table of the combined deadzone and response curve.
+
+    Entry i holds the output for the input -1 + 2 * i / (size - 1).
+
+    :param size number of entries of the table
+    :param deadzone_limits the (low, center_low, center_high, high) deadzone
+        limits
+    :param spline_type the type of spline to use, None for a linear response
+    :param control_points the control points defining the spline
+    :return array holding the output value for each entry
+    """
+    if spline_type == "cubic-spline":
+        curve = gremlin.spline.CubicSpline(control_points)
+    elif spline_type == "cubic-bezier-spline":
+        curve = gremlin.spline.CubicBezierSpline(control_points)
+    else:
+        if spline_type is not None:
+            logging.getLogger("system").error("Invalid spline type specified")
+        curve = None
+
+    step = 2.0 / (size - 1)
+    values = [
+        deadzone(-1.0 + i * step, *deadzone_limits) for i in range(size)
+    ]
+    if curve is not None:
+        values = curve.evaluate(values)
+    return array.array("d", values)
+
+
+# Tables of the linear transfer function, indexed by their size
+_linear_tables = {}
+
+
+def _linear_table(size):
+    """Returns the table of the transfer function without any deadzone or
+    response curve.
+
+    The table is shared by all axes of the same resolution.
+
+    :param size number of entries of the table
+    :return array holding the output value for each entry
+    """
+    table = _linear_tables.get(size)
+    if table is None:
+        table = bake_transfer_table(size, (-1.0, 0.0, 0.0, 1.0), None, None)
+        _linear_tables[size] = table
+    return table
+
+
 def deadzone(value, low, low_center, high_center, high):
     """Returns the mapped value taking the provided deadzone into
     account.
@@ -34,9 +34,76 @@ class VJoyState(enum.Enum):
     Unknown = 4     # Unknown type of error
 
 
-class VJoyInterface:
+class JoystickPosition(ctypes.Structure):
+
+    """Defines the JOYSTICK_POSITION_V2 structure used by UpdateVJD.
+
+    The structure holds the complete state of a vJoy device which is sent
+    to the driver with a single call.
+    """
+
+    _fields_ = (
+        ("bDevice", ctypes.c_ubyte),
+        ("wThrottle", ctypes.c_int32),
+        ("wRudder", ctypes.c_int32),
+        ("wAileron", ctypes.c_int32),
+        ("wAxisX", ctypes.c_int32),
+        ("wAxisY", ctypes.c_int32),
+        ("wAxisZ", ctypes.c_int32),
+        ("wAxisXRot", ctypes.c_int32),
+        ("wAxisYRot", ctypes.c_int32),
+        ("wAxisZRot", ctypes.c_int32),
+        ("wSlider", ctypes.c_int32),
+        ("wDial", ctypes.c_int32),
+        ("wWheel", ctypes.c_int32),
+        ("wAxisVX", ctypes.c_int32),
+        ("wAxisVY", ctypes.c_int32),
+        ("wAxisVZ", ctypes.c_int32),
+        ("wAxisVBRX", ctypes.c_int32),
+        ("wAxisVBRY", ctypes.c_int32),
+        ("wAxisVBRZ", ctypes.c_int32),
+        # Button bit fields are declared unsigned to allow setting the
+        # highest bit, the layout is identical to the LONG fields of vJoy
+        ("lButtons", ctypes.c_uint32),
+        ("bHats", ctypes.c_uint32),
+        ("bHatsEx1", ctypes.c_uint32),
+        ("bHatsEx2", ctypes.c_uint32),
+        ("bHatsEx3", ctypes.c_uint32),
+        ("lButtonsEx1", ctypes.c_uint32),
+        ("lButtonsEx2", ctypes.c_uint32),
+        ("lButtonsEx3", ctypes.c_uint32),
+    )
+
+    # Fields holding the value of the axis with the given usage id
+    axis_fields = {
+        0x30: "wAxisX",
+        0x31: "wAxisY",
+        0x32: "wAxisZ",
+        0x33: "wAxisXRot",
+        0x34: "wAxisYRot",
+        0x35: "wAxisZRot",
+        0x36: "wSlider",
+        0x37: "wDial"
+    }
+
+    # Fields holding the state of buttons 1-32, 33-64, 65-96, and 97-128
+    button_fields = ("lButtons", "lButtonsEx1", "lButtonsEx2", "lButtonsEx3")
+
+    # Fields holding the value of continuous hats 1 to 4
+    hat_fields = ("bHats", "bHatsEx1", "bHatsEx2", "bHatsEx3")
 
-    """Allows low level interaction with VJoy devices via ctypes."""
+
+def _load_library():
+    """Returns the library implementing the vJoy interface API.
+
+    Setting the GREMLIN_BACKEND environment variable to "fake" selects the
+    pure Python implementation in vjoy.fake, otherwise the dll is loaded.
+
+    :return library exposing the vJoy interface functions
+    """
+    if os.environ.get("GREMLIN_BACKEND") == "fake":
+        from vjoy import fake
+        return fake.FakeVJoyInterface()
 
     # Attempt to find the correct location of the dll for development
     # and installed use cases.
@@ -48,7 +115,14 @@ class VJoyInterface:
     else:
         raise GremlinError("Unable to locate vjoy dll")
 
-    vjoy_dll = ctypes.cdll.LoadLibrary(dll_path)
+    return ctypes.cdll.LoadLibrary(dll_path)
+
+
+class VJoyInterface:
+
+    """Allows low level interaction with VJoy devices via ctypes."""
+
+    vjoy_dll = _load_library()
 
     # Declare argument and return types for all the functions
     # exposed by the dll
@@ -166,8 +240,13 @@ class VJoyInterface:
     @classmethod
     def initialize(cls):
         """Initializes the functions as class methods."""
+        is_dll = isinstance(cls.vjoy_dll, ctypes.CDLL)
         for fn_name, params in cls.api_functions.items():
             dll_fn = getattr(cls.vjoy_dll, fn_name)
+            # Only the dll requires type information, the fake is pure Python
+            if not is_dll:
+                setattr(cls, fn_name, dll_fn)
+                continue
             if "arguments" in params:
                 dll_fn.argtypes = params["arguments"]
             if "returns" in params: